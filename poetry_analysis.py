@@ -0,0 +1,207 @@
+import poetry_estimator
+import poetry_lexicon
+import poetry_patterns
+import poetry_tokenizer
+
+"""
+A poetry pattern:  tuple of (list of int, list of str)
+  - first item is a list of the number of syllables required in each line
+  - second item is a list describing the rhyme scheme rule for each line
+"""
+
+"""
+A pronunciation dictionary: dict of {str: list of str}
+  - each key is a word (a str)
+  - each value is a list of phonemes for that word (a list of str)
+"""
+
+
+class PoemAnalysis:
+    """ Everything the poetry checks need to know about one poem, computed
+    from a single tokenization.
+
+    line_count: the number of lines count_lines counts (an int)
+    lines: the poem's lines as get_poem_lines returns them (list of str)
+    words: the cleaned-up words of each line (list of list of str)
+    syllables: the number of syllables in each line (list of int)
+    rhyme_keys: the rhyme key of each line's last word, or None if it has
+                no stressed vowel (list of object)
+    unknown_words: the words not in the pronunciation dictionary, in order
+                   of first appearance (list of str)
+    estimated_words: the words not in the pronunciation dictionary whose
+                     syllables and rhyme were estimated instead, in order of
+                     first appearance (list of str)
+    stresses: the stress string (see poetry_meter) of each line, in which
+              each syllable of an estimated word may be stressed or not
+              and an unknown word has no syllables (list of str)
+    """
+
+    __slots__ = ('line_count', 'lines', 'words', 'syllables', 'rhyme_keys',
+                 'unknown_words', 'estimated_words', 'stresses')
+
+    def __init__(self, line_count, lines, words, syllables, rhyme_keys,
+                 unknown_words, estimated_words=None, stresses=None):
+        self.line_count = line_count
+        self.lines = lines
+        self.words = words
+        self.syllables = syllables
+        self.rhyme_keys = rhyme_keys
+        self.unknown_words = unknown_words
+        if estimated_words is None:
+            estimated_words = []
+        self.estimated_words = estimated_words
+        if stresses is None:
+            stresses = [''] * len(lines)
+        self.stresses = stresses
+
+    def __repr__(self):
+        return ('PoemAnalysis({!r}, {!r}, {!r}, {!r}, {!r}, {!r}, {!r}, '
+                '{!r})'.format(self.line_count, self.lines, self.words,
+                               self.syllables, self.rhyme_keys,
+                               self.unknown_words, self.estimated_words,
+                               self.stresses))
+
+    def has_line_count(self, pattern):
+        """ (PoemAnalysis, poetry pattern) -> bool
+
+        Return True iff the poem has the number of lines pattern requires.
+        """
+        return self.line_count == len(pattern[0])
+
+    def check_syllables(self, pattern):
+        """ (PoemAnalysis, poetry pattern) -> list of str
+
+        Return what poetry_functions.check_syllables returns for this poem's
+        lines and pattern.
+        """
+        problem_lines = []
+        # Lines whose pattern is 0 may have any number of syllables.
+        form = poetry_patterns.compile_form(pattern)
+        for i in form.counted_lines:
+            if self.syllables[i] != form.syllables[i]:
+                problem_lines.append(self.lines[i])
+        return problem_lines
+
+    def check_rhyme_scheme(self, pattern):
+        """ (PoemAnalysis, poetry pattern) -> list of list of str
+
+        Return what poetry_functions.check_rhyme_scheme returns for this
+        poem's lines and pattern.
+        """
+        problem_rhymes = []
+        for label, positions in poetry_patterns.compile_form(pattern).groups:
+            # Lines whose last word has no stressed vowel are not compared.
+            group_keys = set()
+            for position in positions:
+                if self.rhyme_keys[position] is not None:
+                    group_keys.add(self.rhyme_keys[position])
+            if len(group_keys) > 1:
+                problem_rhymes.append([self.lines[position]
+                                       for position in positions])
+        return problem_rhymes
+
+    def check_meter(self, pattern):
+        """ (PoemAnalysis, poetry pattern) -> list of str
+
+        Return what poetry_functions.check_meter returns for this poem's
+        lines and pattern.
+        """
+        meter_pattern = poetry_patterns.compile_form(pattern).meter_pattern
+        if meter_pattern is None:
+            return []
+        fullmatch = meter_pattern.fullmatch
+        return [self.lines[i] for i in range(len(self.lines))
+                if fullmatch(self.stresses[i]) is None]
+
+
+def analyze_poem(poem_lines_raw, word_to_phonemes, estimate=False):
+    r""" (list of str, pronunciation dictionary, bool) -> PoemAnalysis
+
+    Return the analysis of the poem in poem_lines_raw (as read with
+    readlines). Each line is tokenized and each word looked up once.
+    Words missing from word_to_phonemes count as zero syllables and are
+    listed in the analysis's unknown_words. If estimate is True, their
+    syllables and rhyme are estimated instead (see poetry_estimator) and
+    they are listed in the analysis's estimated_words.
+
+    >>> word_to_phonemes = {'GAP': ['G', 'AE1', 'P'],
+    ...                     'CAP': ['K', 'AE1', 'P'],
+    ...                     'POEM': ['P', 'OW1', 'AH0', 'M']}
+    >>> analysis = analyze_poem(['Poem gap,\n', '\n', 'Cap zap!\n'],
+    ...                         word_to_phonemes)
+    >>> analysis.line_count, analysis.lines, analysis.words
+    (2, ['Poem gap,', 'Cap zap!'], [['POEM', 'GAP'], ['CAP', 'ZAP']])
+    >>> analysis.syllables, analysis.unknown_words
+    ([3, 1], ['ZAP'])
+    >>> analysis.check_syllables(([3, 2], ['A', 'A']))
+    ['Cap zap!']
+    >>> analysis = analyze_poem(['Cap zap!\n'], word_to_phonemes, True)
+    >>> analysis.syllables, analysis.unknown_words, analysis.estimated_words
+    ([2], [], ['ZAP'])
+    >>> analysis.stresses
+    ['xx']
+    """
+    entry_of = poetry_lexicon.entry_lookup(word_to_phonemes)
+    line_count = 0
+    lines = []
+    words = []
+    syllables = []
+    rhyme_keys = []
+    stresses = []
+    unknown_words = []
+    estimated_words = []
+    if estimate:
+        missing_words = estimated_words
+    else:
+        missing_words = unknown_words
+    # The same words as missing_words, for membership tests.
+    missing = set()
+
+    for raw_line in poem_lines_raw:
+        # The same test as count_lines.
+        if not poetry_tokenizer.is_blank(raw_line):
+            line_count += 1
+        # The same lines as get_poem_lines.
+        if raw_line.endswith('\n'):
+            raw_line = raw_line[:-1]
+        if raw_line == '' or raw_line == ' ':
+            continue
+        line = raw_line.strip()
+        line_words = poetry_tokenizer.tokenize_line(line)
+        # Each word is looked up once, and its syllables, rhyme key and
+        # stresses all come from that entry; a miss makes it unknown.
+        rhyme_key = None
+        line_syllables = 0
+        word_stresses = []
+        for word in line_words:
+            try:
+                word_syllables, rhyme_key, word_stress = entry_of(word)
+            except KeyError:
+                rhyme_key = None
+                if estimate:
+                    word_syllables = poetry_estimator.estimate_syllables(word)
+                    line_syllables += word_syllables
+                    word_stresses.append('x' * word_syllables)
+                if word not in missing:
+                    missing.add(word)
+                    missing_words.append(word)
+                continue
+            line_syllables += word_syllables
+            word_stresses.append(word_stress)
+        line_stresses = ''.join(word_stresses)
+        # rhyme_key is the last word's; only a missing one needs estimating.
+        if estimate and len(line_words) > 0 and line_words[-1] in missing:
+            rhyme_key = poetry_estimator.estimate_rhyme_key(line_words[-1])
+        lines.append(line)
+        words.append(line_words)
+        syllables.append(line_syllables)
+        rhyme_keys.append(rhyme_key)
+        stresses.append(line_stresses)
+
+    return PoemAnalysis(line_count, lines, words, syllables, rhyme_keys,
+                        unknown_words, estimated_words, stresses)
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,606 @@
+import argparse
+import concurrent.futures
+import glob
+import json
+import os
+import os.path
+import sys
+import time
+
+import poetry_analysis
+import poetry_cache
+import poetry_fuzzy
+import poetry_layers
+import poetry_patterns
+import poetry_reader
+import poetry_stores
+
+DICTIONARY_FILENAME = 'dictionary.txt'
+POETRY_FORMS_FILENAME = 'poetry_forms.txt'
+ALL_FORMS = 'all'
+CHUNK_SIZE = 64
+# What --typos can do with words that are not in the dictionary: suggest
+# the closest dictionary words, or also check the poem with the closest
+# word where there is only one.
+TYPO_MODES = ('suggest', 'resolve')
+
+"""
+A poem result: dict of {str: object}
+  - 'poem': the poem's filename (a str)
+  - 'form': the name of the poetry form it was checked against (a str)
+  - 'ok': whether the poem matches the form (a bool)
+  - 'lines': whether the poem has the right number of lines (a bool)
+  - 'syllables': the lines with the wrong number of syllables (list of str)
+  - 'rhymes': the lines that should rhyme but don't (list of list of str)
+  - 'meter': the lines not in the form's meter, if it declares one (list
+    of str)
+  - 'error': why the poem could not be checked, if it couldn't (a str)
+  - 'estimated': the words not in the pronunciation dictionary whose
+    syllables and rhyme were estimated, if there were any (list of str)
+  - 'suggestions': the closest dictionary words to each word not in the
+    pronunciation dictionary, estimated or not, if typos were looked for
+    (dict of {str: list of str})
+  - 'resolved': the dictionary word that each misspelled word was checked
+    as, if there were any (dict of {str: str})
+"""
+
+# Set in each worker process by _init_worker.
+_word_to_phonemes = None
+_name_to_poetry_pattern = None
+_estimate = False
+_fuzzy_index = None
+
+
+def find_poems(paths):
+    """ (list of str) -> list of str
+
+    Return the sorted poem filenames named by paths. Each path is a file,
+    a directory (all of whose .txt files are poems) or a glob pattern.
+    """
+    filenames = set()
+    for path in paths:
+        if os.path.isdir(path):
+            filenames.update(glob.glob(os.path.join(path, '*.txt')))
+        elif os.path.isfile(path):
+            filenames.add(path)
+        else:
+            filenames.update(glob.glob(path))
+    return sorted(filenames)
+
+
+def check_analysis(analysis, pattern):
+    """ (poetry_analysis.PoemAnalysis, poetry pattern)
+                            -> tuple of (bool, list of str, list of list of str)
+
+    Return whether the analyzed poem has the right number of lines for
+    pattern, the lines with the wrong number of syllables and the lines that
+    should rhyme but don't. The last two are empty if the line count is
+    wrong. This is the non-printing counterpart of poetry_program.check_poem.
+
+    >>> word_to_phonemes = {'GAP': ['G', 'AE1', 'P'],
+    ...                     'CAP': ['K', 'AE1', 'P']}
+    >>> analysis = poetry_analysis.analyze_poem(['Gap\\n', '\\n', 'Cap\\n'],
+    ...                                         word_to_phonemes)
+    >>> check_analysis(analysis, ([1, 1], ['A', 'A']))
+    (True, [], [])
+    >>> check_analysis(analysis, ([1, 1, 1], ['A', 'A', 'A']))
+    (False, [], [])
+    """
+    if not analysis.has_line_count(pattern):
+        return False, [], []
+    return (True, analysis.check_syllables(pattern), 
+            analysis.check_rhyme_scheme(pattern))
+
+
+def check_poem_lines(poem_name, poem_lines_raw, form_names, 
+                     word_to_phonemes, name_to_poetry_pattern, estimate=False,
+                     fuzzy_index=None):
+    """ (str, list of str, list of str, pronunciation dictionary,
+         dict of {str: poetry pattern}, bool, poetry_fuzzy.FuzzyIndex)
+                                                    -> list of poem result
+
+    Return the results of checking the poem in poem_lines_raw, called
+    poem_name in the results, against each form in form_names. The poem is
+    analyzed only once. If estimate is True, words not in the pronunciation
+    dictionary are estimated rather than reported as errors. If fuzzy_index
+    is given, the closest words it finds to each unknown or estimated word
+    are suggested. If word_to_phonemes is a poetry_fuzzy.ResolvingPronunciation,
+    the misspelled words it resolved are listed.
+    """
+    if hasattr(word_to_phonemes, 'new_poem'):
+        word_to_phonemes.new_poem()
+    analysis = poetry_analysis.analyze_poem(poem_lines_raw, word_to_phonemes,
+                                            estimate)
+    error = None
+    suggestions = None
+    corrections = None
+    if len(analysis.unknown_words) > 0:
+        error = 'unknown words: {}'.format(', '.join(analysis.unknown_words))
+    # An estimated word may be a typo too, so it gets suggestions as well.
+    # Only one of the two lists has words, depending on estimate.
+    missing_words = analysis.unknown_words + analysis.estimated_words
+    if fuzzy_index is not None and len(missing_words) > 0:
+        suggestions = {}
+        for word in missing_words:
+            suggestions[word] = fuzzy_index.closest(word)
+    if hasattr(word_to_phonemes, 'corrections'):
+        corrections = word_to_phonemes.corrections(
+            [word for line_words in analysis.words for word in line_words])
+
+    results = []
+    for form_name in form_names:
+        result = {'poem': poem_name, 'form': form_name}
+        if suggestions is not None:
+            result['suggestions'] = suggestions
+        if corrections:
+            result['resolved'] = corrections
+        if error is not None:
+            result['ok'] = False
+            result['error'] = error
+        else:
+            lines_ok, problem_lines, problem_rhymes = check_analysis(
+                analysis, name_to_poetry_pattern[form_name])
+            result['ok'] = (lines_ok and len(problem_lines) == 0
+                            and len(problem_rhymes) == 0)
+            result['lines'] = lines_ok
+            result['syllables'] = problem_lines
+            result['rhymes'] = problem_rhymes
+            pattern = name_to_poetry_pattern[form_name]
+            if poetry_patterns.compile_form(pattern).meter is not None:
+                if lines_ok:
+                    result['meter'] = analysis.check_meter(pattern)
+                else:
+                    result['meter'] = []
+                result['ok'] = result['ok'] and len(result['meter']) == 0
+            if len(analysis.estimated_words) > 0:
+                result['estimated'] = analysis.estimated_words
+        results.append(result)
+    return results
+
+
+def _error_results(poem_name, form_names, error):
+    """ (str, list of str, str) -> list of poem result
+
+    Return the results for a poem called poem_name that could not be checked
+    against any of form_names because of error.
+    """
+    results = []
+    for form_name in form_names:
+        results.append({'poem': poem_name, 'form': form_name, 'ok': False,
+                        'error': error})
+    return results
+
+
+def check_poem_file(poem_filename, form_names, word_to_phonemes,
+                    name_to_poetry_pattern, estimate=False, fuzzy_index=None):
+    """ (str, list of str, pronunciation dictionary,
+         dict of {str: poetry pattern}, bool, poetry_fuzzy.FuzzyIndex)
+                                                    -> list of poem result
+
+    Return the results of checking the poem in poem_filename against each
+    form in form_names, estimating unknown words if estimate is True and
+    suggesting words from fuzzy_index for them if it is given.
+    """
+    try:
+        with open(poem_filename) as poem_file:
+            poem_lines_raw = poem_file.readlines()
+    except (OSError, UnicodeDecodeError) as exception:
+        return _error_results(poem_filename, form_names, str(exception))
+    return check_poem_lines(poem_filename, poem_lines_raw, form_names,
+                            word_to_phonemes, name_to_poetry_pattern, estimate,
+                            fuzzy_index)
+
+
+def _init_worker(dictionary_filename, poetry_forms_filename, 
+                 shared_handle=None, estimate=False, overlay_filenames=(),
+                 typos=None):
+    """ (str, str, tuple, bool, list of str, str) -> NoneType
+
+    Load the pronunciation data and poetry forms once for this worker
+    process. If shared_handle is given, attach to the parent's shared
+    pronunciation dictionary instead of loading one. Words in the overlay
+    files overlay_filenames take precedence over the dictionary's. estimate
+    says whether the worker estimates unknown words, and typos (one of
+    TYPO_MODES, or None) what it does with misspelled ones.
+    """
+    global _word_to_phonemes, _name_to_poetry_pattern, _estimate
+    global _fuzzy_index
+    _estimate = estimate
+    if shared_handle is None:
+        _word_to_phonemes = poetry_reader.load_lexicon(dictionary_filename)
+    else:
+        _word_to_phonemes = poetry_stores.attach_shared_pronunciation(
+            shared_handle)
+    if len(overlay_filenames) > 0:
+        _word_to_phonemes = poetry_layers.LayeredPronunciation(
+            _word_to_phonemes, overlay_filenames)
+    _fuzzy_index = None
+    if typos is not None:
+        _fuzzy_index = poetry_reader.load_fuzzy_index(dictionary_filename)
+    if typos == 'resolve':
+        _word_to_phonemes = poetry_fuzzy.ResolvingPronunciation(
+            _word_to_phonemes, _fuzzy_index)
+    _name_to_poetry_pattern = poetry_reader.load_forms(poetry_forms_filename)
+
+
+def _check_chunk(poem_filenames, form_names):
+    """ (list of str, list of str) -> list of poem result
+
+    Check a chunk of poem files in a worker process.
+    """
+    results = []
+    for poem_filename in poem_filenames:
+        results.extend(check_poem_file(poem_filename, form_names,
+                                       _word_to_phonemes,
+                                       _name_to_poetry_pattern, _estimate,
+                                       _fuzzy_index))
+    return results
+
+
+def _check_poems_chunk(poems, form_names):
+    """ (list of tuple of (str, list of str), list of str)
+                                                    -> list of poem result
+
+    Check a chunk of (poem name, poem lines) pairs in a worker process.
+    """
+    results = []
+    for poem_name, poem_lines_raw in poems:
+        results.extend(check_poem_lines(poem_name, poem_lines_raw, 
+                                        form_names, _word_to_phonemes,
+                                        _name_to_poetry_pattern, _estimate,
+                                        _fuzzy_index))
+    return results
+
+
+def _check_uncached_chunk(poems, form_names):
+    """ (list of tuple of (str, list of str, list of str), NoneType)
+                                                    -> list of poem result
+
+    Check a chunk of (poem name, poem lines, form names) triples, each
+    against its own form names, in a worker process.
+    """
+    results = []
+    for poem_name, poem_lines_raw, poem_form_names in poems:
+        results.extend(check_poem_lines(poem_name, poem_lines_raw, 
+                                        poem_form_names, _word_to_phonemes,
+                                        _name_to_poetry_pattern, _estimate,
+                                        _fuzzy_index))
+    return results
+
+
+def _chunks(items, size):
+    """ (iterable, int) -> generator of list
+
+    Yield the items of items in lists of at most size items, reading items
+    lazily.
+
+    >>> list(_chunks(range(5), 2))
+    [[0, 1], [2, 3], [4]]
+    """
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if len(chunk) > 0:
+        yield chunk
+
+
+def _run_pool(check, chunks, form_names, report, workers,
+              dictionary_filename, poetry_forms_filename, shared, estimate,
+              overlay_filenames, typos=None):
+    """ (function, iterable of list, list of str, function, int, str, str,
+         bool, bool, list of str, str) -> NoneType
+
+    Call check(chunk, form_names) for each chunk in chunks in a pool of
+    worker processes and call report with every poem result as soon as its
+    chunk completes. Only a few chunks per worker are in flight at once, so
+    chunks may be produced lazily from an input of any size.
+
+    If shared is True, the pronunciation dictionary is loaded once into
+    shared memory and every worker reads it from there without a copy. If
+    estimate is True, the workers estimate unknown words; typos says what
+    they do with misspelled ones. Each worker reads the overlay files
+    overlay_filenames itself.
+    """
+    segment = None
+    shared_handle = None
+    if shared:
+        segment, shared_handle = poetry_reader.load_compact_pronunciation(
+            dictionary_filename).share()
+    else:
+        # Build the compiled cache once here, so that the workers only 
+        # read it.
+        poetry_reader.load_lexicon(dictionary_filename)
+    if typos is not None:
+        poetry_reader.load_fuzzy_index(dictionary_filename)
+
+    try:
+        with concurrent.futures.ProcessPoolExecutor(
+                max_workers=workers, initializer=_init_worker,
+                initargs=(dictionary_filename, poetry_forms_filename,
+                          shared_handle, estimate,
+                          overlay_filenames, typos)) as executor:
+            max_pending = 2 * (workers or os.cpu_count() or 1)
+            pending = set()
+            for chunk in chunks:
+                if len(pending) >= max_pending:
+                    done, pending = concurrent.futures.wait(
+                        pending, 
+                        return_when=concurrent.futures.FIRST_COMPLETED)
+                    for future in done:
+                        for result in future.result():
+                            report(result)
+                pending.add(executor.submit(check, chunk, form_names))
+            for future in concurrent.futures.as_completed(pending):
+                for result in future.result():
+                    report(result)
+    finally:
+        if segment is not None:
+            segment.close()
+            segment.unlink()
+
+
+def _read_poems(poem_filenames, form_names, report):
+    """ (list of str, list of str, function)
+                            -> generator of tuple of (str, list of str)
+
+    Yield (poem_filename, poem_lines_raw) for each poem in poem_filenames,
+    calling report with the error results of any poem that can't be read.
+    """
+    for poem_filename in poem_filenames:
+        try:
+            with open(poem_filename) as poem_file:
+                poem_lines_raw = poem_file.readlines()
+        except (OSError, UnicodeDecodeError) as exception:
+            for result in _error_results(poem_filename, form_names,
+                                         str(exception)):
+                report(result)
+            continue
+        yield poem_filename, poem_lines_raw
+
+
+def _run_cached(poems, form_names, report, cache, workers,
+                dictionary_filename, poetry_forms_filename, shared, estimate,
+                overlay_filenames, typos=None):
+    """ (iterable of tuple of (str, list of str), list of str, function,
+         poetry_cache.ResultCache, int, str, str, bool, bool, list of str,
+         str) -> NoneType
+
+    Check every (poem name, poem lines) pair in poems against every form in
+    form_names like _run_pool, but report the results cache already holds
+    straight away and only send the missing (poem, form) pairs to the
+    workers. Their results are added to cache.
+    """
+    name_to_poetry_pattern = poetry_reader.load_forms(poetry_forms_filename)
+    # For each poem in flight: its key and the number of results to come.
+    in_flight = {}
+    options = []
+    if estimate:
+        options.append('estimate')
+    if typos is not None:
+        options.append('typos=' + typos)
+    options = ' '.join(options)
+
+    def uncached_poems():
+        for poem_name, poem_lines_raw in poems:
+            poem_key = cache.poem_key(poem_lines_raw, options)
+            missing = []
+            for form_name in form_names:
+                cached = cache.get(poem_key, 
+                                   name_to_poetry_pattern[form_name])
+                if cached is None:
+                    missing.append(form_name)
+                else:
+                    result = {'poem': poem_name, 'form': form_name}
+                    result.update(cached)
+                    report(result)
+            if len(missing) > 0:
+                in_flight[poem_name] = [poem_key, len(missing)]
+                yield poem_name, poem_lines_raw, missing
+
+    def report_and_cache(result):
+        poem = in_flight[result['poem']]
+        cache.put(poem[0], name_to_poetry_pattern[result['form']], result)
+        poem[1] -= 1
+        if poem[1] == 0:
+            del in_flight[result['poem']]
+        report(result)
+
+    try:
+        _run_pool(_check_uncached_chunk, 
+                  _chunks(uncached_poems(), CHUNK_SIZE), None, 
+                  report_and_cache, workers, dictionary_filename, 
+                  poetry_forms_filename, shared, estimate, overlay_filenames,
+                  typos)
+    finally:
+        cache.flush()
+
+
+def check_corpus(poem_filenames, form_names, report, workers=None,
+                 dictionary_filename=DICTIONARY_FILENAME,
+                 poetry_forms_filename=POETRY_FORMS_FILENAME, shared=False,
+                 cache=None, estimate=False, overlay_filenames=(),
+                 typos=None):
+    """ (list of str, list of str, function, int, str, str, bool,
+         poetry_cache.ResultCache, bool, list of str, str) -> int
+
+    Check every poem in poem_filenames against every form in form_names
+    using a pool of worker processes (one per core by default), calling
+    report with each poem result as soon as its chunk completes. Return the
+    number of poems checked.
+
+    If shared is True, the pronunciation dictionary is loaded once into
+    shared memory and every worker reads it from there without a copy.
+
+    If cache is given, results it already holds are reported without
+    checking the poem again, and new results are added to it. The poem
+    files are then read by this process rather than by the workers.
+
+    If estimate is True, words not in the pronunciation dictionary have
+    their syllables and rhymes estimated (and are listed in the results)
+    instead of making the poem fail with an error.
+
+    Words in the overlay files overlay_filenames (in the CMU format) take
+    precedence over the dictionary's, later files over earlier ones; see
+    poetry_layers.LayeredPronunciation. A cache must then have been made
+    with the same overlay files.
+
+    If typos is 'suggest', the results of poems with unknown or estimated
+    words suggest the closest dictionary words (see poetry_fuzzy). If it is 'resolve', a
+    word with only one closest dictionary word is also checked as that
+    word, and listed in the results.
+    """
+    if cache is not None:
+        _run_cached(_read_poems(poem_filenames, form_names, report),
+                    form_names, report, cache, workers, dictionary_filename,
+                    poetry_forms_filename, shared, estimate, overlay_filenames,
+                    typos)
+        return len(poem_filenames)
+    _run_pool(_check_chunk, _chunks(poem_filenames, CHUNK_SIZE), form_names,
+              report, workers, dictionary_filename, poetry_forms_filename,
+              shared, estimate, overlay_filenames, typos)
+    return len(poem_filenames)
+
+
+def check_stream(poems_filename, form_names, report, workers=None,
+                 delimiter=None, dictionary_filename=DICTIONARY_FILENAME,
+                 poetry_forms_filename=POETRY_FORMS_FILENAME, shared=False,
+                 cache=None, estimate=False, overlay_filenames=(),
+                 typos=None):
+    """ (str, list of str, function, int, str, str, str, bool,
+         poetry_cache.ResultCache, bool, list of str, str) -> int
+
+    Check every poem in the collection poems_filename (see
+    poetry_reader.iter_poems for how poems are separated) against every
+    form in form_names, like check_corpus (including its use of cache,
+    estimate, overlay_filenames and typos).
+    The file is read incrementally, so memory use does not grow with its
+    size. Each poem is named 'poems_filename:line_number' in the results.
+    Return the number of poems checked.
+    """
+    count = [0]
+
+    def named_poems(poems_file):
+        for line_number, poem_lines_raw in poetry_reader.iter_poems(
+                poems_file, delimiter):
+            count[0] += 1
+            yield ('{}:{}'.format(poems_filename, line_number), 
+                   poem_lines_raw)
+
+    with open(poems_filename) as poems_file:
+        if cache is not None:
+            _run_cached(named_poems(poems_file), form_names, report, cache,
+                        workers, dictionary_filename, poetry_forms_filename,
+                        shared, estimate, overlay_filenames, typos)
+            return count[0]
+        _run_pool(_check_poems_chunk, 
+                  _chunks(named_poems(poems_file), CHUNK_SIZE), form_names,
+                  report, workers, dictionary_filename, poetry_forms_filename,
+                  shared, estimate, overlay_filenames, typos)
+    return count[0]
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        description='Check many poem files against poetry forms in parallel.')
+    parser.add_argument('poems', nargs='+',
+                        help='poem files, directories or glob patterns '
+                        '(or, with --stream, collections of poems)')
+    parser.add_argument('--form', default=ALL_FORMS,
+                        help='poetry form to check against (default: all)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='number of worker processes (default: cores)')
+    parser.add_argument('--output', default=None,
+                        help='file to write JSON lines to (default: stdout)')
+    parser.add_argument('--shared-memory', action='store_true',
+                        help='share one pronunciation dictionary between '
+                        'all workers')
+    parser.add_argument('--stream', action='store_true',
+                        help='treat each file as a collection of poems and '
+                        'read it incrementally')
+    parser.add_argument('--delimiter', default=None,
+                        help='with --stream, the line that separates poems '
+                        '(default: blank lines)')
+    parser.add_argument('--estimate', action='store_true',
+                        help='estimate the syllables and rhymes of words '
+                        'that are not in the dictionary')
+    parser.add_argument('--typos', choices=TYPO_MODES, default=None,
+                        help='suggest the closest dictionary words for '
+                        'words that are not in it, or also check a word '
+                        'as its closest one if there is only one')
+    parser.add_argument('--overlay', action='append', default=[],
+                        help='a dictionary file of extra or corrected words '
+                        'that takes precedence over --dictionary (may be '
+                        'repeated; later files take precedence)')
+    parser.add_argument('--cache-size', type=int, default=0,
+                        help='cache up to this many results in memory '
+                        '(default: no cache)')
+    parser.add_argument('--cache-file', default=None,
+                        help='SQLite file that keeps cached results '
+                        'between runs')
+    parser.add_argument('--dictionary', default=DICTIONARY_FILENAME)
+    parser.add_argument('--forms', default=POETRY_FORMS_FILENAME)
+    options = parser.parse_args(args)
+
+    try:
+        name_to_poetry_pattern = poetry_reader.load_forms(options.forms)
+    except ValueError as error:
+        parser.error('invalid poetry forms file {}:\n{}'.format(
+            options.forms, error))
+    if options.form == ALL_FORMS:
+        form_names = sorted(name_to_poetry_pattern)
+    elif options.form in name_to_poetry_pattern:
+        form_names = [options.form]
+    else:
+        parser.error('unknown poetry form: {}'.format(options.form))
+
+    poem_filenames = find_poems(options.poems)
+    if options.output is None:
+        output = sys.stdout
+    else:
+        output = open(options.output, 'w')
+
+    def report(result):
+        output.write(json.dumps(result) + '\n')
+
+    cache = None
+    if options.cache_size > 0 or options.cache_file is not None:
+        cache = poetry_cache.ResultCache(
+            options.dictionary, options.forms,
+            options.cache_size or poetry_cache.DEFAULT_MAX_SIZE,
+            options.cache_file, options.overlay)
+
+    start = time.perf_counter()
+    try:
+        if options.stream:
+            count = 0
+            for poems_filename in poem_filenames:
+                count += check_stream(poems_filename, form_names, report,
+                                      options.workers, options.delimiter,
+                                      options.dictionary, options.forms,
+                                      options.shared_memory, cache,
+                                      options.estimate, options.overlay,
+                                      options.typos)
+        else:
+            count = check_corpus(poem_filenames, form_names, report,
+                                 options.workers, options.dictionary,
+                                 options.forms, options.shared_memory, cache,
+                                 options.estimate, options.overlay,
+                                 options.typos)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        if cache is not None:
+            cache.close()
+    elapsed = time.perf_counter() - start
+    sys.stderr.write('Checked {} poems in {:.2f} s ({:.1f} poems/sec)\n'.format(
+        count, elapsed, count / elapsed if elapsed > 0 else 0.0))
+    if cache is not None:
+        sys.stderr.write('Cache: {hits} hits ({disk_hits} from disk), '
+                         '{misses} misses\n'.format(**cache.stats()))
+
+
+if __name__ == '__main__':
+    main()
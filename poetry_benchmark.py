@@ -0,0 +1,480 @@
+import concurrent.futures
+import os.path
+import shutil
+import sys
+import tempfile
+import time
+
+import poetry_analysis
+import poetry_batch
+import poetry_functions
+import poetry_lexicon
+import poetry_reader
+import poetry_rhymes
+import poetry_stores
+import poetry_tokenizer
+import poetry_vector
+
+DICTIONARY_FILENAME = 'dictionary.txt'
+SAMPLE_POEMS = ['haiku1.txt', 'haiku2.txt', 'haiku3.txt', 'limerick1.txt',
+                'limerick2.txt', 'limerick3.txt']
+
+
+def best_time(function, repeat):
+    """ (function, int) -> float
+
+    Call function repeat times and return the fastest wall-clock time in
+    seconds.
+    """
+    best = None
+    for i in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def benchmark_dictionary_load(dictionary_filename, repeat=5):
+    """ (str, int) -> dict of {str: float}
+
+    Return the best times for parsing dictionary_filename with
+    read_pronunciation and for loading it from its compiled cache.
+    The cache is built in a temporary directory so that the working copy
+    is left untouched.
+    """
+    temp_dir = tempfile.mkdtemp()
+    try:
+        source = os.path.join(temp_dir, os.path.basename(dictionary_filename))
+        shutil.copy2(dictionary_filename, source)
+
+        def parse():
+            with open(source) as pronunciation_file:
+                poetry_reader.read_pronunciation(pronunciation_file)
+
+        build_time = best_time(
+            lambda: poetry_reader.load_pronunciation(source), 1)
+        results = {
+            'cold_parse': best_time(parse, repeat),
+            'cache_build': build_time,
+            'cached_load': best_time(
+                lambda: poetry_reader.load_pronunciation(source), repeat)}
+    finally:
+        shutil.rmtree(temp_dir)
+    return results
+
+
+def benchmark_one_off_lookups(dictionary_filename, words, repeat=5):
+    """ (str, list of str, int) -> dict of {str: float}
+
+    Return the best times for opening dictionary_filename and looking up
+    every word in words, using a full parse and using a memory-mapped
+    MappedPronunciation.
+    """
+    def parse_and_look_up():
+        with open(dictionary_filename) as pronunciation_file:
+            word_to_phonemes = poetry_reader.read_pronunciation(
+                pronunciation_file)
+        for word in words:
+            word_to_phonemes[word]
+
+    def map_and_look_up():
+        with poetry_stores.MappedPronunciation(dictionary_filename) as store:
+            for word in words:
+                store[word]
+
+    return {'parse_and_look_up': best_time(parse_and_look_up, repeat),
+            'map_and_look_up': best_time(map_and_look_up, repeat)}
+
+
+def benchmark_poem_check(poem_filename, patterns, word_to_phonemes,
+                         repeat=1000):
+    """ (str, list of poetry pattern, pronunciation dictionary, int)
+                                                    -> dict of {str: float}
+
+    Return the mean per-poem latency of checking the poem in poem_filename
+    against every pattern in patterns, the way check_poem used to
+    (count_lines, get_poem_lines, check_syllables and check_rhyme_scheme
+    each tokenizing the poem) and through a single PoemAnalysis.
+    """
+    with open(poem_filename) as poem_file:
+        poem_lines_raw = poem_file.readlines()
+
+    def separate_checks():
+        for i in range(repeat):
+            for pattern in patterns:
+                poetry_functions.count_lines(poem_lines_raw)
+                poem_lines = poetry_functions.get_poem_lines(
+                    ''.join(poem_lines_raw))
+                poetry_functions.check_syllables(poem_lines, pattern, 
+                                                 word_to_phonemes)
+                poetry_functions.check_rhyme_scheme(poem_lines, pattern, 
+                                                    word_to_phonemes)
+
+    def single_analysis():
+        for i in range(repeat):
+            analysis = poetry_analysis.analyze_poem(poem_lines_raw, 
+                                                    word_to_phonemes)
+            for pattern in patterns:
+                analysis.has_line_count(pattern)
+                analysis.check_syllables(pattern)
+                analysis.check_rhyme_scheme(pattern)
+
+    return {'separate_checks': best_time(separate_checks, 3) / repeat,
+            'single_analysis': best_time(single_analysis, 3) / repeat}
+
+
+def legacy_split_on_separators(original, separators):
+    """ (str, str) -> list of str
+
+    The split_on_separators implementation that poetry_tokenizer replaced,
+    kept as the baseline for benchmark_tokenizer.
+    """
+    result = [original]
+    for separator in separators:
+        split_words = []
+        for string in result:
+            for piece in string.split(separator):
+                if piece != '' and piece != ' ':
+                    split_words.append(piece.strip())
+        result = split_words
+    return result
+
+
+def legacy_clean_up(s):
+    """ (str) -> str
+
+    The clean_up implementation that poetry_tokenizer replaced, kept as the
+    baseline for benchmark_tokenizer.
+    """
+    punctuation = """!"'`@$%^&_-+={}|\\/,;:.-?)([]<>*#\n\t\r"""
+    return s.upper().strip(punctuation)
+
+
+def benchmark_tokenizer(poem_filenames, stanzas=2000, repeat=5):
+    """ (list of str, int, int) -> dict of {str: float}
+
+    Return the best times for splitting a long poem, made of stanzas copies
+    of the poems in poem_filenames separated by blank lines, into lines and
+    cleaned-up words with the previous implementation and with
+    poetry_tokenizer.
+    """
+    texts = []
+    for poem_filename in poem_filenames:
+        with open(poem_filename) as poem_file:
+            texts.append(poem_file.read())
+    poem = '\n\n'.join(texts[i % len(texts)] for i in range(stanzas))
+
+    def legacy():
+        for line in legacy_split_on_separators(poem, '\n'):
+            for word in line.split():
+                legacy_clean_up(word)
+
+    def tokenize_lines():
+        for line in poetry_tokenizer.split_lines(poem):
+            poetry_tokenizer.tokenize_line(line)
+
+    return {'legacy': best_time(legacy, repeat),
+            'tokenize_line': best_time(tokenize_lines, repeat)}
+
+
+def benchmark_rhyme_lookups(dictionary_filename, words, repeat=5):
+    """ (str, list of str, int) -> dict of {str: float}
+
+    Return the best times for finding the words that rhyme with each of
+    words by scanning the whole pronunciation dictionary and by querying
+    the rhyme index, and the time to load the index from its cache.
+    """
+    word_to_phonemes = poetry_reader.load_pronunciation(dictionary_filename)
+    poetry_reader.load_rhyme_index(dictionary_filename)
+
+    def scan():
+        for word in words:
+            tail = poetry_lexicon.rhyme_tail(word_to_phonemes[word])
+            [other for other in word_to_phonemes if other != word and
+             poetry_lexicon.rhyme_tail(word_to_phonemes[other]) == tail]
+
+    def load():
+        return poetry_reader.load_rhyme_index(dictionary_filename)
+
+    index = load()
+
+    def query():
+        for word in words:
+            index.rhymes_with(word)
+            index.rhymes_with(word, syllables=1)
+
+    return {'linear_scan': best_time(scan, 1) / len(words),
+            'index_load': best_time(load, repeat),
+            'index_query': best_time(query, repeat) / (2 * len(words))}
+
+
+def benchmark_suggest_fixes(dictionary_filename, poem_filename, pattern,
+                            repeat=1000):
+    """ (str, str, poetry pattern, int) -> dict of {str: float}
+
+    Return the best time per call of suggest_fixes for the poem in
+    poem_filename against pattern, using the cached lexicon and rhyme index.
+    """
+    lexicon = poetry_reader.load_lexicon(dictionary_filename)
+    rhyme_index = poetry_reader.load_rhyme_index(dictionary_filename)
+    with open(poem_filename) as poem_file:
+        poem_lines = poetry_functions.get_poem_lines(poem_file.read())
+
+    def suggest():
+        for i in range(repeat):
+            poetry_rhymes.suggest_fixes(poem_lines, pattern, lexicon, 5,
+                                        rhyme_index)
+
+    return {'suggest_fixes': best_time(suggest, 3) / repeat}
+
+
+def benchmark_vector_check(poem_count, pattern, lexicon,
+                           sample_filenames=SAMPLE_POEMS):
+    """ (int, poetry pattern, poetry_lexicon.Lexicon, list of str)
+                                                    -> dict of {str: float}
+
+    Return the times for checking the syllables and rhymes of poem_count
+    poems, replicated from the poems in sample_filenames that have as many
+    lines as pattern, one poem at a time with check_syllables and
+    check_rhyme_scheme and all at once with poetry_vector.check_batch (with
+    NumPy if it is installed).
+    """
+    samples = []
+    for sample_filename in sample_filenames:
+        with open(sample_filename) as sample_file:
+            poem_lines = poetry_functions.get_poem_lines(sample_file.read())
+        if len(poem_lines) == len(pattern[0]):
+            samples.append(poem_lines)
+    poems = []
+    for i in range(poem_count):
+        poems.append(samples[i % len(samples)])
+
+    def one_at_a_time():
+        for poem_lines in poems:
+            poetry_functions.check_syllables(poem_lines, pattern, lexicon)
+            poetry_functions.check_rhyme_scheme(poem_lines, pattern, lexicon)
+
+    return {'one_at_a_time': best_time(one_at_a_time, 1),
+            'check_batch': best_time(
+                lambda: poetry_vector.check_batch(poems, pattern, lexicon), 1)}
+
+
+def write_corpus(directory, size, sample_filenames=SAMPLE_POEMS):
+    """ (str, int, list of str) -> list of str
+
+    Write size poems to directory by replicating the poems in
+    sample_filenames, and return their filenames.
+    """
+    samples = []
+    for sample_filename in sample_filenames:
+        with open(sample_filename) as sample_file:
+            samples.append(sample_file.read())
+    filenames = []
+    for i in range(size):
+        filename = os.path.join(directory, 'poem{:07d}.txt'.format(i))
+        with open(filename, 'w') as poem_file:
+            poem_file.write(samples[i % len(samples)])
+        filenames.append(filename)
+    return filenames
+
+
+def benchmark_batch(corpus_size, worker_counts, form_names=('Haiku',
+                                                            'Limerick')):
+    """ (int, list of int, tuple of str) -> dict of {str: float}
+
+    Return the throughput, in poems per second, of poetry_batch.check_corpus
+    on a replicated corpus of corpus_size poems for each number of workers
+    in worker_counts.
+    """
+    temp_dir = tempfile.mkdtemp()
+    try:
+        filenames = write_corpus(temp_dir, corpus_size)
+        results = {}
+        for workers in worker_counts:
+            start = time.perf_counter()
+            poetry_batch.check_corpus(filenames, list(form_names),
+                                      lambda result: None, workers)
+            elapsed = time.perf_counter() - start
+            results['{}_workers'.format(workers)] = corpus_size / elapsed
+    finally:
+        shutil.rmtree(temp_dir)
+    return results
+
+
+def private_memory():
+    """ () -> int
+
+    Return the number of bytes of memory private to this process (not
+    shared with any other process), or 0 if the platform doesn't say.
+    """
+    total = 0
+    try:
+        with open('/proc/self/smaps_rollup') as smaps_file:
+            for line in smaps_file:
+                if line.startswith('Private_'):
+                    total += int(line.split()[1]) * 1024
+    except OSError:
+        return 0
+    return total
+
+
+def benchmark_worker_memory(workers, shared):
+    """ (int, bool) -> float
+
+    Start workers batch worker processes, loading the pronunciation
+    dictionary as poetry_batch.check_corpus would (shared or not), and
+    return their mean private memory in bytes.
+    """
+    segment = None
+    shared_handle = None
+    if shared:
+        segment, shared_handle = poetry_reader.load_compact_pronunciation(
+            DICTIONARY_FILENAME).share()
+    try:
+        with concurrent.futures.ProcessPoolExecutor(
+                max_workers=workers, initializer=poetry_batch._init_worker,
+                initargs=(DICTIONARY_FILENAME, 
+                          poetry_batch.POETRY_FORMS_FILENAME, 
+                          shared_handle)) as executor:
+            # Each worker sleeps briefly so that every worker gets a task.
+            sizes = list(executor.map(_sleep_and_measure, [0.2] * workers))
+    finally:
+        if segment is not None:
+            segment.close()
+            segment.unlink()
+    return sum(sizes) / len(sizes)
+
+
+def _sleep_and_measure(seconds):
+    """ (float) -> int
+
+    Sleep for seconds, then return this process's private memory.
+    """
+    time.sleep(seconds)
+    return private_memory()
+
+
+def deep_sizeof(obj, seen=None):
+    """ (object, set of int) -> int
+
+    Return the number of bytes used by obj and every dict, list, tuple, str,
+    bytes or array reachable from it. Objects shared between several
+    containers (such as interned phonemes) are only counted once.
+    """
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        for key in obj:
+            size += deep_sizeof(key, seen) + deep_sizeof(obj[key], seen)
+    elif isinstance(obj, (list, tuple)):
+        for item in obj:
+            size += deep_sizeof(item, seen)
+    elif isinstance(obj, poetry_stores.CompactPronunciation):
+        size += deep_sizeof(vars(obj), seen)
+    return size
+
+
+def memory_report(dictionary_filename):
+    """ (str) -> dict of {str: int}
+
+    Return the memory, in bytes, used by the dict-of-lists pronunciation
+    dictionary for dictionary_filename (as read by read_pronunciation) and
+    by the equivalent CompactPronunciation.
+    """
+    with open(dictionary_filename) as pronunciation_file:
+        word_to_phonemes = poetry_reader.read_pronunciation(pronunciation_file)
+    compact = poetry_stores.CompactPronunciation(word_to_phonemes)
+    return {'dict_of_lists': deep_sizeof(word_to_phonemes),
+            'compact': deep_sizeof(compact),
+            'compact_buffers': compact.nbytes()}
+
+
+def print_results(title, results):
+    """ (str, dict of {str: float}) -> NoneType
+
+    Print the timings in results, in milliseconds, under title.
+    """
+    print('== {} =='.format(title))
+    for name in results:
+        print('{:>24}: {:10.2f} ms'.format(name, results[name] * 1000))
+
+
+def main():
+    results = benchmark_dictionary_load(DICTIONARY_FILENAME)
+    print_results('Pronunciation dictionary load', results)
+    print('{:>24}: {:10.1f}x'.format(
+        'speedup', results['cold_parse'] / results['cached_load']))
+
+    words = 'A CLUMSY YOUNG FELLOW NAMED TIM WAS NEVER INFORMED HOW TO SWIM'
+    results = benchmark_one_off_lookups(DICTIONARY_FILENAME, words.split())
+    print_results('One-off lookups', results)
+
+    results = benchmark_rhyme_lookups(DICTIONARY_FILENAME,
+                                      ['TIM', 'SWIM', 'FELLOW', 'NAMED'])
+    print_results('Rhyme lookups (per word)', results)
+    # The limerick's last line checked against a rhyme it does not have.
+    results = benchmark_suggest_fixes(DICTIONARY_FILENAME, 'limerick1.txt',
+                                      ([8, 8, 5, 5, 8],
+                                       ['A', 'A', 'B', 'B', 'B']))
+    print_results('Line-repair suggestions (per poem)', results)
+
+    results = benchmark_tokenizer(SAMPLE_POEMS)
+    print_results('Tokenizing a {}-stanza poem'.format(2000), results)
+
+    lexicon = poetry_reader.load_lexicon(DICTIONARY_FILENAME)
+    word_to_phonemes = poetry_reader.load_pronunciation(DICTIONARY_FILENAME)
+    limerick = ([8, 8, 5, 5, 8], ['A', 'A', 'B', 'B', 'A'])
+    # The limerick plus two other five-line forms.
+    five_line_forms = [limerick, ([0, 0, 0, 0, 0], ['A', 'B', 'A', 'B', 'B']),
+                       ([5, 7, 5, 7, 7], ['*', '*', '*', '*', '*'])]
+    for name, dictionary in [('dict', word_to_phonemes), 
+                             ('Lexicon', lexicon)]:
+        for patterns in [[limerick], five_line_forms]:
+            results = benchmark_poem_check('limerick1.txt', patterns, 
+                                           dictionary)
+            print('== Per-poem check latency ({}, {} forms) =='.format(
+                name, len(patterns)))
+            for result_name in results:
+                print('{:>24}: {:10.2f} us'.format(
+                    result_name, results[result_name] * 1e6))
+
+    for poem_count in (10000, 1000000):
+        results = benchmark_vector_check(poem_count, limerick, lexicon)
+        engine = 'NumPy'
+        if poetry_vector.numpy is None:
+            engine = 'no NumPy'
+        print_results('Batch syllable and rhyme checks ({} poems, {})'.format(
+            poem_count, engine), results)
+        print('{:>24}: {:10.1f}x'.format(
+            'speedup', results['one_at_a_time'] / results['check_batch']))
+
+    report = memory_report(DICTIONARY_FILENAME)
+    print('== Pronunciation dictionary memory ==')
+    for name in report:
+        print('{:>24}: {:10.2f} MB'.format(name, report[name] / 2 ** 20))
+    print('{:>24}: {:10.1f}x'.format(
+        'reduction', report['dict_of_lists'] / report['compact']))
+
+    worker_counts = [1]
+    while worker_counts[-1] * 2 <= os.cpu_count():
+        worker_counts.append(worker_counts[-1] * 2)
+    print('== Private memory per worker ==')
+    for shared in (False, True):
+        size = benchmark_worker_memory(4, shared)
+        print('{:>24}: {:10.2f} MB'.format(
+            'shared' if shared else 'lexicon', size / 2 ** 20))
+
+    results = benchmark_batch(5000, worker_counts)
+    print('== Batch throughput (5000 poems) ==')
+    for name in results:
+        print('{:>24}: {:10.1f} poems/sec'.format(name, results[name]))
+
+
+if __name__ == '__main__':
+    main()
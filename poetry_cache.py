@@ -0,0 +1,237 @@
+import collections
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+import poetry_reader
+
+"""
+A poetry pattern:  tuple of (list of int, list of str)
+  - first item is a list of the number of syllables required in each line
+  - second item is a list describing the rhyme scheme rule for each line
+"""
+
+"""
+A poem result: dict of {str: object}, as described in poetry_batch
+"""
+
+DEFAULT_MAX_SIZE = 4096
+DEFAULT_MAX_ROWS = 100000
+
+
+def stat_key(filename):
+    """ (str) -> tuple of (int, int) or NoneType
+
+    Return the size and modification time (in nanoseconds) of filename, or
+    None if it doesn't exist.
+    """
+    try:
+        stat = os.stat(filename)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+class ResultCache:
+    """ A cache of poem results, keyed by a hash of the poem's lines, the
+    poetry pattern and the versions of the pronunciation dictionary, poetry
+    forms and any pronunciation overlay files.
+
+    Results are kept in an in-memory LRU tier of at most max_size entries
+    and, if path is given, in an SQLite database at path that outlives the
+    process. Whenever any source file changes, the in-memory tier is
+    cleared. The database may be shared by runs with other source files,
+    so its rows of other versions are kept (the version is part of every
+    key); instead, only the max_rows most recently stored rows are kept
+    each time the database is opened or closed.
+
+    hits: the number of lookups answered from either tier (an int)
+    disk_hits: the number of those answered from the on-disk tier (an int)
+    misses: the number of lookups that found nothing (an int)
+    """
+
+    def __init__(self, dictionary_filename, poetry_forms_filename,
+                 max_size=DEFAULT_MAX_SIZE, path=None, overlay_filenames=(),
+                 max_rows=DEFAULT_MAX_ROWS):
+        """ (ResultCache, str, str, int, str, list of str, int) -> NoneType
+        """
+        self._filenames = ((dictionary_filename, poetry_forms_filename) +
+                           tuple(overlay_filenames))
+        self._max_size = max_size
+        self._max_rows = max_rows
+        self._entries = collections.OrderedDict()
+        self._stats = None
+        self._version = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._db = None
+        if path is not None:
+            self._db = sqlite3.connect(path, timeout=30)
+            self._db.execute('CREATE TABLE IF NOT EXISTS results ('
+                             'key TEXT PRIMARY KEY, version TEXT, '
+                             'result TEXT, stored REAL DEFAULT 0)')
+            columns = [row[1] for row in
+                       self._db.execute('PRAGMA table_info(results)')]
+            if 'stored' not in columns:
+                # A database written before rows were expired by age.
+                self._db.execute('ALTER TABLE results '
+                                 'ADD COLUMN stored REAL DEFAULT 0')
+            self._db.execute('CREATE INDEX IF NOT EXISTS results_stored '
+                             'ON results (stored)')
+            self._expire()
+        self._check_version()
+
+    def _expire(self):
+        """ (ResultCache) -> NoneType
+
+        Delete all but the max_rows most recently stored rows of the
+        on-disk tier, and commit.
+        """
+        # A replaced row gets a new rowid, so rowid breaks ties in order
+        # of storing.
+        self._db.execute('DELETE FROM results WHERE key IN ('
+                         'SELECT key FROM results '
+                         'ORDER BY stored DESC, rowid DESC '
+                         'LIMIT -1 OFFSET ?)', (self._max_rows,))
+        self._db.commit()
+
+    def _check_version(self):
+        """ (ResultCache) -> NoneType
+
+        Recompute the version of the source files if any has been modified
+        since it was last computed, and clear the in-memory tier if it
+        changed. A missing overlay file is a version of its own.
+        """
+        stats = tuple(map(stat_key, self._filenames))
+        if stats == self._stats:
+            return
+        digest = hashlib.sha1()
+        for i in range(len(self._filenames)):
+            if stats[i] is None:
+                digest.update(b'missing')
+            else:
+                digest.update(
+                    poetry_reader.file_fingerprint(self._filenames[i])[2])
+        version = digest.hexdigest()
+        self._stats = stats
+        if version == self._version:
+            return
+        self._version = version
+        self._entries.clear()
+
+    def poem_key(self, poem_lines_raw, options=''):
+        """ (ResultCache, list of str, str) -> str
+
+        Return the key for the poem in poem_lines_raw (as read with
+        readlines) under the current versions of the source files and the
+        checking options named by options. Lines are compared without their
+        line terminators; nothing else is normalized, since the checks treat
+        whitespace-only lines differently depending on their exact contents.
+        """
+        self._check_version()
+        digest = hashlib.sha1((self._version + options + '\n').encode())
+        for line in poem_lines_raw:
+            if line.endswith('\n'):
+                line = line[:-1]
+            digest.update(line.encode('utf-8', 'surrogatepass'))
+            digest.update(b'\n')
+        return digest.hexdigest()
+
+    def _key(self, poem_key, pattern):
+        """ (ResultCache, str, poetry pattern) -> str
+
+        Return the key of the result of checking the poem with poem_key
+        against pattern.
+        """
+        return hashlib.sha1(
+            '{}{!r}'.format(poem_key, pattern).encode()).hexdigest()
+
+    def get(self, poem_key, pattern):
+        """ (ResultCache, str, poetry pattern) -> poem result or NoneType
+
+        Return a copy of the cached result of checking the poem with
+        poem_key (from poem_key) against pattern, without its 'poem' and
+        'form', or None if it is not cached.
+        """
+        key = self._key(poem_key, pattern)
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(self._entries[key])
+        if self._db is not None:
+            row = self._db.execute('SELECT result FROM results WHERE key = ?',
+                                   (key,)).fetchone()
+            if row is not None:
+                result = json.loads(row[0])
+                self._remember(key, result)
+                self.hits += 1
+                self.disk_hits += 1
+                return dict(result)
+        self.misses += 1
+        return None
+
+    def put(self, poem_key, pattern, result):
+        """ (ResultCache, str, poetry pattern, poem result) -> NoneType
+
+        Cache result, the result of checking the poem with poem_key against
+        pattern. Its 'poem' and 'form' are not stored.
+        """
+        key = self._key(poem_key, pattern)
+        result = dict(result)
+        result.pop('poem', None)
+        result.pop('form', None)
+        self._remember(key, result)
+        if self._db is not None:
+            self._db.execute(
+                'INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)',
+                (key, self._version, json.dumps(result), time.time()))
+
+    def _remember(self, key, result):
+        """ (ResultCache, str, poem result) -> NoneType
+
+        Store result in the in-memory tier, evicting the least recently used
+        entry if the tier is full.
+        """
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+        if len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """ (ResultCache) -> dict of {str: int}
+
+        Return the hit and miss counters and the in-memory tier's size.
+        """
+        return {'hits': self.hits, 'disk_hits': self.disk_hits,
+                'misses': self.misses, 'size': len(self._entries)}
+
+    def flush(self):
+        """ (ResultCache) -> NoneType
+
+        Write the results put since the last flush to the on-disk tier.
+        """
+        if self._db is not None:
+            self._db.commit()
+
+    def close(self):
+        """ (ResultCache) -> NoneType
+
+        Flush the on-disk tier, expire its oldest rows and close it.
+        """
+        if self._db is not None:
+            self._expire()
+            self._db.close()
+            self._db = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,99 @@
+import poetry_analysis
+import poetry_functions
+
+"""
+A poetry pattern:  tuple of (list of int, list of str)
+  - first item is a list of the number of syllables required in each line
+  - second item is a list describing the rhyme scheme rule for each line
+"""
+
+"""
+A form index: dict of {int: list of str}
+  - each key is a number of lines
+  - each value is the sorted list of names of the poetry forms with that
+    many lines
+"""
+
+"""
+Form failures: tuple of (list of str, list of list of str, list of str)
+  - first item is what check_syllables reports for the form
+  - second item is what check_rhyme_scheme reports for the form
+  - third item is what check_meter reports for the form (empty if it
+    doesn't declare a meter)
+"""
+
+
+def index_forms(forms):
+    """ (dict of {str: poetry pattern}) -> form index
+
+    Return the form index for forms.
+
+    >>> form_index = index_forms({'Haiku': ([5, 7, 5], ['*', '*', '*']),
+    ...                           'Tercet': ([8, 8, 8], ['A', 'A', 'A']),
+    ...                           'Couplet': ([8, 8], ['A', 'A'])})
+    >>> form_index == {3: ['Haiku', 'Tercet'], 2: ['Couplet']}
+    True
+    """
+    form_index = {}
+    for form_name in sorted(forms):
+        line_count = len(forms[form_name][0])
+        if line_count not in form_index:
+            form_index[line_count] = [form_name]
+        else:
+            form_index[line_count].append(form_name)
+    return form_index
+
+
+def detect_forms(poem_lines, forms, lexicon, form_index=None):
+    """ (list of str, dict of {str: poetry pattern}, pronunciation dictionary,
+         form index) -> tuple of (list of str, dict of {str: form failures})
+
+    Return the sorted names of the forms in forms that the poem in
+    poem_lines (as returned by get_poem_lines) satisfies, in syllables,
+    rhymes and the meter if the form declares one, and the failures
+    of every other form with the right number of lines. Only forms with the
+    poem's number of lines are checked; pass form_index (from index_forms)
+    to avoid rebuilding it on every call, unless forms is a
+    poetry_patterns.FormRegistry, which has its own.
+
+    The poem is analyzed once (see poetry_analysis.analyze_poem) and the
+    analysis is shared by all candidate forms. Raise KeyError if a word of
+    the poem is not in lexicon.
+
+    >>> forms = {'Couplet': ([1, 1], ['A', 'A']),
+    ...          'Pair': ([1, 2], ['*', '*']),
+    ...          'Single': ([1], ['*'])}
+    >>> lexicon = {'GAP': ['G', 'AE1', 'P'], 'CAP': ['K', 'AE1', 'P']}
+    >>> detect_forms(['Gap', 'cap!'], forms, lexicon)
+    (['Couplet'], {'Pair': (['cap!'], [], [])})
+    """
+    if form_index is None and hasattr(forms, 'form_index'):
+        form_index = forms.form_index()
+    elif form_index is None:
+        form_index = index_forms(forms)
+    line_count = poetry_functions.count_lines(poem_lines)
+    candidates = form_index.get(line_count, [])
+
+    matches = []
+    failures = {}
+    if len(candidates) == 0:
+        return matches, failures
+
+    analysis = poetry_analysis.analyze_poem(poem_lines, lexicon)
+    if len(analysis.unknown_words) > 0:
+        raise KeyError(analysis.unknown_words[0])
+    for form_name in candidates:
+        problem_lines = analysis.check_syllables(forms[form_name])
+        problem_rhymes = analysis.check_rhyme_scheme(forms[form_name])
+        off_meter = analysis.check_meter(forms[form_name])
+        if (len(problem_lines) == 0 and len(problem_rhymes) == 0 and
+                len(off_meter) == 0):
+            matches.append(form_name)
+        else:
+            failures[form_name] = (problem_lines, problem_rhymes, off_meter)
+    return matches, failures
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,107 @@
+"""
+Rule-based estimates of the syllables and rhyme of words that are not in the
+pronunciation dictionary, so that one typo or new word doesn't stop a check.
+
+An estimated rhyme key is a str: the word's spelling from its last sounded
+vowel group onward. It never equals the rhyme key of a dictionary word, so
+an estimated word rhymes only with words estimated to end the same way.
+"""
+
+import functools
+import re
+
+# The most distinct words whose estimates are remembered.
+ESTIMATE_CACHE_SIZE = 65536
+
+_VOWEL_GROUP = re.compile('[AEIOUY]+')
+# Vowel pairs usually sounded as two syllables (as in LION and NEON),
+# unless they follow a letter that turns them into a single "sh" syllable
+# (as in NATION and SPECIAL).
+_TWO_SYLLABLE_PAIR = re.compile('(?<![TSCGX])(?:IA|IO|EO|UA|IU)')
+
+
+def _letters(word):
+    """ (str) -> str
+
+    Return the letters of word in uppercase, without anything else.
+
+    >>> _letters("Don't")
+    'DONT'
+    """
+    return ''.join([letter for letter in word.upper() if 'A' <= letter <= 'Z'])
+
+
+def _silent_ending(letters):
+    """ (str) -> bool
+
+    Return True iff letters end in a vowel group that is usually silent: a
+    final E, or ED or ES that doesn't add a syllable, after a consonant.
+
+    >>> _silent_ending('GRAPE'), _silent_ending('JUMPED')
+    (True, True)
+    >>> _silent_ending('TABLE'), _silent_ending('WANTED')
+    (False, False)
+    """
+    if len(letters) > 2 and letters.endswith('E'):
+        return (letters[-2] not in 'AEIOUYL' or
+                letters[-3] in 'AEIOUY')
+    if len(letters) > 3 and letters.endswith('ED'):
+        return letters[-3] not in 'AEIOUYTD'
+    if len(letters) > 3 and letters.endswith('ES'):
+        return letters[-3] not in 'AEIOUYSXZCGH'
+    return False
+
+
+@functools.lru_cache(maxsize=ESTIMATE_CACHE_SIZE)
+def estimate_syllables(word):
+    """ (str) -> int
+
+    Return an estimate of the number of syllables in word: its number of
+    vowel groups, less a silent ending, plus vowel pairs that are usually
+    sounded separately. A word with no letters has no syllables; any other
+    word has at least one.
+
+    >>> estimate_syllables('BLOGGER'), estimate_syllables('GRAPE')
+    (2, 1)
+    >>> estimate_syllables('LION'), estimate_syllables('NATION')
+    (2, 2)
+    >>> estimate_syllables('1999')
+    0
+    """
+    letters = _letters(word)
+    if letters == '':
+        return 0
+    syllables = len(_VOWEL_GROUP.findall(letters))
+    syllables += len(_TWO_SYLLABLE_PAIR.findall(letters))
+    if syllables > 1 and _silent_ending(letters):
+        syllables -= 1
+    return max(syllables, 1)
+
+
+@functools.lru_cache(maxsize=ESTIMATE_CACHE_SIZE)
+def estimate_rhyme_key(word):
+    """ (str) -> str or NoneType
+
+    Return an estimated rhyme key for word: its letters from the start of
+    its last sounded vowel group to the end. Return None if word has no
+    vowels.
+
+    >>> estimate_rhyme_key('BLOG'), estimate_rhyme_key('FROG')
+    ('OG', 'OG')
+    >>> estimate_rhyme_key('GRAPE')
+    'APE'
+    >>> estimate_rhyme_key('HMM') is None
+    True
+    """
+    letters = _letters(word)
+    groups = list(_VOWEL_GROUP.finditer(letters))
+    if len(groups) == 0:
+        return None
+    if len(groups) > 1 and _silent_ending(letters):
+        return letters[groups[-2].start():]
+    return letters[groups[-1].start():]
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
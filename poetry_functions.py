@@ -8,8 +8,13 @@ A poetry pattern:  tuple of (list of int, list of str)
 A pronunciation dictionary: dict of {str: list of str}
   - each key is a word (a str)
   - each value is a list of phonemes for that word (a list of str)
+  - a poetry_lexicon.Lexicon may be used wherever one is expected
 """
 
+import poetry_lexicon
+import poetry_patterns
+import poetry_tokenizer
+
 # ===================== Helper Functions =====================
 
 def clean_up(s):
@@ -25,8 +30,7 @@ def clean_up(s):
     'QUOTED'
     """
 
-    punctuation = """!"'`@$%^&_-+={}|\\/,;:.-?)([]<>*#\n\t\r"""
-    result = s.upper().strip(punctuation)
+    result = poetry_tokenizer.clean_word(s)
     return result
 
 def split_on_separators(original, separators):
@@ -43,25 +47,7 @@ def split_on_separators(original, separators):
     ['Row', 'Row', 'Row your boat']
     """
     
-    result = [original]
-    
-    # Cycles through the set of separators individually    
-    for separator in separators:
-        split_words = []
-        
-    # #########################################################################
-    # Cycle through the strings in the list of strings from result. Extends the 
-    # list split_words with the strings split at separator. result is now 
-    # the list of strings split with separator.
-    # #########################################################################    
-        
-        for string in result:
-            words = string.split(separator)
-            for strings in words:
-                if strings != '' and strings != ' ':
-                    split_words.append(strings.strip())    
-        result = split_words
-    return result
+    return poetry_tokenizer.split_on_separators(original, separators)
 
 def pattern_dict(pattern):
     ''' (list of int, list of str) -> dict
@@ -136,12 +122,11 @@ def count_lines(lst):
     ... 'Fifth line,\n', 'Ending line.\n']) 
     6
     """
-    # For each string in list, performs clean_up and if line is not empty string
-    # will add 1 to num_lines.
+    # For each string in list, if nothing is left after clean_up and
+    # stripping whitespace, the line is blank; otherwise add 1 to num_lines.
     num_lines = 0
     for lines in lst:
-        clean_lines = clean_up(lines)
-        if clean_lines.strip() != '':            
+        if not poetry_tokenizer.is_blank(lines):
             num_lines += 1
     return num_lines
     
@@ -160,7 +145,7 @@ def get_poem_lines(poem):
     ... + 'Second line.\nThird line.\n') 
     ['First line,', 'Poems are fun!', 'Second line.', 'Third line.']
     """
-    result = split_on_separators(poem, '\n')
+    result = poetry_tokenizer.split_lines(poem)
 
     return result
 
@@ -204,21 +189,15 @@ def check_syllables(poem_lines, pattern, word_to_phonemes):
     # If the poem is only one line and the syllable pattern is 0, return empty list.
     if len(pattern[0]) == 1 and pattern[0][0] == 0:
         return poem
+    syllables_of = poetry_lexicon.syllable_lookup(word_to_phonemes)
     # #########################################################################
-    # For each strings in the poem, split the string into list of strings 
-    # (splitting). For each word in splitting, perform clean_up and obtain
-    # phonemes. For each phonemes, if the last character is digit, syllable
-    # counter will plus one.
+    # For each strings in the poem, tokenize the string into cleaned-up words
+    # and add each word's syllable count to the syllable counter.
     # #########################################################################
     for strings in poem_lines:
         syllables = 0
-        splitting = strings.split()
-        for i in range(len(splitting)): 
-            word = clean_up(splitting[i])
-            phonemes = word_to_phonemes[word]
-            for segments in phonemes:
-                if segments[-1].isdigit() == True: 
-                    syllables += 1
+        for word in poetry_tokenizer.tokenize_line(strings):
+            syllables += syllables_of(word)
             
     # If the syllable pattern at position rhy_position is 0, rhy_pattern counter
     # will add one.
@@ -267,66 +246,72 @@ def check_rhyme_scheme(poem_lines, pattern, word_to_phonemes):
     >>> check_rhyme_scheme(poem_lines, pattern, word_to_phonemes)
     []
     """
-    final_result = []
-    
-    # Create dictionary for poetry pattern
-    rhyme_pattern = pattern_dict(pattern)
-    
-    # Cycle though each key in dictionary and create empty list for each key
-    for keys in rhyme_pattern:
-        rhyme = []
-        list_of_strings = []
-    # Cycle through each value in keys
-        for position in rhyme_pattern[keys]:
-    # #########################################################################
-    # Split string and get last word from string and perform clean_up to 
-    # reference the key in word_to_phonemes dictionary. Create variables to 
-    # stop for loop.
-    # #########################################################################
-            string = poem_lines[position]
-            stopper = 0
-            rhyme_counter = 0
-            splitting = string.split()               
-            last_word = splitting[-1]
-            word = clean_up(last_word)
-            pronunciation = word_to_phonemes[word]
+    form = poetry_patterns.compile_form(pattern)
+    rhyme_of = poetry_lexicon.rhyme_lookup(word_to_phonemes)
+
     # #########################################################################
-    # Find the syllable in the list of pronunciation starting from the back. 
-    # Append the syllable to the end of the list to a new list, rhyme.
+    # In one pass over the lines, split each string, get the last word from
+    # it and perform clean_up to look up the word's rhyme key. Words without
+    # a stressed vowel have no rhyme key (None).
     # #########################################################################
-            for i in range(len(pronunciation)-1, -1, -1):
-                if stopper < 1:
-                    if pronunciation[i][-1].isdigit() == True:
-                        rhyme.append(pronunciation[i:])
-                        stopper += 1
+    rhyme_keys = []
+    for position in range(len(form.rhymes)):
+        last_word = poem_lines[position].split()[-1]
+        rhyme_keys.append(rhyme_of(clean_up(last_word)))
+
     # #########################################################################
-    # If rhyme only contains one list, will not compare phonemes. For rhymes 
-    # more than one list, will compare the phonemes and count if the list 
-    # are the same. If the rhymes are not the same, list_of_strings will
-    # append the lines of the poem that don't rhyme and assign to rhyme_pattern
-    # dictionary. If the rhymes are the same, then blank list will be assigned
-    # to rhyme_pattern dictionary.
+    # The form's rhyme groups are already in order of label and leave out
+    # the '*' lines and the groups of a single line. A group's lines don't
+    # rhyme if they have more than one rhyme key, not counting None.
     # #########################################################################
-        if len(rhyme) == 1 or keys == '*':
-            list_of_strings = []
-            rhyme_pattern[keys] = list_of_strings
-        else:
-            for i in range(len(rhyme)-1): 
-                if not rhyme[i] == rhyme[i+1]:                    
-                    rhyme_counter +=1
-            if rhyme_counter > 0:
-                for position in rhyme_pattern[keys]:
-                    list_of_strings.append(poem_lines[position])
-                rhyme_pattern[keys] = list_of_strings
-            else:
-                list_of_strings = []
-                rhyme_pattern[keys] = list_of_strings 
+    final_result = []
+    for label, positions in form.groups:
+        group_keys = set()
+        for position in positions:
+            if rhyme_keys[position] is not None:
+                group_keys.add(rhyme_keys[position])
+        if len(group_keys) > 1:
+            final_result.append([poem_lines[position]
+                                 for position in positions])
+    return final_result
+
+def check_meter(poem_lines, pattern, word_to_phonemes):
+    r""" (list of str, poetry pattern, pronunciation dictionary) -> list of str
+
+    Precondition: len(poem_lines) == len(pattern[0])
+
+    Return a list of lines from poem_lines that are not in the meter of the
+    pattern (see poetry_meter), according to the stresses in the
+    pronunciation dictionary. If the pattern has no meter, or all lines
+    scan, return the empty list.
+
+    >>> word_to_phonemes = {'THE': ['DH', 'AH0'],
+    ...                     'POEM': ['P', 'OW1', 'AH0', 'M'],
+    ...                     'BEFORE': ['B', 'IH0', 'F', 'AO1', 'R'],
+    ...                     'ENDS': ['EH1', 'N', 'D', 'Z']}
+    >>> pattern = poetry_patterns.compile_form(([4, 4], ['*', '*']),
+    ...                                        'iambic')
+    >>> check_meter(['The poem ends.', 'Poem poem.'], pattern,
+    ...             word_to_phonemes)
+    ['Poem poem.']
+    """
+    form = poetry_patterns.compile_form(pattern)
+    if form.meter_pattern is None:
+        return []
+    stresses_of = poetry_lexicon.stress_lookup(word_to_phonemes)
+    fullmatch = form.meter_pattern.fullmatch
+
     # #########################################################################
-    # Sorts the rhyme_pattern dictionary bye key and appends the new values
-    # to a new list. Creates list of list of strings.
+    # A line's stress string is its words' precomputed stress strings put
+    # together, so scanning it is a single match against the meter.
     # #########################################################################
-    final_result = lst_of_lst_of_strings(rhyme_pattern)
-    return final_result
+    problem_lines = []
+    for line in poem_lines:
+        stresses = ''.join(map(stresses_of,
+                               poetry_tokenizer.tokenize_line(line)))
+        if fullmatch(stresses) is None:
+            problem_lines.append(line)
+    return problem_lines
 
 if __name__ == '__main__':
     import doctest
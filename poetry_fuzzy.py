@@ -0,0 +1,369 @@
+"""
+Fuzzy lookup of misspelled words in a pronunciation dictionary.
+
+A FuzzyIndex finds the dictionary words within a small edit distance of a
+word the way SymSpell does: every string that a few deletes make of each
+word's prefix is indexed, and a query only compares the word with the
+dictionary words that share one of those strings with it. The index keeps
+a CRC-32 of each string rather than the string, packed with the word's id
+into one 64-bit int of a sorted array, so that it is small enough to build
+once and load from the dictionary's cache.
+"""
+
+import array
+import bisect
+import functools
+import zlib
+from collections.abc import Mapping
+
+import poetry_lexicon
+
+"""
+A pronunciation dictionary: dict of {str: list of str}
+  - each key is a word (a str)
+  - each value is a list of phonemes for that word (a list of str)
+"""
+
+# The largest edit distance an index answers queries for.
+MAX_DISTANCE = 2
+
+# The number of letters at the start of each word that are indexed.
+PREFIX_LENGTH = 7
+
+# The most distinct misspelled words whose resolutions are remembered.
+RESOLUTION_CACHE_SIZE = 65536
+
+_ID_BITS = 32
+_ID_MASK = (1 << _ID_BITS) - 1
+
+
+def edit_distance(word1, word2, max_distance=MAX_DISTANCE):
+    """ (str, str, int) -> int
+
+    Return the number of inserts, deletes, substitutions and swaps of two
+    adjacent letters that turn word1 into word2 (with no letter edited
+    twice), or max_distance + 1 if it is more than max_distance.
+
+    >>> edit_distance('POEM', 'POME'), edit_distance('POEM', 'POET')
+    (1, 1)
+    >>> edit_distance('RHYME', 'RIME'), edit_distance('RHYME', 'TIME', 1)
+    (2, 2)
+    """
+    too_far = max_distance + 1
+    if abs(len(word1) - len(word2)) > max_distance:
+        return too_far
+    # Letters the words start or end with in common are never edited.
+    start = 0
+    while (start < len(word1) and start < len(word2) and
+           word1[start] == word2[start]):
+        start += 1
+    end1 = len(word1)
+    end2 = len(word2)
+    while (end1 > start and end2 > start and
+           word1[end1 - 1] == word2[end2 - 1]):
+        end1 -= 1
+        end2 -= 1
+    word1 = word1[start:end1]
+    word2 = word2[start:end2]
+    if len(word1) == 0 or len(word2) == 0:
+        return min(len(word1) + len(word2), too_far)
+
+    # Only the cells within max_distance of the diagonal can be within
+    # max_distance; the others stay too_far.
+    length2 = len(word2)
+    before_previous_row = None
+    previous_row = None
+    row = list(range(length2 + 1))
+    for j in range(max_distance + 1, length2 + 1):
+        row[j] = too_far
+    for i in range(1, len(word1) + 1):
+        before_previous_row, previous_row = previous_row, row
+        row = [too_far] * (length2 + 1)
+        if i <= max_distance:
+            row[0] = i
+        letter = word1[i - 1]
+        smallest = row[0]
+        for j in range(max(1, i - max_distance),
+                       min(length2, i + max_distance) + 1):
+            distance = previous_row[j - 1]
+            if letter != word2[j - 1]:
+                distance += 1
+            if previous_row[j] + 1 < distance:
+                distance = previous_row[j] + 1
+            if row[j - 1] + 1 < distance:
+                distance = row[j - 1] + 1
+            if (i > 1 and j > 1 and letter == word2[j - 2] and
+                    word1[i - 2] == word2[j - 1] and
+                    before_previous_row[j - 2] + 1 < distance):
+                distance = before_previous_row[j - 2] + 1
+            row[j] = distance
+            if distance < smallest:
+                smallest = distance
+        if smallest > max_distance:
+            return too_far
+    return min(row[length2], too_far)
+
+
+def _deletes(word, max_distance):
+    """ (str, int) -> set of str
+
+    Return word and every string made from it by deleting up to
+    max_distance of its letters.
+
+    >>> sorted(_deletes('ODE', 1))
+    ['DE', 'OD', 'ODE', 'OE']
+    """
+    deletes = {word}
+    edges = [word]
+    for distance in range(max_distance):
+        next_edges = []
+        for string in edges:
+            for i in range(len(string)):
+                deleted = string[:i] + string[i + 1:]
+                if deleted not in deletes:
+                    deletes.add(deleted)
+                    next_edges.append(deleted)
+        edges = next_edges
+    return deletes
+
+
+def _hash(string):
+    """ (str) -> int
+
+    Return the 32-bit hash of string that the index keeps.
+    """
+    return zlib.crc32(string.encode('utf-8', 'surrogatepass'))
+
+
+class FuzzyIndex:
+    """ An index of words that finds the words within an edit distance
+    (see edit_distance) of any word.
+
+    >>> index = FuzzyIndex(['POEM', 'POET', 'RHYME', 'TIME'])
+    >>> index.lookup('POEMS')
+    [(1, 'POEM'), (2, 'POET')]
+    >>> index.closest('RHYMEE'), index.closest('ZZZZZZ')
+    (['RHYME'], [])
+    """
+
+    # Bumped whenever the pickled arrays change (see poetry_reader).
+    LAYOUT_VERSION = 1
+
+    def __init__(self, words, max_distance=MAX_DISTANCE,
+                 prefix_length=PREFIX_LENGTH):
+        """ (FuzzyIndex, iterable of str, int, int) -> NoneType
+
+        Index words for queries of up to max_distance edits, looking only
+        at their first prefix_length letters.
+        """
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self._words = sorted(words)
+        # Each entry is the hash of a delete of a word's prefix, above the
+        # word's id. Sorted, the entries of each hash are next to each
+        # other.
+        entries = []
+        for word_id in range(len(self._words)):
+            prefix = self._words[word_id][:prefix_length]
+            for delete in _deletes(prefix, max_distance):
+                entries.append(_hash(delete) << _ID_BITS | word_id)
+        entries.sort()
+        self._entries = array.array('Q', entries)
+
+    def __len__(self):
+        return len(self._words)
+
+    def _candidates(self, word, max_distance):
+        """ (FuzzyIndex, str, int) -> set of int
+
+        Return the ids of the words whose prefix shares a delete with the
+        prefix of word: every word within max_distance of word, and others.
+        """
+        entries = self._entries
+        candidates = set()
+        for delete in _deletes(word[:self.prefix_length], max_distance):
+            low = _hash(delete) << _ID_BITS
+            start = bisect.bisect_left(entries, low)
+            end = bisect.bisect_left(entries, low + (1 << _ID_BITS), start)
+            for i in range(start, end):
+                candidates.add(entries[i] & _ID_MASK)
+        return candidates
+
+    def lookup(self, word, max_distance=None):
+        """ (FuzzyIndex, str, int) -> list of tuple of (int, str)
+
+        Return (distance, indexed word) for every indexed word within
+        max_distance (the index's max_distance by default) of word, in
+        order of distance and then of word. Raise ValueError if
+        max_distance is more than the index's.
+        """
+        if max_distance is None:
+            max_distance = self.max_distance
+        elif max_distance > self.max_distance:
+            raise ValueError('the index only finds words within {} '
+                             'edits'.format(self.max_distance))
+        matches = []
+        for word_id in self._candidates(word, max_distance):
+            candidate = self._words[word_id]
+            distance = edit_distance(word, candidate, max_distance)
+            if distance <= max_distance:
+                matches.append((distance, candidate))
+        matches.sort()
+        return matches
+
+    def closest(self, word, max_distance=None):
+        """ (FuzzyIndex, str, int) -> list of str
+
+        Return the sorted indexed words closest to word, within
+        max_distance as for lookup.
+        """
+        matches = self.lookup(word, max_distance)
+        return [candidate for distance, candidate in matches
+                if distance == matches[0][0]]
+
+
+class ResolvingPronunciation(Mapping):
+    """ A read-only view of a pronunciation dictionary in which a word the
+    dictionary doesn't have stands for the closest word in fuzzy_index, if
+    there is exactly one. The view has the syllables, rhyme_key and
+    stresses methods of a Lexicon.
+
+    resolved: {typo: word} for each word that has been resolved since the
+              last call of new_poem, in order of first lookup
+              (dict of {str: str})
+
+    >>> word_to_phonemes = {'POEM': ['P', 'OW1', 'AH0', 'M'],
+    ...                     'POET': ['P', 'OW1', 'AH0', 'T']}
+    >>> view = ResolvingPronunciation(word_to_phonemes,
+    ...                               FuzzyIndex(word_to_phonemes))
+    >>> view.syllables('POEMM'), 'POE' in view, view.resolved
+    (2, False, {'POEMM': 'POEM'})
+    """
+
+    def __init__(self, word_to_phonemes, fuzzy_index):
+        """ (ResolvingPronunciation, pronunciation dictionary, FuzzyIndex)
+                                                                -> NoneType
+        """
+        self._word_to_phonemes = word_to_phonemes
+        self._fuzzy_index = fuzzy_index
+        self._syllables_of = poetry_lexicon.syllable_lookup(word_to_phonemes)
+        self._rhyme_of = poetry_lexicon.rhyme_lookup(word_to_phonemes)
+        self._stresses_of = poetry_lexicon.stress_lookup(word_to_phonemes)
+        self._entry_of = poetry_lexicon.entry_lookup(word_to_phonemes)
+        # The resolution (or None) of each word not in the dictionary, for
+        # the RESOLUTION_CACHE_SIZE most recently looked up.
+        self._resolution_of = functools.lru_cache(
+            maxsize=RESOLUTION_CACHE_SIZE)(self._find_resolution)
+        self.resolved = {}
+
+    def _find_resolution(self, word):
+        """ (ResolvingPronunciation, str) -> str or NoneType
+
+        Return the single closest word to word in the fuzzy index, or None
+        if there isn't exactly one.
+        """
+        closest = self._fuzzy_index.closest(word)
+        if len(closest) == 1:
+            return closest[0]
+        return None
+
+    def new_poem(self):
+        """ (ResolvingPronunciation) -> NoneType
+
+        Forget the words resolved so far, so that resolved lists only those
+        of the next poem. The resolutions themselves stay cached.
+        """
+        self.resolved = {}
+
+    def resolve(self, word):
+        """ (ResolvingPronunciation, str) -> str or NoneType
+
+        Return the dictionary word that word stands for, or None if there
+        isn't exactly one closest word.
+        """
+        if word in self._word_to_phonemes:
+            return word
+        resolution = self._resolution_of(word)
+        if resolution is not None:
+            self.resolved[word] = resolution
+        return resolution
+
+    def _resolve_or_raise(self, word):
+        """ (ResolvingPronunciation, str) -> str
+
+        Return resolve(word), raising KeyError if it is None.
+        """
+        resolution = self.resolve(word)
+        if resolution is None:
+            raise KeyError(word)
+        return resolution
+
+    def corrections(self, words):
+        """ (ResolvingPronunciation, iterable of str) -> dict of {str: str}
+
+        Return {typo: word} for each of words that resolves to another word.
+        """
+        corrections = {}
+        for word in words:
+            resolution = self.resolve(word)
+            if resolution is not None and resolution != word:
+                corrections[word] = resolution
+        return corrections
+
+    def __getitem__(self, word):
+        return self._word_to_phonemes[self._resolve_or_raise(word)]
+
+    def __contains__(self, word):
+        return self.resolve(word) is not None
+
+    def __iter__(self):
+        return iter(self._word_to_phonemes)
+
+    def __len__(self):
+        return len(self._word_to_phonemes)
+
+    def syllables(self, word):
+        """ (ResolvingPronunciation, str) -> int
+
+        Return the number of syllables in word.
+        """
+        try:
+            return self._syllables_of(word)
+        except KeyError:
+            return self._syllables_of(self._resolve_or_raise(word))
+
+    def rhyme_key(self, word):
+        """ (ResolvingPronunciation, str) -> object
+
+        Return the rhyme key of word.
+        """
+        try:
+            return self._rhyme_of(word)
+        except KeyError:
+            return self._rhyme_of(self._resolve_or_raise(word))
+
+    def stresses(self, word):
+        """ (ResolvingPronunciation, str) -> str
+
+        Return the stress string of word.
+        """
+        try:
+            return self._stresses_of(word)
+        except KeyError:
+            return self._stresses_of(self._resolve_or_raise(word))
+
+    def entry(self, word):
+        """ (ResolvingPronunciation, str) -> tuple of (int, object, str)
+
+        Return the number of syllables, the rhyme key and the stress string
+        of word, resolving it at most once.
+        """
+        try:
+            return self._entry_of(word)
+        except KeyError:
+            return self._entry_of(self._resolve_or_raise(word))
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
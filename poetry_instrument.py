@@ -0,0 +1,341 @@
+"""
+Opt-in instrumentation of the poetry checker's hot paths. While it is
+enabled, the loading, tokenizing, syllable and rhyme functions of
+poetry_reader, poetry_functions, poetry_tokenizer, poetry_analysis and
+poetry_program are replaced by wrappers that time and count their calls,
+and the lookup functions of poetry_lexicon count dictionary hits and
+misses. disable puts the original functions back, so the checker costs
+nothing extra while instrumentation is off.
+
+    poetry_instrument.enable()
+    ...
+    poetry_instrument.write_report('report.json')
+    poetry_instrument.disable()
+"""
+
+"""
+An instrumentation report: dict of {str: object}
+  - 'stages': {stage: {'calls': int, 'seconds': float}} for each stage,
+    counting only the outermost call in each thread when its functions
+    call each other
+  - 'functions': {'module.function': {'stage': str, 'calls': int,
+    'seconds': float}} for each instrumented function that was called;
+    the seconds include the time spent in other instrumented functions
+  - 'lookups': {'hits': int, 'misses': int} for the words looked up with
+    the functions of poetry_lexicon.syllable_lookup, rhyme_lookup,
+    stress_lookup and entry_lookup, in every thread
+  - 'seconds': the time since instrumentation was enabled (a float)
+  - 'marks': {name: seconds} for each name passed to mark, the time from
+    enabling instrumentation to the first time it was marked
+  - 'peak_memory': the most memory allocated by Python while enabled, in
+    bytes, if memory was traced (an int or NoneType)
+  - 'peak_rss': the process's peak resident memory in bytes, where the
+    platform reports it (an int or NoneType)
+  - 'profiled_thread': the name of the thread that cProfile covers, if
+    profiling is on (a str or NoneType); cProfile only sees the thread that
+    enabled instrumentation, so other threads, such as the one that loads
+    the dictionary in poetry_program, are missing from its statistics
+"""
+
+import cProfile
+import functools
+import importlib
+import json
+import os.path
+import sys
+import threading
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# (module name, attribute, stage) of each function that is timed. An
+# attribute 'Class.method' names a method.
+TIMED_FUNCTIONS = [
+    ('poetry_reader', 'load_pronunciation', 'load'),
+    ('poetry_reader', 'load_lexicon', 'load'),
+    ('poetry_reader', 'load_forms', 'load'),
+    ('poetry_reader', 'read_pronunciation', 'load'),
+    ('poetry_reader', 'read_poetry_form_descriptions', 'load'),
+    ('poetry_reader', 'read_cache', 'load'),
+    ('poetry_functions', 'clean_up', 'tokenize'),
+    ('poetry_functions', 'split_on_separators', 'tokenize'),
+    ('poetry_functions', 'get_poem_lines', 'tokenize'),
+    ('poetry_tokenizer', 'tokenize_line', 'tokenize'),
+    ('poetry_analysis', 'analyze_poem', 'analyze'),
+    ('poetry_functions', 'check_syllables', 'syllables'),
+    ('poetry_analysis', 'PoemAnalysis.check_syllables', 'syllables'),
+    ('poetry_functions', 'check_rhyme_scheme', 'rhymes'),
+    ('poetry_analysis', 'PoemAnalysis.check_rhyme_scheme', 'rhymes'),
+    ('poetry_program', 'check_poem', 'check'),
+    ('poetry_program', 'check_poem_analysis', 'check'),
+]
+
+# (module name, attribute) of each function that returns a lookup function
+# whose hits and misses are counted.
+LOOKUP_FUNCTIONS = [
+    ('poetry_lexicon', 'syllable_lookup'),
+    ('poetry_lexicon', 'rhyme_lookup'),
+    ('poetry_lexicon', 'stress_lookup'),
+    ('poetry_lexicon', 'entry_lookup'),
+]
+
+
+class _State:
+    """ Everything recorded while instrumentation is enabled.
+    """
+
+    def __init__(self, trace_memory, profile):
+        self.started = time.perf_counter()
+        # {name: [stage, calls, seconds]}
+        self.functions = {}
+        # {stage: [calls, seconds]}
+        self.stages = {}
+        # The depth of nested calls of each stage in the current thread, as
+        # the attribute depths: {stage: int}
+        self.local = threading.local()
+        # Guards the counts and times, which several threads may update.
+        self.lock = threading.Lock()
+        self.lookups = {'hits': 0, 'misses': 0}
+        self.marks = {}
+        # (owner, attribute, original) of each replaced function.
+        self.patched = []
+        self.trace_memory = trace_memory and not tracemalloc.is_tracing()
+        self.profiler = None
+        self.profiled_thread = None
+        if profile:
+            self.profiler = cProfile.Profile()
+            self.profiled_thread = threading.current_thread().name
+
+
+_state = None
+
+
+def _owners(module_name, attribute):
+    """ (str, str) -> list of tuple of (object, str)
+
+    Return the module or class that holds the function module_name.attribute
+    and the function's own name. When the module is also being run as the
+    main script, the function in __main__ is returned as well.
+    """
+    modules = [importlib.import_module(module_name)]
+    main = sys.modules.get('__main__')
+    main_filename = getattr(main, '__file__', None)
+    if (main_filename is not None and main is not modules[0] and
+            os.path.abspath(main_filename) ==
+            os.path.abspath(modules[0].__file__)):
+        modules.append(main)
+    *class_names, name = attribute.split('.')
+    owners = []
+    for owner in modules:
+        for class_name in class_names:
+            owner = getattr(owner, class_name)
+        owners.append((owner, name))
+    return owners
+
+
+def _timed(function, name, stage, state):
+    """ (function, str, str, _State) -> function
+
+    Return a function that calls function, adding the time it takes to the
+    totals of name and stage in state.
+    """
+    record = state.functions.setdefault(name, [stage, 0, 0.0])
+    totals = state.stages.setdefault(stage, [0, 0.0])
+    local = state.local
+    lock = state.lock
+    clock = time.perf_counter
+
+    @functools.wraps(function)
+    def timed(*args, **kwargs):
+        depths = getattr(local, 'depths', None)
+        if depths is None:
+            depths = local.depths = {}
+        depth = depths.get(stage, 0)
+        depths[stage] = depth + 1
+        start = clock()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            seconds = clock() - start
+            depths[stage] = depth
+            with lock:
+                record[1] += 1
+                record[2] += seconds
+                if depth == 0:
+                    totals[0] += 1
+                    totals[1] += seconds
+    return timed
+
+
+def _counted(make_lookup, state):
+    """ (function, _State) -> function
+
+    Return a function that calls make_lookup and returns a lookup function
+    that counts its hits and misses in state.
+    """
+    lookups = state.lookups
+    lock = state.lock
+
+    @functools.wraps(make_lookup)
+    def counted(word_to_phonemes):
+        lookup = make_lookup(word_to_phonemes)
+
+        def counted_lookup(word):
+            try:
+                result = lookup(word)
+            except KeyError:
+                with lock:
+                    lookups['misses'] += 1
+                raise
+            with lock:
+                lookups['hits'] += 1
+            return result
+        return counted_lookup
+    return counted
+
+
+def is_enabled():
+    """ () -> bool
+
+    Return True iff instrumentation is enabled.
+    """
+    return _state is not None
+
+
+def enable(trace_memory=True, profile=False):
+    """ (bool, bool) -> NoneType
+
+    Start recording: replace the functions in TIMED_FUNCTIONS and
+    LOOKUP_FUNCTIONS by instrumented ones, and reset the report. If
+    trace_memory is True, the peak memory Python allocates is traced (which
+    slows allocation down). If profile is True, everything is also run
+    under cProfile until the report is written or disable is called.
+
+    >>> enable(trace_memory=False)
+    >>> import poetry_functions
+    >>> poetry_functions.clean_up('Gap!')
+    'GAP'
+    >>> report()['functions']['poetry_functions.clean_up']['calls']
+    1
+    >>> disable()
+    """
+    global _state
+    if _state is not None:
+        disable()
+    state = _State(trace_memory, profile)
+    for module_name, attribute, stage in TIMED_FUNCTIONS:
+        for owner, name in _owners(module_name, attribute):
+            original = owner.__dict__[name]
+            state.patched.append((owner, name, original))
+            setattr(owner, name, _timed(original,
+                                        module_name + '.' + attribute,
+                                        stage, state))
+    for module_name, attribute in LOOKUP_FUNCTIONS:
+        for owner, name in _owners(module_name, attribute):
+            original = owner.__dict__[name]
+            state.patched.append((owner, name, original))
+            setattr(owner, name, _counted(original, state))
+    if state.trace_memory:
+        tracemalloc.start()
+    if state.profiler is not None:
+        state.profiler.enable()
+    _state = state
+
+
+def mark(name):
+    """ (str) -> NoneType
+
+    Record the time since instrumentation was enabled as the mark name,
+    unless name has been marked already. Do nothing if instrumentation is
+    not enabled.
+
+    >>> enable(trace_memory=False)
+    >>> mark('ready')
+    >>> list(report()['marks'])
+    ['ready']
+    >>> disable()
+    """
+    state = _state
+    if state is not None and name not in state.marks:
+        state.marks[name] = time.perf_counter() - state.started
+
+
+def report():
+    """ () -> instrumentation report
+
+    Return what has been recorded since instrumentation was enabled.
+    """
+    if _state is None:
+        raise RuntimeError('instrumentation is not enabled')
+    stages = {}
+    functions = {}
+    with _state.lock:
+        for stage in _state.stages:
+            calls, seconds = _state.stages[stage]
+            stages[stage] = {'calls': calls, 'seconds': seconds}
+        for name in _state.functions:
+            stage, calls, seconds = _state.functions[name]
+            if calls > 0:
+                functions[name] = {'stage': stage, 'calls': calls,
+                                   'seconds': seconds}
+        lookups = dict(_state.lookups)
+
+    peak_memory = None
+    if _state.trace_memory:
+        peak_memory = tracemalloc.get_traced_memory()[1]
+    peak_rss = None
+    if resource is not None:
+        # ru_maxrss is in kilobytes, except on macOS.
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform != 'darwin':
+            peak_rss *= 1024
+    return {'stages': stages, 'functions': functions,
+            'lookups': lookups,
+            'seconds': time.perf_counter() - _state.started,
+            'marks': dict(_state.marks),
+            'peak_memory': peak_memory, 'peak_rss': peak_rss,
+            'profiled_thread': _state.profiled_thread}
+
+
+def write_report(report_filename=None, profile_filename=None):
+    """ (str, str) -> instrumentation report
+
+    Return the report, writing it as JSON to report_filename if it is
+    given, and write the cProfile statistics to profile_filename (for
+    pstats) if it is given and profiling is on, which stops the profiling.
+    """
+    result = report()
+    if report_filename is not None:
+        with open(report_filename, 'w') as report_file:
+            json.dump(result, report_file, indent=2, sort_keys=True)
+    if profile_filename is not None and _state.profiler is not None:
+        _state.profiler.dump_stats(profile_filename)
+    return result
+
+
+def disable():
+    """ () -> NoneType
+
+    Stop recording and put back the original functions. The report is
+    discarded.
+    """
+    global _state
+    if _state is None:
+        return
+    state = _state
+    _state = None
+    if state.profiler is not None:
+        state.profiler.disable()
+    if state.trace_memory:
+        tracemalloc.stop()
+    for owner, name, original in reversed(state.patched):
+        setattr(owner, name, original)
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
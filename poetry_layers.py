@@ -0,0 +1,202 @@
+"""
+A pronunciation dictionary: dict of {str: list of str}
+  - each key is a word (a str)
+  - each value is a list of phonemes for that word (a list of str)
+  - a poetry_lexicon.Lexicon may be used wherever one is expected
+"""
+
+import time
+from collections.abc import Mapping
+
+import poetry_cache
+import poetry_lexicon
+import poetry_meter
+import poetry_reader
+
+
+class LayeredPronunciation(Mapping):
+    """ A read-only pronunciation dictionary made of a base dictionary and
+    any number of overlay files in the CMU format (such as dictionary2.txt
+    or a file of custom words).
+
+    A lookup falls through the layers in order of precedence and answers
+    from the first layer that has the word. By default, overlays take
+    precedence over the base and later overlays over earlier ones; with
+    base_first=True, the base takes precedence over every overlay. The base
+    is used as it is and never copied.
+
+    Overlays are re-read by refresh when their files change, without
+    touching the base. If max_age is given, lookups call refresh themselves
+    once max_age seconds have passed since the last check.
+
+    Rhyme keys are rhyme tails, so words from different layers compare
+    correctly.
+
+    >>> base = {'GAP': ['G', 'AE1', 'P'], 'CAP': ['K', 'AE1', 'P']}
+    >>> store = LayeredPronunciation(base)
+    >>> base['ZAP'] = ['Z', 'AE1', 'P']
+    >>> store['ZAP']
+    ['Z', 'AE1', 'P']
+    >>> store.rhyme_key('ZAP') == store.rhyme_key('GAP')
+    True
+    """
+
+    def __init__(self, base, overlay_filenames=(), base_first=False,
+                 max_age=None):
+        """ (LayeredPronunciation, pronunciation dictionary, list of str,
+             bool, float) -> NoneType
+        """
+        self._base = base
+        self._base_first = base_first
+        self._max_age = max_age
+        self._overlay_filenames = []
+        self._overlays = {}
+        self._stats = {}
+        self._layers = [base]
+        for overlay_filename in overlay_filenames:
+            self.add_overlay(overlay_filename)
+        self._checked = time.monotonic()
+
+    def add_overlay(self, overlay_filename):
+        """ (LayeredPronunciation, str) -> NoneType
+
+        Read overlay_filename and add it as the overlay with the highest
+        precedence.
+        """
+        self._overlay_filenames.append(overlay_filename)
+        self._load(overlay_filename)
+        self._order_layers()
+
+    def _load(self, overlay_filename):
+        """ (LayeredPronunciation, str) -> NoneType
+
+        Read (or re-read) overlay_filename. A missing file is an empty
+        overlay.
+        """
+        self._stats[overlay_filename] = poetry_cache.stat_key(
+            overlay_filename)
+        try:
+            with open(overlay_filename) as pronunciation_file:
+                overlay = poetry_reader.read_pronunciation(pronunciation_file)
+        except OSError:
+            overlay = {}
+        self._overlays[overlay_filename] = overlay
+
+    def _order_layers(self):
+        """ (LayeredPronunciation) -> NoneType
+
+        Put the layers in order of precedence.
+        """
+        overlays = []
+        for overlay_filename in reversed(self._overlay_filenames):
+            overlays.append(self._overlays[overlay_filename])
+        if self._base_first:
+            self._layers = [self._base] + overlays
+        else:
+            self._layers = overlays + [self._base]
+
+    def refresh(self):
+        """ (LayeredPronunciation) -> list of str
+
+        Re-read every overlay whose file has changed (or appeared or
+        disappeared) since it was read, and return their filenames.
+        """
+        self._checked = time.monotonic()
+        reloaded = []
+        for overlay_filename in self._overlay_filenames:
+            stats = poetry_cache.stat_key(overlay_filename)
+            if stats != self._stats[overlay_filename]:
+                self._load(overlay_filename)
+                reloaded.append(overlay_filename)
+        if len(reloaded) > 0:
+            self._order_layers()
+        return reloaded
+
+    def _layer_of(self, word):
+        """ (LayeredPronunciation, str) -> pronunciation dictionary
+
+        Return the layer with the highest precedence that has word. Raise
+        KeyError if none does.
+        """
+        if (self._max_age is not None and
+                time.monotonic() - self._checked >= self._max_age):
+            self.refresh()
+        for layer in self._layers:
+            if word in layer:
+                return layer
+        raise KeyError(word)
+
+    def __getitem__(self, word):
+        return self._layer_of(word)[word]
+
+    def __contains__(self, word):
+        try:
+            self._layer_of(word)
+        except KeyError:
+            return False
+        return True
+
+    def __iter__(self):
+        layers = self._layers
+        for i in range(len(layers)):
+            for word in layers[i]:
+                shadowed = False
+                for layer in layers[:i]:
+                    if word in layer:
+                        shadowed = True
+                if not shadowed:
+                    yield word
+
+    def __len__(self):
+        length = 0
+        for word in self:
+            length += 1
+        return length
+
+    def syllables(self, word):
+        """ (LayeredPronunciation, str) -> int
+
+        Return the number of syllables in word.
+        """
+        layer = self._layer_of(word)
+        if hasattr(layer, 'syllables'):
+            return layer.syllables(word)
+        return poetry_lexicon.count_syllables(layer[word])
+
+    def rhyme_key(self, word):
+        """ (LayeredPronunciation, str) -> rhyme tail or NoneType
+
+        Return the rhyme tail of word, or None if it has none.
+        """
+        layer = self._layer_of(word)
+        if hasattr(layer, 'rhyme_tail'):
+            return layer.rhyme_tail(word)
+        return poetry_lexicon.rhyme_tail(layer[word])
+
+    def stresses(self, word):
+        """ (LayeredPronunciation, str) -> str
+
+        Return the stress string of word.
+        """
+        layer = self._layer_of(word)
+        if hasattr(layer, 'stresses'):
+            return layer.stresses(word)
+        return poetry_meter.stress_string(layer[word])
+
+    def entry(self, word):
+        """ (LayeredPronunciation, str)
+                            -> tuple of (int, rhyme tail or NoneType, str)
+
+        Return the number of syllables, the rhyme key and the stress string
+        of word, finding its layer once.
+        """
+        layer = self._layer_of(word)
+        if hasattr(layer, 'rhyme_tail'):
+            return (layer.syllables(word), layer.rhyme_tail(word),
+                    layer.stresses(word))
+        return poetry_lexicon.word_entry(layer[word])
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,273 @@
+"""
+A pronunciation dictionary: dict of {str: list of str}
+  - each key is a word (a str)
+  - each value is a list of phonemes for that word (a list of str)
+
+A rhyme tail: tuple of str
+  - the phonemes of a word from its last stressed vowel onward
+"""
+
+import array
+import sys
+from collections.abc import Mapping
+
+import poetry_meter
+
+
+def count_syllables(phonemes):
+    """ (list of str) -> int
+
+    Return the number of syllables in phonemes, which is the number of
+    phonemes that end in a stress digit.
+
+    >>> count_syllables(['B', 'IH0', 'F', 'AO1', 'R'])
+    2
+    >>> count_syllables(['N', 'EH1', 'K', 'S', 'T'])
+    1
+    """
+    syllables = 0
+    for phoneme in phonemes:
+        if phoneme[-1].isdigit():
+            syllables += 1
+    return syllables
+
+
+def rhyme_tail(phonemes):
+    """ (list of str) -> rhyme tail or NoneType
+
+    Return the phonemes from the last phoneme that ends in a stress digit
+    to the end of phonemes, or None if no phoneme carries a stress digit.
+
+    >>> rhyme_tail(['P', 'OW1', 'AH0', 'M'])
+    ('AH0', 'M')
+    >>> rhyme_tail(['AO1', 'F'])
+    ('AO1', 'F')
+    >>> rhyme_tail(['HH', 'M']) is None
+    True
+    """
+    for i in range(len(phonemes) - 1, -1, -1):
+        if phonemes[i][-1].isdigit():
+            return tuple(phonemes[i:])
+    return None
+
+
+def word_entry(phonemes):
+    """ (list of str) -> tuple of (int, rhyme tail or NoneType, str)
+
+    Return the number of syllables, the rhyme tail and the stress string
+    (see poetry_meter) of a word with the given phonemes.
+
+    >>> word_entry(['P', 'OW1', 'AH0', 'M'])
+    (2, ('AH0', 'M'), '10')
+    """
+    return (count_syllables(phonemes), rhyme_tail(phonemes),
+            poetry_meter.stress_string(phonemes))
+
+
+class Lexicon(Mapping):
+    """ A read-only pronunciation dictionary that also holds the syllable
+    count, the interned rhyme tail and the stress string (see poetry_meter)
+    of every word.
+
+    Rhyme tails are stored once each; a word's rhyme key is the int id of
+    its tail, so two words rhyme exactly when their rhyme keys are equal.
+
+    >>> lexicon = Lexicon({'GAP': ['G', 'AE1', 'P'],
+    ...                    'CAP': ['K', 'AE1', 'P'],
+    ...                    'BEFORE': ['B', 'IH0', 'F', 'AO1', 'R']})
+    >>> lexicon['GAP']
+    ['G', 'AE1', 'P']
+    >>> lexicon.syllables('BEFORE')
+    2
+    >>> lexicon.rhyme_key('GAP') == lexicon.rhyme_key('CAP')
+    True
+    >>> lexicon.rhyme_tail('BEFORE')
+    ('AO1', 'R')
+    >>> lexicon.stresses('BEFORE')
+    '01'
+    >>> lexicon.entry('BEFORE') == (2, lexicon.rhyme_key('BEFORE'), '01')
+    True
+    """
+
+    # Bumped whenever the pickled tables change (see poetry_reader).
+    LAYOUT_VERSION = 1
+
+    def __init__(self, word_to_phonemes):
+        """ (Lexicon, pronunciation dictionary) -> NoneType
+
+        Build the syllable and rhyme tables for every word in
+        word_to_phonemes.
+        """
+        self._word_to_phonemes = word_to_phonemes
+        self._index = {}
+        self._syllables = array.array('H')
+        self._rhyme_ids = array.array('I')
+        # Each distinct stress string is stored once.
+        self._stresses = []
+        stress_strings = {}
+        # Rhyme id 0 is reserved for words without a stressed vowel.
+        self._rhyme_tails = [None]
+        tail_ids = {None: 0}
+
+        for word in word_to_phonemes:
+            phonemes = word_to_phonemes[word]
+            tail = rhyme_tail(phonemes)
+            if tail not in tail_ids:
+                tail_ids[tail] = len(self._rhyme_tails)
+                self._rhyme_tails.append(
+                    tuple(sys.intern(phoneme) for phoneme in tail))
+            self._index[word] = len(self._syllables)
+            self._syllables.append(count_syllables(phonemes))
+            self._rhyme_ids.append(tail_ids[tail])
+            stresses = poetry_meter.stress_string(phonemes)
+            self._stresses.append(stress_strings.setdefault(stresses,
+                                                            stresses))
+
+    def __getitem__(self, word):
+        return self._word_to_phonemes[word]
+
+    def __contains__(self, word):
+        return word in self._index
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __len__(self):
+        return len(self._index)
+
+    def syllables(self, word):
+        """ (Lexicon, str) -> int
+
+        Return the number of syllables in word.
+        """
+        return self._syllables[self._index[word]]
+
+    def rhyme_key(self, word):
+        """ (Lexicon, str) -> int or NoneType
+
+        Return the id of word's rhyme tail, or None if word has no stressed
+        vowel.
+        """
+        rhyme_id = self._rhyme_ids[self._index[word]]
+        if rhyme_id == 0:
+            return None
+        return rhyme_id
+
+    def rhyme_tail(self, word):
+        """ (Lexicon, str) -> rhyme tail or NoneType
+
+        Return the rhyme tail of word.
+        """
+        return self._rhyme_tails[self._rhyme_ids[self._index[word]]]
+
+    def stresses(self, word):
+        """ (Lexicon, str) -> str
+
+        Return the stress string of word.
+        """
+        return self._stresses[self._index[word]]
+
+    def entry(self, word):
+        """ (Lexicon, str) -> tuple of (int, int or NoneType, str)
+
+        Return the number of syllables, the rhyme key and the stress string
+        of word, looking it up once.
+        """
+        word_id = self._index[word]
+        rhyme_id = self._rhyme_ids[word_id]
+        if rhyme_id == 0:
+            rhyme_id = None
+        return self._syllables[word_id], rhyme_id, self._stresses[word_id]
+
+    def tables(self):
+        """ (Lexicon) -> tuple of (dict of {str: int}, array of int,
+                                   array of int)
+
+        Return the id of every word, and the syllable counts and rhyme ids
+        (0 for no stressed vowel) of the words indexed by word id. They are
+        the lexicon's own and must not be modified.
+
+        >>> index, syllables, rhyme_ids = Lexicon({'A': ['AH0']}).tables()
+        >>> syllables[index['A']], rhyme_ids[index['A']]
+        (1, 1)
+        """
+        return self._index, self._syllables, self._rhyme_ids
+
+
+def syllable_lookup(word_to_phonemes):
+    """ (pronunciation dictionary) -> function
+
+    Return a function that takes a cleaned word and returns its number of
+    syllables. Lexicon-like objects answer from their precomputed tables;
+    plain dicts count the stress digits of the word's phonemes.
+
+    >>> syllables_of = syllable_lookup({'POEM': ['P', 'OW1', 'AH0', 'M']})
+    >>> syllables_of('POEM')
+    2
+    """
+    if hasattr(word_to_phonemes, 'syllables'):
+        return word_to_phonemes.syllables
+    return lambda word: count_syllables(word_to_phonemes[word])
+
+
+def rhyme_lookup(word_to_phonemes):
+    """ (pronunciation dictionary) -> function
+
+    Return a function that takes a cleaned word and returns a hashable
+    rhyme key, or None if the word has no stressed vowel. Two words from
+    the same pronunciation dictionary rhyme iff their rhyme keys are equal.
+
+    >>> rhyme_of = rhyme_lookup({'GAP': ['G', 'AE1', 'P'],
+    ...                          'CAP': ['K', 'AE1', 'P']})
+    >>> rhyme_of('GAP') == rhyme_of('CAP')
+    True
+    """
+    if hasattr(word_to_phonemes, 'rhyme_key'):
+        return word_to_phonemes.rhyme_key
+    return lambda word: rhyme_tail(word_to_phonemes[word])
+
+
+def stress_lookup(word_to_phonemes):
+    """ (pronunciation dictionary) -> function
+
+    Return a function that takes a cleaned word and returns its stress
+    string (see poetry_meter). Lexicon-like objects answer from their
+    precomputed tables; plain dicts work it out from the word's phonemes.
+
+    >>> stresses_of = stress_lookup({'POEM': ['P', 'OW1', 'AH0', 'M']})
+    >>> stresses_of('POEM')
+    '10'
+    """
+    if hasattr(word_to_phonemes, 'stresses'):
+        return word_to_phonemes.stresses
+    return lambda word: poetry_meter.stress_string(word_to_phonemes[word])
+
+
+def entry_lookup(word_to_phonemes):
+    """ (pronunciation dictionary) -> function
+
+    Return a function that takes a cleaned word and returns its number of
+    syllables, rhyme key (as rhyme_lookup) and stress string (as
+    stress_lookup) together. Objects with an entry method answer with it;
+    plain dicts look the word's phonemes up once.
+
+    >>> entry_of = entry_lookup({'POEM': ['P', 'OW1', 'AH0', 'M']})
+    >>> entry_of('POEM')
+    (2, ('AH0', 'M'), '10')
+    """
+    if hasattr(word_to_phonemes, 'entry'):
+        return word_to_phonemes.entry
+    if (hasattr(word_to_phonemes, 'syllables') or
+            hasattr(word_to_phonemes, 'rhyme_key') or
+            hasattr(word_to_phonemes, 'stresses')):
+        syllables_of = syllable_lookup(word_to_phonemes)
+        rhyme_of = rhyme_lookup(word_to_phonemes)
+        stresses_of = stress_lookup(word_to_phonemes)
+        return lambda word: (syllables_of(word), rhyme_of(word),
+                             stresses_of(word))
+    return lambda word: word_entry(word_to_phonemes[word])
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
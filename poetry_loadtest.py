@@ -0,0 +1,167 @@
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import time
+
+import poetry_server
+
+SAMPLE_POEMS = ['haiku1.txt', 'haiku2.txt', 'haiku3.txt', 'limerick1.txt',
+                'limerick2.txt', 'limerick3.txt']
+
+
+def percentile(sorted_values, fraction):
+    """ (list of float, float) -> float
+
+    Return the value below which fraction of the values in sorted_values
+    fall, by the nearest-rank method.
+
+    >>> percentile([1.0, 2.0, 3.0, 4.0], 0.5)
+    2.0
+    >>> percentile([1.0, 2.0, 3.0, 4.0], 0.99)
+    4.0
+    """
+    rank = max(int(-(-fraction * len(sorted_values) // 1)), 1)
+    return sorted_values[rank - 1]
+
+
+def make_requests(endpoint, poem_filenames):
+    """ (str, list of str) -> list of bytes
+
+    Return a JSON request body for endpoint for each poem in poem_filenames.
+    """
+    bodies = []
+    for poem_filename in poem_filenames:
+        with open(poem_filename) as poem_file:
+            poem = poem_file.read()
+        if endpoint == '/check':
+            form = 'Haiku' if 'haiku' in poem_filename else 'Limerick'
+            request = {'poem': poem, 'form': form}
+        elif endpoint == '/detect':
+            request = {'poem': poem}
+        else:
+            request = {'poems': [{'name': poem_filename, 'poem': poem}]}
+        bodies.append(json.dumps(request).encode('utf-8'))
+    return bodies
+
+
+async def _client(host, port, endpoint, bodies, deadline, latencies, errors):
+    """ (str, int, str, list of bytes, float, list of float, list of int)
+                                                                -> NoneType
+
+    Send the requests in bodies, in turn, over one kept-alive connection
+    until deadline (a time.perf_counter time), appending the latency of
+    each to latencies and the status of each failure to errors.
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    i = 0
+    try:
+        while time.perf_counter() < deadline:
+            body = bodies[i % len(bodies)]
+            i += 1
+            start = time.perf_counter()
+            writer.write('POST {} HTTP/1.1\r\nHost: {}\r\n'
+                         'Content-Type: application/json\r\n'
+                         'Content-Length: {}\r\n\r\n'.format(
+                             endpoint, host, len(body)).encode('latin-1')
+                         + body)
+            status = int((await reader.readline()).split()[1])
+            length = 0
+            line = await reader.readline()
+            while line not in (b'\r\n', b''):
+                name, colon, value = line.decode('latin-1').partition(':')
+                if name.lower() == 'content-length':
+                    length = int(value)
+                line = await reader.readline()
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors.append(status)
+    finally:
+        writer.close()
+
+
+async def load_test(host, port, endpoint, bodies, connections, duration):
+    """ (str, int, str, list of bytes, int, float) -> dict of {str: float}
+
+    Send requests from connections concurrent clients for duration seconds
+    and return the number of requests and errors, the requests per second
+    and the p50, p99 and maximum latencies in seconds.
+    """
+    latencies = []
+    errors = []
+    start = time.perf_counter()
+    deadline = start + duration
+    await asyncio.gather(*[
+        _client(host, port, endpoint, bodies, deadline, latencies, errors)
+        for i in range(connections)])
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {'requests': len(latencies), 'errors': len(errors),
+            'requests_per_sec': len(latencies) / elapsed,
+            'p50': percentile(latencies, 0.5),
+            'p99': percentile(latencies, 0.99),
+            'max': latencies[-1]}
+
+
+def start_server(port, workers):
+    """ (int, int) -> subprocess.Popen
+
+    Start poetry_server on localhost and port in a child process and return
+    it once it is serving.
+    """
+    command = [sys.executable, 'poetry_server.py', '--port', str(port)]
+    if workers is not None:
+        command += ['--workers', str(workers)]
+    server = subprocess.Popen(command, stderr=subprocess.PIPE,
+                              universal_newlines=True)
+    line = server.stderr.readline()
+    if not line.startswith('Serving'):
+        server.kill()
+        raise RuntimeError('the server did not start: ' + line)
+    return server
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        description='Measure the latency and throughput of poetry_server.')
+    parser.add_argument('--host', default=poetry_server.HOST)
+    parser.add_argument('--port', type=int, default=poetry_server.PORT)
+    parser.add_argument('--endpoint', default='/check',
+                        choices=['/check', '/detect', '/batch'])
+    parser.add_argument('--connections', type=int, default=16,
+                        help='number of concurrent clients (default: 16)')
+    parser.add_argument('--duration', type=float, default=10.0,
+                        help='seconds to send requests for (default: 10)')
+    parser.add_argument('--start-server', action='store_true',
+                        help='start a server on localhost for the test')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='with --start-server, its number of workers')
+    options = parser.parse_args(args)
+
+    server = None
+    if options.start_server:
+        server = start_server(options.port, options.workers)
+    try:
+        results = asyncio.run(load_test(
+            options.host, options.port, options.endpoint,
+            make_requests(options.endpoint, SAMPLE_POEMS),
+            options.connections, options.duration))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    print('== {} with {} connections for {:.0f} s =='.format(
+        options.endpoint, options.connections, options.duration))
+    print('{:>24}: {:10d}'.format('requests', results['requests']))
+    print('{:>24}: {:10d}'.format('errors', results['errors']))
+    print('{:>24}: {:10.1f}'.format('requests/sec',
+                                    results['requests_per_sec']))
+    for name in ['p50', 'p99', 'max']:
+        print('{:>24}: {:10.2f} ms'.format(name, results[name] * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,177 @@
+"""
+Meters, and the stress strings that lines are checked against them with.
+
+A stress string: str of '0', '1' and 'x'
+  - one character for each syllable, in order
+  - '1' for a syllable with primary stress, '0' for an unstressed one and
+    'x' for one that may be read either way: every syllable of a
+    one-syllable word and every syllable with secondary stress
+
+A meter: str
+  - a metrical foot, optionally followed by a measure (the number of feet
+    in each line), such as 'iambic' or 'iambic pentameter'
+  - the foot is a name in FEET or a pattern of '0's and '1's, such as '01'
+  - without a measure, a line may have any number of whole feet
+  - unless it is checked strictly, a line may also use the standard
+    substitutions: the first foot and one other foot, but not the last, may
+    be inverted (such as a trochee for an iamb), and a line in a foot that
+    ends stressed may have one extra unstressed syllable at its end (a
+    feminine ending)
+"""
+
+import functools
+import re
+
+# The stress pattern of each named metrical foot.
+FEET = {'iambic': '01',
+        'trochaic': '10',
+        'spondaic': '11',
+        'pyrrhic': '00',
+        'anapestic': '001',
+        'dactylic': '100',
+        'amphibrachic': '010'}
+
+# The number of feet in a line of each named measure.
+MEASURES = {'monometer': 1,
+            'dimeter': 2,
+            'trimeter': 3,
+            'tetrameter': 4,
+            'pentameter': 5,
+            'hexameter': 6,
+            'heptameter': 7,
+            'octameter': 8}
+
+# The stress string character for each CMU stress digit, in a word of more
+# than one syllable.
+_STRESS_OF_DIGIT = {'0': '0', '1': '1', '2': 'x'}
+
+# What each stress of a foot matches in a stress string.
+_MATCHES = {'0': '[0x]', '1': '[1x]'}
+
+
+def stress_string(phonemes):
+    """ (list of str) -> str
+
+    Return the stress string of a word with the given phonemes.
+
+    >>> stress_string(['B', 'IH0', 'F', 'AO1', 'R'])
+    '01'
+    >>> stress_string(['AE1', 'N', 'T', 'IH0', 'L', 'OW2', 'P'])
+    '10x'
+    >>> stress_string(['DH', 'AH0']), stress_string(['HH', 'M'])
+    ('x', '')
+    """
+    digits = [phoneme[-1] for phoneme in phonemes if phoneme[-1].isdigit()]
+    if len(digits) == 1:
+        return 'x'
+    return ''.join([_STRESS_OF_DIGIT[digit] for digit in digits])
+
+
+def parse_meter(meter):
+    """ (str) -> tuple of (str, int)
+
+    Return the stress pattern of the foot of meter and its number of feet,
+    or 0 for any number. Raise ValueError if meter is not a meter.
+
+    >>> parse_meter('Iambic Pentameter')
+    ('01', 5)
+    >>> parse_meter('001')
+    ('001', 0)
+    """
+    words = meter.lower().split()
+    if len(words) == 0 or len(words) > 2:
+        raise ValueError('not a meter: {!r}'.format(meter))
+    if words[0] in FEET:
+        foot = FEET[words[0]]
+    elif words[0].strip('01') == '':
+        foot = words[0]
+    else:
+        raise ValueError('unknown metrical foot: {!r}'.format(words[0]))
+    if len(words) == 1:
+        return foot, 0
+    if words[1] not in MEASURES:
+        raise ValueError('unknown measure: {!r}'.format(words[1]))
+    return foot, MEASURES[words[1]]
+
+
+def _stress_pattern(stresses):
+    """ (str) -> str
+
+    Return the regular expression that the stress string of a foot with the
+    stress pattern stresses matches.
+    """
+    return ''.join([_MATCHES[stress] for stress in stresses])
+
+
+@functools.lru_cache(maxsize=None)
+def compile_meter(meter, strict=False):
+    """ (str, bool) -> re.Pattern
+
+    Return the compiled pattern that the whole stress string of a line in
+    meter matches, allowing the standard substitutions unless strict is
+    True. Raise ValueError if meter is not a meter.
+
+    >>> iambic = compile_meter('iambic trimeter')
+    >>> iambic.fullmatch('x1x10x') is not None
+    True
+    >>> iambic.fullmatch('10x1x10') is not None
+    True
+    >>> compile_meter('iambic trimeter', True).fullmatch('10x1x1') is None
+    True
+    """
+    foot, feet = parse_meter(meter)
+    foot_pattern = '(?:{})'.format(_stress_pattern(foot))
+    if strict:
+        if feet == 0:
+            return re.compile(foot_pattern + '+')
+        return re.compile('{}{{{}}}'.format(foot_pattern, feet))
+
+    # Only a two-syllable foot that isn't its own reverse can be inverted.
+    inverted = foot[::-1]
+    if len(foot) == 2 and inverted != foot:
+        inverted_pattern = '(?:{})'.format(_stress_pattern(inverted))
+        first_pattern = '(?:{}|{})'.format(foot_pattern, inverted_pattern)
+    else:
+        inverted_pattern = None
+    if inverted_pattern is None:
+        if feet == 0:
+            line_pattern = foot_pattern + '+'
+        else:
+            line_pattern = '{}{{{}}}'.format(foot_pattern, feet)
+    elif feet == 0:
+        # Any number of feet, the last of them not inverted.
+        line_pattern = '(?:{}(?:{}*{})?)?{}+'.format(
+            first_pattern, foot_pattern, inverted_pattern, foot_pattern)
+    elif feet == 1:
+        line_pattern = foot_pattern
+    else:
+        # The feet after the first: none of them inverted, or exactly one
+        # inverted that is not the last.
+        rests = ['{}{{{}}}'.format(foot_pattern, feet - 1)]
+        for middle in range(feet - 2):
+            rests.append('{}{{{}}}{}{}{{{}}}'.format(
+                foot_pattern, middle, inverted_pattern, foot_pattern,
+                feet - 2 - middle))
+        line_pattern = '{}(?:{})'.format(first_pattern, '|'.join(rests))
+    if foot.endswith('1'):
+        line_pattern += _MATCHES['0'] + '?'
+    return re.compile(line_pattern)
+
+
+def scans(stresses, meter, strict=False):
+    """ (str, str, bool) -> bool
+
+    Return True iff a line with the stress string stresses is in meter,
+    allowing the standard substitutions unless strict is True.
+
+    >>> scans('x10x', 'iambic'), scans('x01', 'iambic')
+    (True, False)
+    >>> scans('10x1', 'iambic'), scans('10x1', 'iambic', True)
+    (True, False)
+    """
+    return compile_meter(meter, strict).fullmatch(stresses) is not None
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
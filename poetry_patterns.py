@@ -0,0 +1,231 @@
+"""
+A poetry pattern:  tuple of (list of int, list of str)
+  - first item is a list of the number of syllables required in each line
+  - second item is a list describing the rhyme scheme rule for each line
+  - a CompiledForm may be used wherever one is expected, and may also
+    carry a meter (see poetry_meter)
+"""
+
+"""
+A form index: dict of {int: list of str}
+  - each key is a number of lines
+  - each value is the sorted list of names of the poetry forms with that
+    many lines
+"""
+
+import functools
+from collections.abc import Mapping
+
+import poetry_meter
+
+# The most distinct poetry patterns whose compiled forms are remembered.
+FORM_CACHE_SIZE = 1024
+
+
+class CompiledForm:
+    """ An immutable poetry pattern with everything the checks need worked
+    out once: its rhyme groups, its wildcard lines and the lines whose
+    syllables are not checked. It is indexed like the poetry pattern it
+    was compiled from: form[0] is the syllables and form[1] the rhyme
+    scheme, each as a tuple.
+
+    syllables: the number of syllables required in each line, 0 for any
+               number (tuple of int)
+    rhymes: the rhyme scheme label of each line (tuple of str)
+    groups: (label, positions) for each label other than '*' with more
+            than one line, in order of label: the groups whose lines must
+            rhyme (tuple of tuple of (str, tuple of int))
+    wildcards: the positions of the lines labelled '*' (tuple of int)
+    zero_lines: the positions of the lines that may have any number of
+                syllables (tuple of int)
+    counted_lines: the positions of the other lines (tuple of int)
+    meter: the meter every line must be in, or None (str or NoneType)
+    meter_pattern: the compiled pattern of meter, or None (re.Pattern or
+                   NoneType)
+
+    >>> form = CompiledForm([8, 0, 8, 5], ['A', '*', 'A', 'B'])
+    >>> form.groups, form.wildcards, form.zero_lines
+    ((('A', (0, 2)),), (1,), (1,))
+    >>> form[0]
+    (8, 0, 8, 5)
+    """
+
+    # Bumped whenever the arguments that __reduce__ pickles change.
+    LAYOUT_VERSION = 1
+
+    __slots__ = ('syllables', 'rhymes', 'groups', 'wildcards', 'zero_lines',
+                 'counted_lines', 'meter', 'meter_pattern')
+
+    def __init__(self, syllables, rhymes, meter=None):
+        """ (CompiledForm, list of int, list of str, str) -> NoneType
+
+        Raise ValueError if meter is not a meter.
+        """
+        meter_pattern = None
+        if meter is not None:
+            meter_pattern = poetry_meter.compile_meter(meter)
+
+        positions = {}
+        for i in range(len(rhymes)):
+            if rhymes[i] not in positions:
+                positions[rhymes[i]] = [i]
+            else:
+                positions[rhymes[i]].append(i)
+        groups = []
+        for label in sorted(positions):
+            if label != '*' and len(positions[label]) > 1:
+                groups.append((label, tuple(positions[label])))
+
+        zero_lines = []
+        counted_lines = []
+        for i in range(len(syllables)):
+            if syllables[i] == 0:
+                zero_lines.append(i)
+            else:
+                counted_lines.append(i)
+
+        set_slot = object.__setattr__
+        set_slot(self, 'syllables', tuple(syllables))
+        set_slot(self, 'rhymes', tuple(rhymes))
+        set_slot(self, 'groups', tuple(groups))
+        set_slot(self, 'wildcards', tuple(positions.get('*', ())))
+        set_slot(self, 'zero_lines', tuple(zero_lines))
+        set_slot(self, 'counted_lines', tuple(counted_lines))
+        set_slot(self, 'meter', meter)
+        set_slot(self, 'meter_pattern', meter_pattern)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('CompiledForm is immutable')
+
+    def __delattr__(self, name):
+        raise AttributeError('CompiledForm is immutable')
+
+    def __reduce__(self):
+        return CompiledForm, (self.syllables, self.rhymes, self.meter)
+
+    def __getitem__(self, index):
+        return (self.syllables, self.rhymes)[index]
+
+    def __len__(self):
+        return 2
+
+    def __iter__(self):
+        return iter((self.syllables, self.rhymes))
+
+    def __eq__(self, other):
+        if isinstance(other, CompiledForm):
+            return (self.syllables == other.syllables and
+                    self.rhymes == other.rhymes and self.meter == other.meter)
+        try:
+            return (self.syllables == tuple(other[0]) and
+                    self.rhymes == tuple(other[1]))
+        except (TypeError, IndexError, KeyError):
+            return NotImplemented
+
+    def __hash__(self):
+        return hash((self.syllables, self.rhymes))
+
+    def __repr__(self):
+        if self.meter is None:
+            return 'CompiledForm({!r}, {!r})'.format(list(self.syllables),
+                                                     list(self.rhymes))
+        return 'CompiledForm({!r}, {!r}, {!r})'.format(
+            list(self.syllables), list(self.rhymes), self.meter)
+
+
+@functools.lru_cache(maxsize=FORM_CACHE_SIZE)
+def _compile(syllables, rhymes, meter=None):
+    """ (tuple of int, tuple of str, str) -> CompiledForm
+
+    Return the compiled form of the pattern (syllables, rhymes) in meter.
+    """
+    return CompiledForm(syllables, rhymes, meter)
+
+
+def compile_form(pattern, meter=None):
+    """ (poetry pattern, str) -> CompiledForm
+
+    Return the compiled form of pattern, whose lines must be in meter if it
+    is not None. Equal patterns are only compiled once, and a pattern that
+    is already compiled is returned as it is (whatever meter is). Raise
+    ValueError if meter is not a meter.
+
+    >>> form = compile_form(([5, 7, 5], ['A', 'B', 'A']))
+    >>> form is compile_form(([5, 7, 5], ['A', 'B', 'A']))
+    True
+    >>> form == ([5, 7, 5], ['A', 'B', 'A'])
+    True
+    """
+    if isinstance(pattern, CompiledForm):
+        return pattern
+    return _compile(tuple(pattern[0]), tuple(pattern[1]), meter)
+
+
+class FormRegistry(Mapping):
+    """ A read-only dict of {str: CompiledForm} from poetry form name to
+    compiled form, in the order the forms were given, that also indexes the
+    forms by number of lines. It may be used wherever a dict of
+    {str: poetry pattern} is expected. poetry_reader.load_forms builds one
+    from a poetry forms file.
+
+    >>> registry = FormRegistry({'Haiku': ([5, 7, 5], ['*', '*', '*']),
+    ...                          'Tercet': ([8, 8, 8], ['A', 'A', 'A']),
+    ...                          'Couplet': ([8, 8], ['A', 'A'])})
+    >>> registry['Couplet'].groups
+    (('A', (0, 1)),)
+    >>> registry.with_line_count(3)
+    ['Haiku', 'Tercet']
+    """
+
+    # Bumped whenever the pickled registry changes (see poetry_reader).
+    LAYOUT_VERSION = 1
+
+    def __init__(self, name_to_poetry_pattern):
+        """ (FormRegistry, dict of {str: poetry pattern}) -> NoneType
+        """
+        self._forms = {}
+        self._form_index = {}
+        for name in name_to_poetry_pattern:
+            form = compile_form(name_to_poetry_pattern[name])
+            self._forms[name] = form
+            line_count = len(form.syllables)
+            if line_count not in self._form_index:
+                self._form_index[line_count] = [name]
+            else:
+                self._form_index[line_count].append(name)
+        for line_count in self._form_index:
+            self._form_index[line_count].sort()
+
+    def __getitem__(self, name):
+        return self._forms[name]
+
+    def __contains__(self, name):
+        return name in self._forms
+
+    def __iter__(self):
+        return iter(self._forms)
+
+    def __len__(self):
+        return len(self._forms)
+
+    def with_line_count(self, line_count):
+        """ (FormRegistry, int) -> list of str
+
+        Return the sorted names of the forms with line_count lines. The
+        list is the registry's own and must not be modified.
+        """
+        return self._form_index.get(line_count, [])
+
+    def form_index(self):
+        """ (FormRegistry) -> form index
+
+        Return the form index of the registry's forms (as
+        poetry_detect.index_forms would build it). It is the registry's own
+        and must not be modified.
+        """
+        return self._form_index
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
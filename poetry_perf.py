@@ -0,0 +1,414 @@
+"""
+A reproducible benchmark suite for the pronunciation dictionary loader and
+the checking hot paths. The poems are synthetic corpora generated from the
+pronunciation dictionary with a fixed seed, at several sizes and for
+several poetry forms, so every run times exactly the same work. Results
+are saved as JSON, and a run can be compared with a saved one to catch
+regressions between versions:
+
+    python poetry_perf.py --output before.json
+    (change the code)
+    python poetry_perf.py --output after.json --compare before.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+
+import poetry_analysis
+import poetry_benchmark
+import poetry_functions
+import poetry_program
+import poetry_reader
+
+DICTIONARY_FILENAME = 'dictionary.txt'
+POETRY_FORMS_FILENAME = 'poetry_forms.txt'
+SUITE_VERSION = 1
+DEFAULT_SIZES = (100, 1000, 10000)
+DEFAULT_FORMS = ('Haiku', 'Limerick', 'Sonnet')
+DEFAULT_SEED = 108
+DEFAULT_REPEAT = 3
+# A benchmark is a regression if it got more than this much slower.
+DEFAULT_THRESHOLD = 0.10
+
+# The form and poem the interactive program is given by benchmark_startup.
+STARTUP_FORM = 'Limerick'
+STARTUP_POEM_FILENAME = 'limerick1.txt'
+# Every this many poems of a corpus has an extra word on one line, so that
+# the checks also report failures.
+BROKEN_EVERY = 4
+# A rhyme is only used for the last words of a rhyme group if it has at
+# least this many one-syllable words.
+MIN_RHYMES = 8
+
+"""
+A poetry pattern:  tuple of (list of int, list of str)
+  - first item is a list of the number of syllables required in each line
+  - second item is a list describing the rhyme scheme rule for each line
+"""
+
+"""
+A suite result: dict of {str: object}
+  - 'suite_version': the version of this suite (an int)
+  - 'python': the Python version (a str)
+  - 'platform': the platform (a str)
+  - 'seed', 'repeat': the settings the suite was run with (int)
+  - 'results': dict of {str: dict of {str: object}} from benchmark name
+    (such as 'check_syllables[Limerick,1000]') to its 'seconds' (the best
+    of repeat timings, a float), its 'items' (the number of calls timed,
+    an int) and its 'per_item_us' (a float)
+"""
+
+
+def word_tables(lexicon):
+    """ (poetry_lexicon.Lexicon)
+        -> tuple of (dict of {int: list of str}, list of list of str)
+
+    Return the words of lexicon made only of letters by number of syllables
+    (up to 4), and the lists of one-syllable such words that rhyme with each
+    other, for each rhyme with at least MIN_RHYMES of them. Everything is
+    sorted, so that corpora depend only on the seed.
+    """
+    words_by_syllables = {}
+    rhymes = {}
+    for word in sorted(lexicon):
+        if not word.isalpha():
+            continue
+        syllables = lexicon.syllables(word)
+        if syllables < 1 or syllables > 4:
+            continue
+        words_by_syllables.setdefault(syllables, []).append(word)
+        rhyme_key = lexicon.rhyme_key(word)
+        if syllables == 1 and rhyme_key is not None:
+            rhymes.setdefault(rhyme_key, []).append(word)
+    rhyme_lists = []
+    for rhyme_key in sorted(rhymes):
+        if len(rhymes[rhyme_key]) >= MIN_RHYMES:
+            rhyme_lists.append(rhymes[rhyme_key])
+    return words_by_syllables, rhyme_lists
+
+
+def make_line(rng, syllables, last_word, words_by_syllables):
+    """ (random.Random, int, str, dict of {int: list of str}) -> str
+
+    Return a line of words of the given number of syllables (any number
+    from 3 to 10 if syllables is 0) that ends with the one-syllable word
+    last_word.
+    """
+    if syllables == 0:
+        syllables = rng.randint(3, 10)
+    words = []
+    remaining = syllables - 1
+    while remaining > 0:
+        word_syllables = rng.randint(1, min(remaining, 4))
+        words.append(rng.choice(words_by_syllables[word_syllables]))
+        remaining -= word_syllables
+    words.append(last_word)
+    return ' '.join(words).capitalize()
+
+
+def make_poem(rng, pattern, tables, broken=False):
+    """ (random.Random, poetry pattern, tuple, bool) -> str
+
+    Return the text of a poem that satisfies pattern, made of words from
+    tables (as returned by word_tables). If broken is True, one line has an
+    extra word.
+    """
+    words_by_syllables, rhyme_lists = tables
+    last_words = {}
+    lines = []
+    for i in range(len(pattern[0])):
+        label = pattern[1][i]
+        if label == '*':
+            last_word = rng.choice(words_by_syllables[1])
+        else:
+            if label not in last_words:
+                last_words[label] = rng.choice(rhyme_lists)
+            last_word = rng.choice(last_words[label])
+        lines.append(make_line(rng, pattern[0][i], last_word,
+                               words_by_syllables))
+    if broken:
+        i = rng.randrange(len(lines))
+        lines[i] = '{} {}'.format(rng.choice(words_by_syllables[1]),
+                                  lines[i].lower()).capitalize()
+    return '\n'.join(lines) + '\n'
+
+
+def make_corpus(lexicon, pattern, size, seed=DEFAULT_SEED):
+    """ (poetry_lexicon.Lexicon, poetry pattern, int, int) -> list of str
+
+    Return the texts of size poems for pattern, generated from the words of
+    lexicon. The same arguments always give the same corpus. Every
+    BROKEN_EVERY-th poem has an extra word on one line.
+    """
+    rng = random.Random(seed)
+    tables = word_tables(lexicon)
+    corpus = []
+    for i in range(size):
+        corpus.append(make_poem(rng, pattern, tables,
+                                i % BROKEN_EVERY == BROKEN_EVERY - 1))
+    return corpus
+
+
+def _record(results, name, seconds, items):
+    """ (dict, str, float, int) -> NoneType
+
+    Add the timing of a benchmark called name to results.
+    """
+    results[name] = {'seconds': seconds, 'items': items,
+                     'per_item_us': seconds / items * 1e6}
+
+
+def benchmark_loaders(results, dictionary_filename, poetry_forms_filename,
+                      repeat):
+    """ (dict, str, str, int) -> NoneType
+
+    Add to results the times for parsing dictionary_filename with
+    read_pronunciation and poetry_forms_filename with
+    read_poetry_form_descriptions.
+    """
+    def read_pronunciation():
+        with open(dictionary_filename) as pronunciation_file:
+            poetry_reader.read_pronunciation(pronunciation_file)
+
+    _record(results, 'read_pronunciation',
+            poetry_benchmark.best_time(read_pronunciation, repeat), 1)
+
+    calls = 1000
+
+    def read_poetry_form_descriptions():
+        for i in range(calls):
+            with open(poetry_forms_filename) as poetry_forms_file:
+                poetry_reader.read_poetry_form_descriptions(poetry_forms_file)
+
+    _record(results, 'read_poetry_form_descriptions',
+            poetry_benchmark.best_time(read_poetry_form_descriptions,
+                                       repeat), calls)
+
+
+def _read_until(pipe, output, text):
+    """ (file, bytearray, bytes) -> NoneType
+
+    Read from pipe, adding to output, until output ends with text. Raise
+    EOFError if pipe is closed first.
+    """
+    while not output.endswith(text):
+        chunk = os.read(pipe.fileno(), 65536)
+        if chunk == b'':
+            raise EOFError('the program exited before writing {!r}'.format(
+                text))
+        output += chunk
+
+
+def benchmark_startup(results, repeat):
+    """ (dict, int) -> NoneType
+
+    Add to results the times, from starting the interactive program as a
+    new process, until it first prompts for a poetry form and until it has
+    printed the result of checking STARTUP_POEM_FILENAME against
+    STARTUP_FORM. The program is run from the directory it is in, with the
+    files it finds there, and writes its caches there.
+    """
+    program_filename = os.path.abspath(poetry_program.__file__)
+    directory = os.path.dirname(program_filename)
+    with open(os.path.join(directory,
+                           poetry_program.POETRY_FORMS_FILENAME)) as forms_file:
+        name_to_poetry_pattern = poetry_reader.read_poetry_form_descriptions(
+            forms_file)
+    menu, menu_dict = poetry_program.make_menu(name_to_poetry_pattern)
+    prompt = ('Enter number for poetry form to check (0 to quit):\n' +
+              menu).encode()
+    form_num = [num for num in menu_dict
+                if menu_dict[num] == STARTUP_FORM][0]
+
+    def run_program():
+        start = time.perf_counter()
+        process = subprocess.Popen([sys.executable, '-u', program_filename],
+                                   cwd=directory, stdin=subprocess.PIPE,
+                                   stdout=subprocess.PIPE)
+        with process:
+            output = bytearray()
+            _read_until(process.stdout, output, prompt)
+            first_prompt = time.perf_counter() - start
+            process.stdin.write('{}\n{}\n'.format(
+                form_num, STARTUP_POEM_FILENAME).encode())
+            process.stdin.flush()
+            output.clear()
+            _read_until(process.stdout, output, prompt)
+            first_result = time.perf_counter() - start
+            process.stdin.write(b'0\n')
+            process.stdin.close()
+            process.stdout.read()
+        return first_prompt, first_result
+
+    # The first run may build the caches the later ones load.
+    run_program()
+    times = [run_program() for i in range(repeat)]
+    _record(results, 'startup[first_prompt]',
+            min([first_prompt for first_prompt, first_result in times]), 1)
+    _record(results, 'startup[first_result]',
+            min([first_result for first_prompt, first_result in times]), 1)
+
+
+def benchmark_corpus(results, corpus, form_name, pattern, lexicon, repeat):
+    """ (dict, list of str, str, poetry pattern, poetry_lexicon.Lexicon,
+         int) -> NoneType
+
+    Add to results the times for running get_poem_lines, check_syllables,
+    check_rhyme_scheme and check_poem (with its output discarded) on every
+    poem of corpus, a corpus for the form form_name with pattern.
+    """
+    suffix = '[{},{}]'.format(form_name, len(corpus))
+    poems_lines = [poetry_functions.get_poem_lines(poem) for poem in corpus]
+    poems_lines_raw = [poem.splitlines(True) for poem in corpus]
+
+    def get_poem_lines():
+        for poem in corpus:
+            poetry_functions.get_poem_lines(poem)
+
+    def check_syllables():
+        for poem_lines in poems_lines:
+            poetry_functions.check_syllables(poem_lines, pattern, lexicon)
+
+    def check_rhyme_scheme():
+        for poem_lines in poems_lines:
+            poetry_functions.check_rhyme_scheme(poem_lines, pattern, lexicon)
+
+    def check_poem():
+        with contextlib.redirect_stdout(io.StringIO()):
+            for poem_lines_raw in poems_lines_raw:
+                analysis = poetry_analysis.analyze_poem(poem_lines_raw,
+                                                        lexicon)
+                poetry_program.check_poem_analysis(analysis, pattern,
+                                                   form_name)
+
+    for name, function in [('get_poem_lines', get_poem_lines),
+                           ('check_syllables', check_syllables),
+                           ('check_rhyme_scheme', check_rhyme_scheme),
+                           ('check_poem', check_poem)]:
+        _record(results, name + suffix,
+                poetry_benchmark.best_time(function, repeat), len(corpus))
+
+
+def run_suite(dictionary_filename=DICTIONARY_FILENAME,
+              poetry_forms_filename=POETRY_FORMS_FILENAME,
+              sizes=DEFAULT_SIZES, form_names=DEFAULT_FORMS,
+              seed=DEFAULT_SEED, repeat=DEFAULT_REPEAT, startup=False):
+    """ (str, str, list of int, list of str, int, int, bool) -> suite result
+
+    Run every benchmark and return the suite result. The corpora for each
+    form in form_names have the sizes in sizes and are generated with seed.
+    Each benchmark is timed repeat times and the best time kept. The
+    startup of the interactive program, which uses its own files and
+    caches (see benchmark_startup), is only timed if startup is True.
+    """
+    results = {}
+    benchmark_loaders(results, dictionary_filename, poetry_forms_filename,
+                      repeat)
+    if startup:
+        benchmark_startup(results, repeat)
+    lexicon = poetry_reader.load_lexicon(dictionary_filename)
+    with open(poetry_forms_filename) as poetry_forms_file:
+        name_to_poetry_pattern = poetry_reader.read_poetry_form_descriptions(
+            poetry_forms_file)
+    for form_name in form_names:
+        pattern = name_to_poetry_pattern[form_name]
+        for size in sizes:
+            corpus = make_corpus(lexicon, pattern, size, seed)
+            benchmark_corpus(results, corpus, form_name, pattern, lexicon,
+                             repeat)
+    return {'suite_version': SUITE_VERSION,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seed': seed, 'repeat': repeat, 'results': results}
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """ (suite result, suite result, float)
+                            -> list of tuple of (str, float, float, float)
+
+    Return (name, baseline time, current time, current / baseline) for each
+    benchmark in both suite results that is more than threshold (a
+    fraction) slower in current, by name.
+
+    >>> baseline = {'results': {'a': {'seconds': 1.0}, 'b': {'seconds': 1.0}}}
+    >>> current = {'results': {'a': {'seconds': 1.5}, 'b': {'seconds': 1.05}}}
+    >>> compare(baseline, current)
+    [('a', 1.0, 1.5, 1.5)]
+    """
+    regressions = []
+    for name in sorted(current['results']):
+        if name not in baseline['results']:
+            continue
+        old = baseline['results'][name]['seconds']
+        new = current['results'][name]['seconds']
+        if new > old * (1 + threshold):
+            regressions.append((name, old, new, new / old))
+    return regressions
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        description='Run the benchmark suite and save its results as JSON.')
+    parser.add_argument('--dictionary', default=DICTIONARY_FILENAME)
+    parser.add_argument('--forms', default=POETRY_FORMS_FILENAME)
+    parser.add_argument('--size', type=int, action='append', dest='sizes',
+                        help='corpus size (repeatable; default: {})'.format(
+                            ' '.join(map(str, DEFAULT_SIZES))))
+    parser.add_argument('--form', action='append', dest='form_names',
+                        help='poetry form to generate corpora for '
+                        '(repeatable; default: {})'.format(
+                            ', '.join(DEFAULT_FORMS)))
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT)
+    parser.add_argument('--output', default=None,
+                        help='write the results to this JSON file')
+    parser.add_argument('--compare', default=None,
+                        help='JSON file of an earlier run to compare with; '
+                        'exit with status 1 on any regression')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='slowdown that counts as a regression '
+                        '(default: %(default)s)')
+    parser.add_argument('--startup', action='store_true',
+                        help="also time the interactive program's first "
+                        'prompt and first result; it reads (and caches) '
+                        'its own dictionary and forms files, not --dictionary '
+                        'and --forms')
+    options = parser.parse_args(args)
+
+    suite = run_suite(options.dictionary, options.forms,
+                      options.sizes or DEFAULT_SIZES,
+                      options.form_names or DEFAULT_FORMS, options.seed,
+                      options.repeat, options.startup)
+    for name in suite['results']:
+        print('{:>48}: {:12.2f} us'.format(
+            name, suite['results'][name]['per_item_us']))
+    if options.output is not None:
+        with open(options.output, 'w') as output_file:
+            json.dump(suite, output_file, indent=2, sort_keys=True)
+
+    if options.compare is not None:
+        with open(options.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+        if baseline.get('seed') != suite['seed']:
+            print('warning: the runs used different seeds', file=sys.stderr)
+        regressions = compare(baseline, suite, options.threshold)
+        print('== Regressions against {} =='.format(options.compare))
+        for name, old, new, ratio in regressions:
+            print('{:>48}: {:10.3f} s -> {:10.3f} s ({:.2f}x)'.format(
+                name, old, new, ratio))
+        if len(regressions) > 0:
+            return 1
+        print('none')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
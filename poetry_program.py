@@ -1,5 +1,9 @@
-import poetry_functions
+import poetry_analysis
+import poetry_instrument
+import poetry_patterns
 import poetry_reader
+import argparse
+import concurrent.futures
 import os.path
 
 DICTIONARY_FILENAME = 'dictionary.txt'
@@ -72,14 +76,36 @@ def check_poem(poem_lines_raw, poem_lines_cleaned,
     If it does, then check whether the lines in poem_lines_cleaned have the
     right number of syllables and report the lines that don't; also check 
     whether the lines in poem_lines_cleaned have the correct rhyming scheme
-    and report the lines that should rhyme but don't.
+    and report the lines that should rhyme but don't. This prints what
+    check_poem_analysis does for the analysis of poem_lines_raw.
+    poem_lines_cleaned is ignored, and kept only so that existing callers
+    still work: the analysis gets the same lines from poem_lines_raw.
     """
 
-    if poetry_functions.count_lines(poem_lines_raw) != len(pattern[0]):
+    analysis = poetry_analysis.analyze_poem(poem_lines_raw, word_to_phonemes)
+    check_poem_analysis(analysis, pattern, form_name)
+
+
+def check_poem_analysis(analysis, pattern, form_name):
+    """ (poetry_analysis.PoemAnalysis, poetry pattern, str) -> NoneType
+
+    Check whether the poem described by analysis has the right number of 
+    lines to match for form given in pattern, and print a message if it 
+    doesn't. If it does, then check whether its lines have the right number 
+    of syllables and report the lines that don't; also check whether its 
+    lines have the correct rhyming scheme and report the lines that should 
+    rhyme but don't, and the lines that are not in its meter if it has one.
+    Words that are not in the pronunciation dictionary are reported instead
+    of checking syllables and rhymes.
+    """
+
+    if not analysis.has_line_count(pattern):
         print("\n== The poem doesn't have the right number of lines. == \n")
+    elif len(analysis.unknown_words) > 0:
+        print('\n== These words are not in the pronunciation dictionary: '
+              '== \n' + '\n'.join(analysis.unknown_words) + '\n')
     else:
-        problem_lines = poetry_functions.check_syllables(
-            poem_lines_cleaned, pattern, word_to_phonemes)
+        problem_lines = analysis.check_syllables(pattern)
 
         if len(problem_lines) == 0:
             print('\nThe poem has the right number of syllables on each line.\n')
@@ -88,8 +114,7 @@ def check_poem(poem_lines_raw, poem_lines_cleaned,
                   'right number of syllables: == '.format(form_name))
             print('\n'.join(problem_lines) + '\n')
 
-        problem_rhymes = poetry_functions.check_rhyme_scheme(
-            poem_lines_cleaned, pattern, word_to_phonemes)
+        problem_rhymes = analysis.check_rhyme_scheme(pattern)
 
         if len(problem_rhymes) == 0:
             print('The poem follows the rhyme scheme.\n')
@@ -99,17 +124,64 @@ def check_poem(poem_lines_raw, poem_lines_cleaned,
             for lines in problem_rhymes:
                 print('\n'.join(lines) + '\n')
 
+        meter = poetry_patterns.compile_form(pattern).meter
+        if meter is not None:
+            problem_lines = analysis.check_meter(pattern)
+            if len(problem_lines) == 0:
+                print('The poem is in {}.\n'.format(meter))
+            else:
+                print('\n== The poem is not a {}. These lines are not in {}:'
+                      ' =='.format(form_name, meter))
+                print('\n'.join(problem_lines) + '\n')
+
 
-def main():
-    word_to_phonemes = poetry_reader.read_pronunciation(
-        open(DICTIONARY_FILENAME))
-    name_to_poetry_pattern = poetry_reader.read_poetry_form_descriptions(
-        open(POETRY_FORMS_FILENAME))
+def load_in_background(function, *args):
+    """ (function, object) -> concurrent.futures.Future
+
+    Return the future result of function(*args), which is called in a
+    background thread.
+    """
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+    future = executor.submit(function, *args)
+    # The thread finishes the call and then exits on its own.
+    executor.shutdown(wait=False)
+    return future
+
+
+def check_poems():
+    def load_lexicon():
+        lexicon = poetry_reader.load_lexicon(DICTIONARY_FILENAME)
+        # Marked before the future is done, so that waiting for it means the
+        # mark is there.
+        poetry_instrument.mark('dictionary_loaded')
+        return lexicon
+
+    # The menu only needs the small poetry forms file, so the pronunciation
+    # data is loaded in the background while the user chooses; checking a
+    # poem waits for it only if it isn't loaded yet.
+    pronunciation = load_in_background(load_lexicon)
+    try:
+        run_menu(pronunciation)
+    finally:
+        # The interpreter waits for the load before it exits anyway;
+        # waiting here lets an instrumentation report include it.
+        concurrent.futures.wait([pronunciation])
+
+
+def run_menu(pronunciation):
+    """ (concurrent.futures.Future) -> NoneType
+
+    Ask for poetry forms and poems and check them until the user quits.
+    pronunciation is the future pronunciation dictionary; it is waited for
+    when the first poem is checked.
+    """
+    name_to_poetry_pattern = poetry_reader.load_forms(POETRY_FORMS_FILENAME)
 
     menu, menu_dict = make_menu(name_to_poetry_pattern)
     print('=================================================')
     prompt = \
     'Enter number for poetry form to check (0 to quit):\n{}'.format(menu)
+    poetry_instrument.mark('first_prompt')
     form_num = input(prompt)
 
     while form_num != '' and form_num != '0':
@@ -118,12 +190,13 @@ def main():
             poetry_pattern = name_to_poetry_pattern[form_name]
 
             poem_filename = get_valid_filename("Enter a poem filename: ")
-            poem_file = open(poem_filename)
-            poem_lines_raw = poem_file.readlines()
-            poem_lines_cleaned = poetry_functions.get_poem_lines(''.join(poem_lines_raw))
+            with open(poem_filename) as poem_file:
+                poem_lines_raw = poem_file.readlines()
+            analysis = poetry_analysis.analyze_poem(poem_lines_raw, 
+                                                    pronunciation.result())
 
-            check_poem(poem_lines_raw, poem_lines_cleaned,
-             poetry_pattern, word_to_phonemes, form_name)
+            check_poem_analysis(analysis, poetry_pattern, form_name)
+            poetry_instrument.mark('first_result')
 
             print('=================================================')
             form_num = input(prompt)
@@ -131,5 +204,28 @@ def main():
             form_num = input('Invalid number. ' + prompt)
 
 
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        description='Check poems against poetry forms interactively.')
+    parser.add_argument('--report', default=None,
+                        help='time each stage and write an instrumentation '
+                        'report to this JSON file on exit')
+    parser.add_argument('--profile', default=None,
+                        help='also write cProfile statistics to this file '
+                        '(of the main thread only, not of the dictionary '
+                        'load)')
+    options = parser.parse_args(args)
+
+    if options.report is None and options.profile is None:
+        check_poems()
+        return
+    poetry_instrument.enable(profile=options.profile is not None)
+    try:
+        check_poems()
+    finally:
+        poetry_instrument.write_report(options.report, options.profile)
+        poetry_instrument.disable()
+
+
 if __name__ == '__main__':
     main()
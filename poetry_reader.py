@@ -4,6 +4,25 @@ A pronunciation dictionary: dict of {str: list of str}
   - each value is a list of phonemes for that word (a list of str)
 """
 
+import gc
+import hashlib
+import itertools
+import os
+import pickle
+import struct
+import sys
+import zlib
+
+import poetry_fuzzy
+import poetry_lexicon
+import poetry_meter
+import poetry_patterns
+import poetry_rhymes
+import poetry_stores
+
+# The first word of a line of a poetry forms file that declares a meter.
+METER_KEYWORD = 'meter'
+
 
 def read_pronunciation(pronunciation_file):
     """ (file open for reading) -> pronunciation dictionary
@@ -33,7 +52,8 @@ def read_poetry_form_description(poetry_forms_file):
 
     Precondition: we have just read a poetry form name from poetry_forms_file.
 
-    Return the next poetry pattern from poetry_forms_file.
+    Return the next poetry pattern from poetry_forms_file. A meter line
+    (see read_form_registry) is skipped.
     """
     reading = poetry_forms_file.readline()
  
@@ -48,7 +68,9 @@ def read_poetry_form_description(poetry_forms_file):
 
     while reading != '\n':
 
-        if reading != '':
+        if reading.startswith(METER_KEYWORD + ' '):
+            reading = poetry_forms_file.readline()
+        elif reading != '':
             space = reading.find(' ')         
             syllables = int(reading[:space])
             rhyme = reading[space + 1:].rstrip()
@@ -78,4 +100,396 @@ def read_poetry_form_descriptions(poetry_forms_file):
         poetry_forms = read_poetry_form_description(poetry_forms_file)
         dictionary_of_poetry[poetry_name] = (poetry_forms)
         reading = poetry_forms_file.readline()
-    return dictionary_of_poetry       
\ No newline at end of file
+    return dictionary_of_poetry       
+
+
+def read_form_registry(poetry_forms_file):
+    """ (file open for reading) -> poetry_patterns.FormRegistry
+
+    Return the registry of the poetry forms in poetry_forms_file, which is
+    in the format read_poetry_form_descriptions reads, except that forms
+    may be separated by more than one blank line. A form may also declare
+    the meter of its lines (see poetry_meter) on a line of its own, such as
+    'meter iambic pentameter'.
+
+    Every line is checked first. Raise ValueError, naming every problem
+    with its line number, if a pattern line is not a number of syllables
+    and a rhyme label, a rhyme label is not '*' or made of letters and
+    digits, a meter is not a meter or is declared twice, a form has no
+    pattern lines or a form name is repeated.
+    """
+    errors = []
+    name_to_poetry_pattern = {}
+    name_lines = {}
+    name = None
+    # A blank line after the last line ends the last form.
+    lines = itertools.chain(poetry_forms_file, ['\n'])
+    for line_number, reading in enumerate(lines, 1):
+        reading = reading.rstrip()
+        if reading == '':
+            if name is None:
+                continue
+            if pattern_lines == 0:
+                errors.append('line {}: poetry form {} has no lines'.format(
+                    name_line, name))
+            elif name in name_to_poetry_pattern:
+                errors.append('line {}: poetry form {} is already defined '
+                              'on line {}'.format(name_line, name,
+                                                  name_lines[name]))
+            else:
+                name_to_poetry_pattern[name] = poetry_patterns.compile_form(
+                    (syllables_per_line, rhymes_per_line), meter)
+                name_lines[name] = name_line
+            name = None
+        elif name is None:
+            name = reading
+            name_line = line_number
+            syllables_per_line = []
+            rhymes_per_line = []
+            meter = None
+            pattern_lines = 0
+        elif reading.startswith(METER_KEYWORD + ' '):
+            if meter is not None:
+                errors.append('line {}: poetry form {} already has a '
+                              'meter'.format(line_number, name))
+                continue
+            meter = reading[len(METER_KEYWORD):].strip()
+            try:
+                poetry_meter.parse_meter(meter)
+            except ValueError as error:
+                errors.append('line {}: invalid meter {!r}: {}'.format(
+                    line_number, meter, error))
+                meter = None
+        else:
+            pattern_lines += 1
+            parts = reading.split()
+            if len(parts) != 2 or not parts[0].isdecimal():
+                errors.append("line {}: expected '<syllables> <rhyme label>'"
+                              ', not {!r}'.format(line_number, reading))
+            elif parts[1] != '*' and not parts[1].isalnum():
+                errors.append('line {}: invalid rhyme label {!r}'.format(
+                    line_number, parts[1]))
+            else:
+                syllables_per_line.append(int(parts[0]))
+                rhymes_per_line.append(parts[1])
+    if len(errors) > 0:
+        raise ValueError('\n'.join(errors))
+    return poetry_patterns.FormRegistry(name_to_poetry_pattern)
+
+
+# ===================== Compiled Caches =====================
+
+CACHE_MAGIC = b'PTRC'
+CACHE_VERSION = 5
+CACHE_SUFFIX = '.cache'
+
+# The classes whose instances are pickled into caches. Each has a
+# LAYOUT_VERSION that is bumped whenever what it pickles changes.
+CACHED_CLASSES = [poetry_lexicon.Lexicon, poetry_stores.CompactPronunciation,
+                  poetry_fuzzy.FuzzyIndex, poetry_rhymes.RhymeIndex,
+                  poetry_patterns.CompiledForm, poetry_patterns.FormRegistry]
+
+# Magic, format (see cache_format), source size, source mtime (ns), source
+# SHA-1.
+_CACHE_HEADER = struct.Struct('<4sIQQ20s')
+
+
+def cache_format():
+    """ () -> int
+
+    Return the format written in the header of every cache: a CRC-32 of
+    CACHE_VERSION and of the name and LAYOUT_VERSION of each class in
+    CACHED_CLASSES. Bumping any of them makes every existing cache stale.
+    """
+    layouts = [CACHE_VERSION]
+    for cached_class in CACHED_CLASSES:
+        layouts.append((cached_class.__module__, cached_class.__qualname__,
+                        cached_class.LAYOUT_VERSION))
+    return zlib.crc32(repr(layouts).encode())
+
+
+def file_fingerprint(filename):
+    """ (str) -> tuple of (int, int, bytes)
+
+    Return the size, modification time (in nanoseconds) and SHA-1 digest of
+    the file called filename.
+    """
+    stat = os.stat(filename)
+    with open(filename, 'rb') as source_file:
+        digest = hashlib.sha1(source_file.read()).digest()
+    return stat.st_size, stat.st_mtime_ns, digest
+
+
+def _cache_is_fresh(header, source_filename, cache_filename):
+    """ (tuple, str, str) -> bool
+
+    Return True iff the unpacked header of cache_filename describes the
+    current contents of source_filename. The size and mtime are compared
+    first; the hash is only computed when they disagree (e.g. after a fresh
+    checkout), and if it matches, the header is updated to the new mtime so
+    that later loads don't hash the source again.
+    """
+    magic, version, size, mtime_ns, digest = header
+    if magic != CACHE_MAGIC or version != cache_format():
+        return False
+    stat = os.stat(source_filename)
+    if stat.st_size != size:
+        return False
+    if stat.st_mtime_ns == mtime_ns:
+        return True
+    if file_fingerprint(source_filename)[2] != digest:
+        return False
+    try:
+        with open(cache_filename, 'r+b') as cache_file:
+            cache_file.write(_CACHE_HEADER.pack(magic, version, size,
+                                                stat.st_mtime_ns, digest))
+    except OSError:
+        # The cache is still fresh; it just can't be updated (e.g. a
+        # read-only directory).
+        pass
+    return True
+
+
+def read_cache(cache_filename, source_filename):
+    """ (str, str) -> object or NoneType
+
+    Return the object stored in cache_filename if it was compiled from the
+    current contents of source_filename, or None if the cache is missing,
+    stale or can't be unpickled (e.g. it was written by a version whose
+    classes have since changed). The cache is read with a single bulk read.
+    """
+    try:
+        with open(cache_filename, 'rb') as cache_file:
+            data = cache_file.read()
+        if len(data) < _CACHE_HEADER.size:
+            return None
+        if not _cache_is_fresh(_CACHE_HEADER.unpack_from(data),
+                               source_filename, cache_filename):
+            return None
+        # The payload is one large acyclic structure, so the cyclic garbage
+        # collector only slows the load down.
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            return pickle.loads(memoryview(data)[_CACHE_HEADER.size:])
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+    except (OSError, pickle.UnpicklingError, EOFError, ValueError,
+            AttributeError, ImportError, IndexError, TypeError):
+        return None
+
+
+def write_cache(cache_filename, source_filename, payload):
+    """ (str, str, object) -> bool
+
+    Write payload to cache_filename, keyed by the fingerprint of
+    source_filename. The file is replaced atomically. Return False if the
+    cache could not be written (e.g. a read-only directory).
+    """
+    size, mtime_ns, digest = file_fingerprint(source_filename)
+    header = _CACHE_HEADER.pack(CACHE_MAGIC, cache_format(), size, mtime_ns,
+                                digest)
+    temp_filename = '{}.{}.tmp'.format(cache_filename, os.getpid())
+    try:
+        with open(temp_filename, 'wb') as cache_file:
+            cache_file.write(header)
+            pickle.dump(payload, cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_filename, cache_filename)
+    except OSError:
+        if os.path.exists(temp_filename):
+            os.remove(temp_filename)
+        return False
+    return True
+
+
+def load_cached(source_filename, build, cache_filename=None):
+    """ (str, function, str) -> object
+
+    Return the object that build compiles from source_filename, using the
+    cache in cache_filename when it is fresh and rebuilding (and rewriting)
+    it otherwise. build is called with the source file open for reading.
+    cache_filename defaults to source_filename + CACHE_SUFFIX.
+    """
+    if cache_filename is None:
+        cache_filename = source_filename + CACHE_SUFFIX
+    payload = read_cache(cache_filename, source_filename)
+    if payload is None:
+        with open(source_filename) as source_file:
+            payload = build(source_file)
+        write_cache(cache_filename, source_filename, payload)
+    return payload
+
+
+def _read_interned_pronunciation(pronunciation_file):
+    """ (file open for reading) -> pronunciation dictionary
+
+    Return read_pronunciation(pronunciation_file) with every phoneme
+    interned, so that the pickled cache stores each phoneme only once.
+    """
+    pronunciation_dict = read_pronunciation(pronunciation_file)
+    for word in pronunciation_dict:
+        pronunciation_dict[word] = [sys.intern(phoneme) for phoneme 
+                                    in pronunciation_dict[word]]
+    return pronunciation_dict
+
+
+def load_pronunciation(dictionary_filename, cache_filename=None):
+    """ (str, str) -> pronunciation dictionary
+
+    Return the pronunciation dictionary for the CMU Pronouncing Dictionary
+    file dictionary_filename, loading it from its compiled cache when
+    possible. The cache is rebuilt automatically when the source changes.
+    """
+    return load_cached(dictionary_filename, _read_interned_pronunciation,
+                       cache_filename)
+
+
+def _read_lexicon(pronunciation_file):
+    """ (file open for reading) -> poetry_lexicon.Lexicon
+
+    Return the Lexicon for the pronunciations in pronunciation_file.
+    """
+    return poetry_lexicon.Lexicon(
+        _read_interned_pronunciation(pronunciation_file))
+
+
+def load_lexicon(dictionary_filename, cache_filename=None):
+    """ (str, str) -> poetry_lexicon.Lexicon
+
+    Return the Lexicon (pronunciations plus precomputed syllable counts and
+    rhyme tails) for dictionary_filename, loading it from its compiled cache
+    when possible. cache_filename defaults to dictionary_filename +
+    '.lexicon' + CACHE_SUFFIX.
+    """
+    if cache_filename is None:
+        cache_filename = dictionary_filename + '.lexicon' + CACHE_SUFFIX
+    return load_cached(dictionary_filename, _read_lexicon, cache_filename)
+
+
+def _read_compact_pronunciation(pronunciation_file):
+    """ (file open for reading) -> poetry_stores.CompactPronunciation
+
+    Return the compact store for the pronunciations in pronunciation_file.
+    """
+    return poetry_stores.CompactPronunciation(
+        read_pronunciation(pronunciation_file))
+
+
+def load_compact_pronunciation(dictionary_filename, cache_filename=None):
+    """ (str, str) -> poetry_stores.CompactPronunciation
+
+    Return a memory-compact, read-only pronunciation dictionary for
+    dictionary_filename, loading it from its compiled cache when possible.
+    cache_filename defaults to dictionary_filename + '.compact' +
+    CACHE_SUFFIX.
+    """
+    if cache_filename is None:
+        cache_filename = dictionary_filename + '.compact' + CACHE_SUFFIX
+    return load_cached(dictionary_filename, _read_compact_pronunciation,
+                       cache_filename)
+
+
+def _read_rhyme_index(pronunciation_file):
+    """ (file open for reading) -> poetry_rhymes.RhymeIndex
+
+    Return the rhyme index for the pronunciations in pronunciation_file.
+    """
+    return poetry_rhymes.RhymeIndex(read_pronunciation(pronunciation_file))
+
+
+def load_rhyme_index(dictionary_filename, cache_filename=None):
+    """ (str, str) -> poetry_rhymes.RhymeIndex
+
+    Return the rhyme index for dictionary_filename, loading it from its
+    compiled cache when possible. cache_filename defaults to
+    dictionary_filename + '.rhymes' + CACHE_SUFFIX.
+    """
+    if cache_filename is None:
+        cache_filename = dictionary_filename + '.rhymes' + CACHE_SUFFIX
+    return load_cached(dictionary_filename, _read_rhyme_index, cache_filename)
+
+
+def _read_fuzzy_index(pronunciation_file):
+    """ (file open for reading) -> poetry_fuzzy.FuzzyIndex
+
+    Return the fuzzy index of the words in pronunciation_file.
+    """
+    return poetry_fuzzy.FuzzyIndex(read_pronunciation(pronunciation_file))
+
+
+def load_fuzzy_index(dictionary_filename, cache_filename=None):
+    """ (str, str) -> poetry_fuzzy.FuzzyIndex
+
+    Return the fuzzy index of the words in dictionary_filename, loading it
+    from its compiled cache when possible. Building it takes a few seconds,
+    loading it a fraction of one. cache_filename defaults to
+    dictionary_filename + '.fuzzy' + CACHE_SUFFIX.
+    """
+    if cache_filename is None:
+        cache_filename = dictionary_filename + '.fuzzy' + CACHE_SUFFIX
+    return load_cached(dictionary_filename, _read_fuzzy_index, cache_filename)
+
+
+def load_forms(poetry_forms_filename, cache_filename=None):
+    """ (str, str) -> poetry_patterns.FormRegistry
+
+    Return the registry of the poetry forms in poetry_forms_filename (see
+    read_form_registry), loading it from its compiled cache when possible.
+    Raise ValueError if the file is invalid.
+    """
+    return load_cached(poetry_forms_filename, read_form_registry,
+                       cache_filename)
+
+
+# ===================== Streaming Poems =====================
+
+def iter_poems(poems_file, delimiter=None):
+    """ (file open for reading, str)
+                                -> generator of tuple of (int, list of str)
+
+    Read poems_file incrementally and yield (line_number, poem_lines_raw)
+    for each poem in it, where line_number is the 1-based number of the
+    poem's first line and poem_lines_raw are its lines as read (ready for
+    poetry_analysis.analyze_poem). Only one poem is held in memory at once.
+
+    If delimiter is None, poems are separated by one or more blank lines.
+    Otherwise they are separated by lines that consist of delimiter alone,
+    and blank lines inside a poem (between stanzas) are kept.
+
+    >>> import io
+    >>> list(iter_poems(io.StringIO('One\\nTwo\\n\\n\\nThree\\n')))
+    [(1, ['One\\n', 'Two\\n']), (5, ['Three\\n'])]
+    >>> list(iter_poems(io.StringIO('One\\n\\nTwo\\n%\\nThree\\n'), '%'))
+    [(1, ['One\\n', '\\n', 'Two\\n']), (5, ['Three\\n'])]
+    """
+    poem_lines_raw = []
+    first_line_number = 0
+    line_number = 0
+    for line in poems_file:
+        line_number += 1
+        if delimiter is None:
+            is_separator = line.strip() == ''
+        else:
+            is_separator = line.strip() == delimiter
+        if is_separator:
+            if _has_text(poem_lines_raw):
+                yield first_line_number, poem_lines_raw
+            poem_lines_raw = []
+        else:
+            if len(poem_lines_raw) == 0:
+                first_line_number = line_number
+            poem_lines_raw.append(line)
+    if _has_text(poem_lines_raw):
+        yield first_line_number, poem_lines_raw
+
+
+def _has_text(poem_lines_raw):
+    """ (list of str) -> bool
+
+    Return True iff some line in poem_lines_raw is not blank.
+    """
+    for line in poem_lines_raw:
+        if line.strip() != '':
+            return True
+    return False
@@ -0,0 +1,245 @@
+import bisect
+import itertools
+
+import poetry_analysis
+import poetry_functions
+import poetry_lexicon
+
+"""
+A pronunciation dictionary: dict of {str: list of str}
+  - each key is a word (a str)
+  - each value is a list of phonemes for that word (a list of str)
+
+A poetry pattern:  tuple of (list of int, list of str)
+  - first item is a list of the number of syllables required in each line
+  - second item is a list describing the rhyme scheme rule for each line
+"""
+
+"""
+A rhyme tail: tuple of str
+  - the phonemes of a word from its last phoneme with a stress digit
+    onward (see poetry_lexicon.rhyme_tail)
+"""
+
+
+class RhymeIndex:
+    """ An inverted index from rhyme tail to the words with that tail,
+    bucketed by number of syllables.
+
+    >>> index = RhymeIndex({'GAP': ['G', 'AE1', 'P'],
+    ...                     'CAP': ['K', 'AE1', 'P'],
+    ...                     'MISHAP': ['M', 'IH1', 'S', 'HH', 'AE2', 'P'],
+    ...                     'POEM': ['P', 'OW1', 'AH0', 'M']})
+    >>> index.rhymes_with('GAP')
+    ('CAP',)
+    >>> index.rhymes_with('CAP', syllables=1)
+    ('GAP',)
+    >>> index.rhymes_with('POEM')
+    ()
+    """
+
+    # Bumped whenever the pickled buckets change (see poetry_reader).
+    LAYOUT_VERSION = 1
+
+    def __init__(self, word_to_phonemes):
+        """ (RhymeIndex, pronunciation dictionary) -> NoneType
+
+        Index every word in word_to_phonemes by its rhyme tail and number
+        of syllables, and by number of syllables alone. Each bucket of
+        words is a sorted tuple.
+        """
+        self._tail_ids = {}
+        # For each tail id: the tail, then the words with that tail, then
+        # those words by number of syllables.
+        self._tails = []
+        self._words = []
+        self._words_by_syllables = []
+        self._tail_of = {}
+        self._words_with_syllables = {}
+
+        for word in sorted(word_to_phonemes):
+            phonemes = word_to_phonemes[word]
+            syllables = poetry_lexicon.count_syllables(phonemes)
+            if syllables not in self._words_with_syllables:
+                self._words_with_syllables[syllables] = [word]
+            else:
+                self._words_with_syllables[syllables].append(word)
+            tail = poetry_lexicon.rhyme_tail(phonemes)
+            if tail is None:
+                continue
+            if tail not in self._tail_ids:
+                self._tail_ids[tail] = len(self._tails)
+                self._tails.append(tail)
+                self._words.append([])
+                self._words_by_syllables.append({})
+            tail_id = self._tail_ids[tail]
+            self._tail_of[word] = tail_id
+            self._words[tail_id].append(word)
+            if syllables not in self._words_by_syllables[tail_id]:
+                self._words_by_syllables[tail_id][syllables] = [word]
+            else:
+                self._words_by_syllables[tail_id][syllables].append(word)
+
+        # The buckets never change again, so they can be handed out as is.
+        self._words = [tuple(words) for words in self._words]
+        self._words_by_syllables = [
+            {count: tuple(words) for count, words in by_syllables.items()}
+            for by_syllables in self._words_by_syllables]
+        self._words_with_syllables = {
+            count: tuple(words)
+            for count, words in self._words_with_syllables.items()}
+
+    def __contains__(self, word):
+        return word in self._tail_of
+
+    def rhyme_tail(self, word):
+        """ (RhymeIndex, str) -> rhyme tail or NoneType
+
+        Return the rhyme tail of word, or None if word is not indexed
+        (it is unknown or has no phoneme with a stress digit).
+        """
+        if word not in self._tail_of:
+            return None
+        return self._tails[self._tail_of[word]]
+
+    def words_for(self, tail, syllables=None):
+        """ (RhymeIndex, rhyme tail, int) -> tuple of str
+
+        Return the sorted words whose rhyme tail is tail, limited to words
+        with the given number of syllables if syllables is not None. If tail
+        is None, return every word with the given number of syllables. The
+        tuple is the index's own bucket.
+        """
+        if tail is None:
+            return self._words_with_syllables.get(syllables, ())
+        if tail not in self._tail_ids:
+            return ()
+        tail_id = self._tail_ids[tail]
+        if syllables is None:
+            return self._words[tail_id]
+        return self._words_by_syllables[tail_id].get(syllables, ())
+
+    def rhymes_with(self, word, syllables=None):
+        """ (RhymeIndex, str, int) -> tuple of str
+
+        Return the sorted words, other than word itself, that rhyme with
+        word, limited to words with the given number of syllables if
+        syllables is not None. Return the empty tuple if word is unknown or
+        has no rhyme tail.
+        """
+        if word not in self._tail_of:
+            return ()
+        tail_id = self._tail_of[word]
+        if syllables is None:
+            words = self._words[tail_id]
+        else:
+            words = self._words_by_syllables[tail_id].get(syllables, ())
+        # The bucket is sorted, so word is found by bisection and cut out
+        # with two slices rather than a comparison per rhyme.
+        at = bisect.bisect_left(words, word)
+        if at < len(words) and words[at] == word:
+            return words[:at] + words[at + 1:]
+        return words
+
+
+def _group_tail(rhyme_tails, group):
+    """ (list of rhyme tail, list of int) -> rhyme tail or NoneType
+
+    Return the rhyme tail shared by the most lines at the positions in group
+    (the earliest such tail on a tie), or None if none of those lines has a
+    rhyme tail.
+    """
+    counts = {}
+    target = None
+    for position in group:
+        tail = rhyme_tails[position]
+        if tail is None:
+            continue
+        counts[tail] = counts.get(tail, 0) + 1
+        if target is None or counts[tail] > counts[target]:
+            target = tail
+    return target
+
+
+def suggest_fixes(poem_lines, pattern, lexicon, k=5, rhyme_index=None):
+    """ (list of str, poetry pattern, pronunciation dictionary, int,
+         RhymeIndex) -> list of tuple of (str, list of str)
+
+    Precondition: len(poem_lines) == len(pattern[0])
+
+    Return (line, candidates) for each line of the poem in poem_lines (as
+    returned by get_poem_lines) that has the wrong number of syllables or
+    does not rhyme with the rest of its rhyme group, in poem order.
+    candidates are up to k words, in alphabetical order, that could replace
+    the line's last word so that the line has the number of syllables
+    pattern requires and rhymes with the rest of its rhyme group (has the
+    rhyme tail most of the group's lines share, the earliest on a tie). A
+    line whose last word would need fewer than one syllable gets no
+    candidates.
+
+    Candidates are read straight from the (rhyme tail, syllables) buckets of
+    rhyme_index, so each line costs O(k) whatever the size of lexicon. Pass
+    rhyme_index (e.g. from poetry_reader.load_rhyme_index) to avoid building
+    it from lexicon on every call. Raise KeyError if a word of the poem is
+    not in lexicon, and ValueError if the poem doesn't have as many lines
+    as pattern.
+
+    >>> lexicon = {'GAP': ['G', 'AE1', 'P'], 'CAP': ['K', 'AE1', 'P'],
+    ...            'MISHAP': ['M', 'IH1', 'S', 'HH', 'AE2', 'P'],
+    ...            'NAP': ['N', 'AE1', 'P'], 'OFF': ['AO1', 'F'],
+    ...            'ENWRAP': ['EH0', 'N', 'R', 'AE1', 'P'], 'A': ['AH0']}
+    >>> suggest_fixes(['A gap', 'A nap', 'A off'],
+    ...               ([2, 2, 2], ['A', 'A', 'A']), lexicon, k=2)
+    [('A off', ['CAP', 'GAP'])]
+    >>> suggest_fixes(['A gap'], ([3], ['*']), lexicon)
+    [('A gap', ['ENWRAP'])]
+    """
+    if rhyme_index is None:
+        rhyme_index = RhymeIndex(lexicon)
+    analysis = poetry_analysis.analyze_poem(poem_lines, lexicon)
+    if len(analysis.lines) != len(pattern[0]):
+        raise ValueError('the poem has {} lines, not the {} of the '
+                         'pattern'.format(len(analysis.lines),
+                                          len(pattern[0])))
+    if len(analysis.unknown_words) > 0:
+        raise KeyError(analysis.unknown_words[0])
+    syllables_of = poetry_lexicon.syllable_lookup(lexicon)
+
+    rhyme_tails = []
+    for line_words in analysis.words:
+        rhyme_tails.append(rhyme_index.rhyme_tail(line_words[-1]))
+    rhyme_pattern = poetry_functions.pattern_dict(pattern)
+
+    suggestions = []
+    for i in range(len(analysis.lines)):
+        last_word = analysis.words[i][-1]
+        label = pattern[1][i]
+        tail = rhyme_tails[i]
+        if label != '*':
+            target = _group_tail(rhyme_tails, rhyme_pattern[label])
+            if target is not None:
+                tail = target
+        # The same tests as check_syllables and check_rhyme_scheme.
+        syllables_wrong = (pattern[0][i] != 0 and
+                           analysis.syllables[i] != pattern[0][i])
+        rhyme_wrong = rhyme_tails[i] is not None and tail != rhyme_tails[i]
+        if not syllables_wrong and not rhyme_wrong:
+            continue
+
+        needed = None
+        if pattern[0][i] != 0:
+            needed = pattern[0][i] - (analysis.syllables[i] -
+                                      syllables_of(last_word))
+        if needed is not None and needed < 1:
+            candidates = []
+        else:
+            words = rhyme_index.words_for(tail, needed)
+            candidates = list(itertools.islice(
+                (word for word in words if word != last_word), k))
+        suggestions.append((analysis.lines[i], candidates))
+    return suggestions
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,383 @@
+import argparse
+import asyncio
+import concurrent.futures
+import json
+import os
+import signal
+import sys
+import urllib.parse
+
+import poetry_batch
+import poetry_detect
+import poetry_patterns
+import poetry_reader
+
+DICTIONARY_FILENAME = 'dictionary.txt'
+POETRY_FORMS_FILENAME = 'poetry_forms.txt'
+HOST = '127.0.0.1'
+PORT = 8008
+# The largest request body accepted, in bytes.
+MAX_BODY_SIZE = 1 << 20
+
+"""
+Endpoints (all bodies are JSON):
+  GET  /forms   -> {"forms": [form name, ...]}
+  POST /check   {"poem": str, "form": str, "estimate": bool}
+                -> poem result (see poetry_batch), named "poem"
+  POST /detect  {"poem": str}
+                -> {"forms": [form name, ...],
+                    "failures": {form name: {"syllables": [...],
+                                             "rhymes": [...],
+                                             "meter": [...]}}}
+                (with "meter" only for forms that declare a meter)
+  POST /batch   {"poems": [{"name": str, "poem": str}, ...],
+                 "forms": [form name, ...], "estimate": bool}
+                -> {"results": [poem result, ...]}
+"""
+
+_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found',
+            405: 'Method Not Allowed', 413: 'Payload Too Large',
+            422: 'Unprocessable Entity', 500: 'Internal Server Error',
+            501: 'Not Implemented'}
+
+# Set in each worker process by _init_worker.
+_word_to_phonemes = None
+_name_to_poetry_pattern = None
+_form_index = None
+
+
+class RequestError(Exception):
+    """ A request that can't be answered, with the HTTP status to answer
+    it with.
+    """
+
+    def __init__(self, status, message):
+        Exception.__init__(self, message)
+        self.status = status
+
+
+def _init_worker(dictionary_filename, poetry_forms_filename):
+    """ (str, str) -> NoneType
+
+    Load the pronunciation data and poetry forms once for this worker
+    process.
+    """
+    global _word_to_phonemes, _name_to_poetry_pattern, _form_index
+    _word_to_phonemes = poetry_reader.load_lexicon(dictionary_filename)
+    _name_to_poetry_pattern = poetry_reader.load_forms(poetry_forms_filename)
+    _form_index = _name_to_poetry_pattern.form_index()
+
+
+def _check_poems(poems, form_names, estimate):
+    """ (list of tuple of (str, str), list of str, bool)
+                                                    -> list of poem result
+
+    Check each (name, poem text) pair in poems against every form in
+    form_names in a worker process.
+    """
+    results = []
+    for poem_name, poem in poems:
+        results.extend(poetry_batch.check_poem_lines(
+            poem_name, poem.splitlines(True), form_names, _word_to_phonemes,
+            _name_to_poetry_pattern, estimate))
+    return results
+
+
+def _detect(poem):
+    """ (str) -> dict of {str: object}
+
+    Return the forms the poem text poem matches and the failures of the
+    others with its number of lines, in a worker process.
+    """
+    try:
+        matches, failures = poetry_detect.detect_forms(
+            poem.splitlines(True), _name_to_poetry_pattern, _word_to_phonemes,
+            _form_index)
+    except KeyError as error:
+        return {'error': 'unknown word: {}'.format(error.args[0])}
+    response = {'forms': matches, 'failures': {}}
+    for form_name in failures:
+        problem_lines, problem_rhymes, off_meter = failures[form_name]
+        failure = {'syllables': problem_lines, 'rhymes': problem_rhymes}
+        if poetry_patterns.compile_form(
+                _name_to_poetry_pattern[form_name]).meter is not None:
+            failure['meter'] = off_meter
+        response['failures'][form_name] = failure
+    return response
+
+
+def _field(request, name, kind, default=None):
+    """ (dict, str, type, object) -> object
+
+    Return request[name], or default if it is missing and default is not
+    None. Raise RequestError if it is missing without a default or is not
+    of type kind.
+    """
+    if name not in request:
+        if default is None:
+            raise RequestError(400, 'missing field: {}'.format(name))
+        return default
+    if not isinstance(request[name], kind):
+        raise RequestError(400, 'field {} must be a {}'.format(
+            name, kind.__name__))
+    return request[name]
+
+
+class PoetryService:
+    """ The poetry checks behind the HTTP endpoints. The pronunciation data
+    and poetry forms are loaded once, in each process of a pool, and every
+    check runs in that pool so that the event loop never blocks on one.
+    """
+
+    def __init__(self, workers=None, dictionary_filename=DICTIONARY_FILENAME,
+                 poetry_forms_filename=POETRY_FORMS_FILENAME):
+        """ (PoetryService, int, str, str) -> NoneType
+        """
+        # Build the compiled cache once here, so that the workers only
+        # read it.
+        poetry_reader.load_lexicon(dictionary_filename)
+        self.name_to_poetry_pattern = poetry_reader.load_forms(
+            poetry_forms_filename)
+        self.executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker,
+            initargs=(dictionary_filename, poetry_forms_filename))
+        self.workers = workers or os.cpu_count() or 1
+
+    def close(self):
+        """ (PoetryService) -> NoneType
+
+        Shut the worker pool down.
+        """
+        self.executor.shutdown()
+
+    def warm_up(self):
+        """ (PoetryService) -> NoneType
+
+        Start every worker process and wait until each has loaded its data,
+        so that the first requests don't pay for it.
+        """
+        futures = []
+        for i in range(self.workers):
+            futures.append(self.executor.submit(_check_poems, [], [], False))
+        concurrent.futures.wait(futures)
+
+    def _form_names(self, form_names):
+        """ (PoetryService, list of str) -> list of str
+
+        Return form_names. Raise RequestError if any is not a known form.
+        """
+        for form_name in form_names:
+            if not isinstance(form_name, str):
+                raise RequestError(400, 'form names must be strings')
+            if form_name not in self.name_to_poetry_pattern:
+                raise RequestError(422, 'unknown poetry form: {}'.format(
+                    form_name))
+        return form_names
+
+    async def _run(self, function, *args):
+        """ (PoetryService, function, object) -> object
+
+        Return function(*args), called in the worker pool.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, function, *args)
+
+    async def handle(self, method, path, body):
+        """ (PoetryService, str, str, bytes) -> tuple of (int, object)
+
+        Return the HTTP status and JSON-able response for a request.
+        """
+        try:
+            if path == '/forms':
+                if method != 'GET':
+                    raise RequestError(405, 'use GET')
+                return 200, {'forms': sorted(self.name_to_poetry_pattern)}
+            if path not in ('/check', '/detect', '/batch'):
+                raise RequestError(404, 'no such endpoint: {}'.format(path))
+            if method != 'POST':
+                raise RequestError(405, 'use POST')
+            try:
+                request = json.loads(body)
+            except ValueError as error:
+                raise RequestError(400, 'invalid JSON: {}'.format(error))
+            if not isinstance(request, dict):
+                raise RequestError(400, 'the request must be a JSON object')
+
+            if path == '/check':
+                return 200, await self.check(request)
+            if path == '/detect':
+                return 200, await self.detect(request)
+            return 200, await self.batch(request)
+        except RequestError as error:
+            return error.status, {'error': str(error)}
+
+    async def check(self, request):
+        """ (PoetryService, dict) -> poem result
+        """
+        poem = _field(request, 'poem', str)
+        form_names = self._form_names([_field(request, 'form', str)])
+        estimate = _field(request, 'estimate', bool, False)
+        results = await self._run(_check_poems, [('poem', poem)], form_names,
+                                  estimate)
+        return results[0]
+
+    async def detect(self, request):
+        """ (PoetryService, dict) -> dict
+        """
+        response = await self._run(_detect, _field(request, 'poem', str))
+        if 'error' in response:
+            raise RequestError(422, response['error'])
+        return response
+
+    async def batch(self, request):
+        """ (PoetryService, dict) -> dict
+
+        Check the poems in chunks spread over the whole pool.
+        """
+        poems = []
+        for item in _field(request, 'poems', list):
+            if not isinstance(item, dict):
+                raise RequestError(400, 'each poem must be a JSON object')
+            poems.append((_field(item, 'name', str, str(len(poems))),
+                          _field(item, 'poem', str)))
+        form_names = self._form_names(_field(
+            request, 'forms', list, sorted(self.name_to_poetry_pattern)))
+        estimate = _field(request, 'estimate', bool, False)
+
+        chunks = []
+        for i in range(0, len(poems), poetry_batch.CHUNK_SIZE):
+            chunks.append(self._run(
+                _check_poems, poems[i:i + poetry_batch.CHUNK_SIZE],
+                form_names, estimate))
+        results = []
+        for chunk_results in await asyncio.gather(*chunks):
+            results.extend(chunk_results)
+        return {'results': results}
+
+
+async def _read_request(reader):
+    """ (asyncio.StreamReader)
+            -> tuple of (str, str, dict of {str: str}, bytes) or NoneType
+
+    Read one HTTP request and return its method, path (without any query
+    string), headers (with lowercase names) and body, or None if the client
+    closed the connection. Raise RequestError if the request is malformed
+    or too large, or its body has a Transfer-Encoding (only bodies with a
+    Content-Length are read).
+    """
+    request_line = await reader.readline()
+    if request_line == b'':
+        return None
+    parts = request_line.decode('latin-1').split()
+    if len(parts) != 3:
+        raise RequestError(400, 'malformed request line')
+    headers = {}
+    line = await reader.readline()
+    while line not in (b'\r\n', b'\n', b''):
+        name, colon, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+        line = await reader.readline()
+
+    if 'transfer-encoding' in headers:
+        # Reading past a chunked body would need a decoder; reading it as
+        # the next request would misframe the connection.
+        raise RequestError(501, 'Transfer-Encoding is not supported; '
+                           'send a Content-Length')
+    # int accepts signs, spaces and underscores; a length is digits only.
+    length = headers.get('content-length', '0')
+    if not (length.isascii() and length.isdecimal()):
+        raise RequestError(400, 'invalid Content-Length')
+    length = int(length)
+    if length > MAX_BODY_SIZE:
+        raise RequestError(413, 'the body must be at most {} bytes'.format(
+            MAX_BODY_SIZE))
+    body = await reader.readexactly(length)
+    path = urllib.parse.urlsplit(parts[1]).path
+    return parts[0], path, headers, body
+
+
+def _response(status, payload, keep_alive):
+    """ (int, object, bool) -> bytes
+
+    Return the HTTP response with status and payload as its JSON body.
+    """
+    body = json.dumps(payload).encode('utf-8')
+    head = ('HTTP/1.1 {} {}\r\nContent-Type: application/json\r\n'
+            'Content-Length: {}\r\nConnection: {}\r\n\r\n').format(
+                status, _REASONS[status], len(body),
+                'keep-alive' if keep_alive else 'close')
+    return head.encode('latin-1') + body
+
+
+async def serve(service, host=HOST, port=PORT, ready=None):
+    """ (PoetryService, str, int, function) -> NoneType
+
+    Answer HTTP requests for service on host and port until cancelled.
+    Connections are kept alive between requests. If ready is given, it is
+    called with the bound port once the server is listening.
+    """
+
+    async def handle_connection(reader, writer):
+        try:
+            keep_alive = True
+            while keep_alive:
+                try:
+                    request = await _read_request(reader)
+                except RequestError as error:
+                    writer.write(_response(error.status,
+                                           {'error': str(error)}, False))
+                    break
+                if request is None:
+                    break
+                method, path, headers, body = request
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                try:
+                    status, payload = await service.handle(method, path, body)
+                except Exception as error:
+                    status, payload = 500, {'error': repr(error)}
+                writer.write(_response(status, payload, keep_alive))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle_connection, host, port)
+    async with server:
+        if ready is not None:
+            ready(server.sockets[0].getsockname()[1])
+        await server.serve_forever()
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        description='Serve the poetry checks over HTTP on localhost.')
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--workers', type=int, default=None,
+                        help='number of worker processes (default: cores)')
+    parser.add_argument('--dictionary', default=DICTIONARY_FILENAME)
+    parser.add_argument('--forms', default=POETRY_FORMS_FILENAME)
+    options = parser.parse_args(args)
+
+    # Shut the worker pool down on SIGTERM too, not only on Ctrl-C.
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    service = PoetryService(options.workers, options.dictionary,
+                            options.forms)
+    try:
+        service.warm_up()
+
+        def ready(port):
+            sys.stderr.write('Serving on http://{}:{}/ with {} workers\n'
+                             .format(options.host, port, service.workers))
+            sys.stderr.flush()
+
+        asyncio.run(serve(service, options.host, options.port, ready))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,309 @@
+"""
+Incremental checking of a poem that is being edited. A PoemSession holds a
+poem, a poetry pattern and a pronunciation dictionary; when a line is
+replaced, only that line is tokenized and looked up again and only the
+rhyme group it belongs to is compared again, so the diagnostics are
+updated in time proportional to the edit rather than to the poem.
+"""
+
+import poetry_analysis
+import poetry_patterns
+import poetry_tokenizer
+
+"""
+A poetry pattern:  tuple of (list of int, list of str)
+  - first item is a list of the number of syllables required in each line
+  - second item is a list describing the rhyme scheme rule for each line
+"""
+
+"""
+A pronunciation dictionary: dict of {str: list of str}
+  - each key is a word (a str)
+  - each value is a list of phonemes for that word (a list of str)
+"""
+
+"""
+Poem diagnostics: dict of {str: object}
+  - 'ok': whether the poem matches the form (a bool)
+  - 'lines': whether the poem has the right number of lines (a bool)
+  - 'syllables': the lines with the wrong number of syllables (list of str)
+  - 'rhymes': the lines that should rhyme but don't (list of list of str)
+  - 'meter': the lines not in the form's meter, if it declares one (list
+    of str)
+  - 'unknown': the words not in the pronunciation dictionary (list of str)
+  The checks are as PoemAnalysis does them; the lists of lines are empty
+  while the number of lines is wrong.
+"""
+
+
+class PoemSession:
+    """ A poem being edited, with its diagnostics against one poetry
+    pattern kept up to date.
+
+    >>> word_to_phonemes = {'GAP': ['G', 'AE1', 'P'],
+    ...                     'CAP': ['K', 'AE1', 'P'],
+    ...                     'OFF': ['AO1', 'F'],
+    ...                     'A': ['AH0']}
+    >>> session = PoemSession(['A gap', 'A cap'], ([2, 2], ['A', 'A']),
+    ...                       word_to_phonemes)
+    >>> session.diagnostics()['ok']
+    True
+    >>> diagnostics = session.replace_line(1, 'Off')
+    >>> diagnostics['syllables'], diagnostics['rhymes']
+    (['Off'], [['A gap', 'Off']])
+    """
+
+    def __init__(self, poem_lines, pattern, word_to_phonemes, estimate=False):
+        """ (PoemSession, list of str, poetry pattern,
+             pronunciation dictionary, bool) -> NoneType
+
+        Start a session for the poem whose lines, as get_poem_lines returns
+        them, are poem_lines. If estimate is True, the syllables and rhyme
+        of words not in word_to_phonemes are estimated.
+        """
+        self._form = poetry_patterns.compile_form(pattern)
+        self._word_to_phonemes = word_to_phonemes
+        self._estimate = estimate
+        # The rhyme group (an index into the form's groups) of each pattern
+        # position that belongs to one.
+        self._group_of = {}
+        for group in range(len(self._form.groups)):
+            for position in self._form.groups[group][1]:
+                self._group_of[position] = group
+
+        self._lines = []
+        self._syllables = []
+        self._rhyme_keys = []
+        self._stresses = []
+        self._unknown = []
+        # Whether each line is one of the poem's lines as get_poem_lines
+        # returns them; a blank line isn't, and moves no line in the pattern.
+        self._kept = []
+        # The index in self._lines of the line at each pattern position, and
+        # the other way round.
+        self._line_at = []
+        self._position_of = {}
+        # {word: number of lines it is unknown in}
+        self._unknown_counts = {}
+        self._blank_count = 0
+        # The pattern positions of the lines and the groups that fail.
+        self._wrong_lines = set()
+        self._wrong_groups = set()
+        self._off_meter = set()
+        self._checked = False
+        for line in poem_lines:
+            self._lines.append(None)
+            self._syllables.append(0)
+            self._rhyme_keys.append(None)
+            self._stresses.append('')
+            self._unknown.append([])
+            self._kept.append(False)
+            self._set_line(len(self._lines) - 1, line)
+        self._check_all()
+
+    @property
+    def lines(self):
+        """ The poem's lines (list of str). It is the session's own and must
+        not be modified.
+        """
+        return self._lines
+
+    def has_line_count(self):
+        """ (PoemSession) -> bool
+
+        Return True iff the poem has the number of lines the pattern
+        requires, counted as count_lines counts them.
+        """
+        return (len(self._lines) - self._blank_count ==
+                len(self._form.syllables))
+
+    def _forget_line(self, position):
+        """ (PoemSession, int) -> NoneType
+
+        Take the line at position out of the counts of blank lines and
+        unknown words.
+        """
+        if poetry_tokenizer.is_blank(self._lines[position]):
+            self._blank_count -= 1
+        for word in self._unknown[position]:
+            self._unknown_counts[word] -= 1
+            if self._unknown_counts[word] == 0:
+                del self._unknown_counts[word]
+
+    def _set_line(self, position, line):
+        """ (PoemSession, int, str) -> NoneType
+
+        Make line the line at position and look its words up. The pattern
+        positions are not updated.
+        """
+        if self._lines[position] is not None:
+            self._forget_line(position)
+        if poetry_tokenizer.is_blank(line):
+            self._blank_count += 1
+
+        # A one-line analysis tokenizes and looks up the line exactly as
+        # the analysis of the whole poem would.
+        analysis = poetry_analysis.analyze_poem(
+            [line], self._word_to_phonemes, self._estimate)
+        self._lines[position] = line
+        self._kept[position] = len(analysis.lines) > 0
+        if len(analysis.lines) == 0:
+            self._syllables[position] = 0
+            self._rhyme_keys[position] = None
+            self._stresses[position] = ''
+            self._unknown[position] = []
+        else:
+            self._syllables[position] = analysis.syllables[0]
+            self._rhyme_keys[position] = analysis.rhyme_keys[0]
+            self._stresses[position] = analysis.stresses[0]
+            self._unknown[position] = analysis.unknown_words
+        for word in self._unknown[position]:
+            self._unknown_counts[word] = self._unknown_counts.get(word, 0) + 1
+
+    def _place_lines(self):
+        """ (PoemSession) -> NoneType
+
+        Work out which line is at each pattern position.
+        """
+        self._line_at = [i for i in range(len(self._lines)) if self._kept[i]]
+        self._position_of = {}
+        for position in range(len(self._line_at)):
+            self._position_of[self._line_at[position]] = position
+
+    def _check_line(self, position):
+        """ (PoemSession, int) -> NoneType
+
+        Check the syllables and meter of the line at pattern position
+        position.
+        """
+        i = self._line_at[position]
+        required = self._form.syllables[position]
+        if required != 0 and self._syllables[i] != required:
+            self._wrong_lines.add(position)
+        else:
+            self._wrong_lines.discard(position)
+        meter_pattern = self._form.meter_pattern
+        if (meter_pattern is not None and
+                meter_pattern.fullmatch(self._stresses[i]) is None):
+            self._off_meter.add(position)
+        else:
+            self._off_meter.discard(position)
+
+    def _check_group(self, group):
+        """ (PoemSession, int) -> NoneType
+
+        Check whether the lines of the rhyme group group rhyme.
+        """
+        # Lines whose last word has no stressed vowel are not compared.
+        group_keys = set()
+        for position in self._form.groups[group][1]:
+            rhyme_key = self._rhyme_keys[self._line_at[position]]
+            if rhyme_key is not None:
+                group_keys.add(rhyme_key)
+        if len(group_keys) > 1:
+            self._wrong_groups.add(group)
+        else:
+            self._wrong_groups.discard(group)
+
+    def _check_all(self):
+        """ (PoemSession) -> NoneType
+
+        Place every line in the pattern and check every line and every
+        rhyme group again.
+        """
+        self._place_lines()
+        self._wrong_lines.clear()
+        self._wrong_groups.clear()
+        self._off_meter.clear()
+        self._checked = self.has_line_count()
+        if not self._checked:
+            return
+        for position in range(len(self._form.syllables)):
+            self._check_line(position)
+        for group in range(len(self._form.groups)):
+            self._check_group(group)
+
+    def replace_line(self, position, line):
+        """ (PoemSession, int, str) -> poem diagnostics
+
+        Replace the line at position by line and return the updated
+        diagnostics. Only that line and its rhyme group are checked again,
+        unless a blank line becomes a line of the poem or the other way
+        round, which moves every line after it in the pattern.
+        """
+        was_kept = self._kept[position]
+        self._set_line(position, line)
+        if (self.has_line_count() != self._checked or
+                self._kept[position] != was_kept):
+            self._check_all()
+        elif self._checked and was_kept:
+            pattern_position = self._position_of[position]
+            if pattern_position < len(self._form.syllables):
+                self._check_line(pattern_position)
+                if pattern_position in self._group_of:
+                    self._check_group(self._group_of[pattern_position])
+        return self.diagnostics()
+
+    def insert_line(self, position, line):
+        """ (PoemSession, int, str) -> poem diagnostics
+
+        Insert line before the line at position and return the updated
+        diagnostics. Every line after it moves to another place in the
+        pattern, so the whole poem is checked again.
+        """
+        self._lines.insert(position, None)
+        self._syllables.insert(position, 0)
+        self._rhyme_keys.insert(position, None)
+        self._stresses.insert(position, '')
+        self._unknown.insert(position, [])
+        self._kept.insert(position, False)
+        self._set_line(position, line)
+        self._check_all()
+        return self.diagnostics()
+
+    def delete_line(self, position):
+        """ (PoemSession, int) -> poem diagnostics
+
+        Delete the line at position and return the updated diagnostics.
+        The whole poem is checked again, as for insert_line.
+        """
+        self._forget_line(position)
+        del self._lines[position]
+        del self._syllables[position]
+        del self._rhyme_keys[position]
+        del self._stresses[position]
+        del self._unknown[position]
+        del self._kept[position]
+        self._check_all()
+        return self.diagnostics()
+
+    def diagnostics(self):
+        """ (PoemSession) -> poem diagnostics
+
+        Return the diagnostics of the poem as it is now. This takes time
+        proportional to the number of problems, not to the poem.
+        """
+        lines = self._lines
+        line_at = self._line_at
+        problem_lines = [lines[line_at[position]]
+                         for position in sorted(self._wrong_lines)]
+        problem_rhymes = []
+        for group in sorted(self._wrong_groups):
+            problem_rhymes.append([lines[line_at[position]] for position
+                                   in self._form.groups[group][1]])
+        result = {'lines': self._checked, 'syllables': problem_lines,
+                  'rhymes': problem_rhymes,
+                  'unknown': list(self._unknown_counts)}
+        result['ok'] = (self._checked and len(problem_lines) == 0 and
+                        len(problem_rhymes) == 0 and
+                        len(self._unknown_counts) == 0)
+        if self._form.meter is not None:
+            result['meter'] = [lines[line_at[position]]
+                               for position in sorted(self._off_meter)]
+            result['ok'] = result['ok'] and len(result['meter']) == 0
+        return result
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,405 @@
+"""
+A pronunciation dictionary: dict of {str: list of str}
+  - each key is a word (a str)
+  - each value is a list of phonemes for that word (a list of str)
+
+The stores in this module are read-only Mappings that can be used wherever a
+pronunciation dictionary is expected, including check_syllables and
+check_rhyme_scheme in poetry_functions.
+"""
+
+import array
+import mmap
+import zlib
+from collections.abc import Mapping
+from multiprocessing import shared_memory
+
+VOWELS = ('AA', 'AE', 'AH', 'AO', 'AW', 'AY', 'EH', 'ER', 'EY', 'IH', 'IY',
+          'OW', 'OY', 'UH', 'UW')
+CONSONANTS = ('B', 'CH', 'D', 'DH', 'F', 'G', 'HH', 'JH', 'K', 'L', 'M', 'N',
+              'NG', 'P', 'R', 'S', 'SH', 'T', 'TH', 'V', 'W', 'Y', 'Z', 'ZH')
+
+# Every ARPAbet phoneme with its stress variants. Code 0 is never used, so
+# the code of PHONEMES[i] is i + 1.
+PHONEMES = tuple(vowel + stress for vowel in VOWELS
+                 for stress in ('', '0', '1', '2')) + CONSONANTS
+
+_EMPTY_SLOT = -1
+
+
+def _hash_word(encoded_word):
+    """ (bytes) -> int
+
+    Return a hash of encoded_word that is the same in every process (unlike
+    the built-in hash of str).
+    """
+    return zlib.crc32(encoded_word)
+
+
+class CompactPronunciation(Mapping):
+    """ A read-only pronunciation dictionary that stores every pronunciation
+    as one-byte phoneme codes in a single contiguous buffer.
+
+    The words live in a second buffer; both are addressed through offset
+    tables, and words are found through an open-addressing hash table.
+
+    >>> store = CompactPronunciation({'GAP': ['G', 'AE1', 'P'],
+    ...                               'CAP': ['K', 'AE1', 'P'],
+    ...                               'POEM': ['P', 'OW1', 'AH0', 'M']})
+    >>> store['POEM']
+    ['P', 'OW1', 'AH0', 'M']
+    >>> 'GAP' in store, 'CAT' in store
+    (True, False)
+    >>> store.syllables('POEM')
+    2
+    >>> store.rhyme_key('GAP') == store.rhyme_key('CAP')
+    True
+    """
+
+    # Bumped whenever the buffers that __reduce__ pickles change.
+    LAYOUT_VERSION = 1
+
+    def __init__(self, word_to_phonemes):
+        """ (CompactPronunciation, pronunciation dictionary) -> NoneType
+
+        Encode every word and pronunciation in word_to_phonemes.
+        """
+        phoneme_table = list(PHONEMES)
+        codes = {}
+        for i in range(len(phoneme_table)):
+            codes[phoneme_table[i]] = i + 1
+
+        words = bytearray()
+        word_offsets = array.array('I', [0])
+        phonemes = bytearray()
+        phoneme_offsets = array.array('I', [0])
+        for word in word_to_phonemes:
+            for phoneme in word_to_phonemes[word]:
+                if phoneme not in codes:
+                    if len(phoneme_table) == 255:
+                        raise ValueError('too many distinct phonemes')
+                    phoneme_table.append(phoneme)
+                    codes[phoneme] = len(phoneme_table)
+                phonemes.append(codes[phoneme])
+            words += word.encode('utf-8')
+            word_offsets.append(len(words))
+            phoneme_offsets.append(len(phonemes))
+
+        self._attach(tuple(phoneme_table), bytes(words), word_offsets,
+                     bytes(phonemes), phoneme_offsets,
+                     _build_slots(bytes(words), word_offsets))
+
+    @classmethod
+    def from_buffers(cls, phoneme_table, words, word_offsets, phonemes,
+                     phoneme_offsets, slots):
+        """ (type, tuple of str, buffer, buffer, buffer, buffer, buffer)
+                                                    -> CompactPronunciation
+
+        Return a store that reads directly from already-encoded buffers
+        without copying them. word_offsets and phoneme_offsets must index
+        as unsigned ints and slots as signed ints (e.g. memoryviews cast
+        with 'I' and 'i').
+        """
+        store = cls.__new__(cls)
+        store._attach(phoneme_table, words, word_offsets, phonemes,
+                      phoneme_offsets, slots)
+        return store
+
+    def _attach(self, phoneme_table, words, word_offsets, phonemes,
+                phoneme_offsets, slots):
+        """ (CompactPronunciation, tuple of str, buffer, buffer, buffer,
+             buffer, buffer) -> NoneType
+
+        Use the given buffers as this store's contents.
+        """
+        self._phoneme_table = phoneme_table
+        self._words = words
+        self._word_offsets = word_offsets
+        self._phonemes = phonemes
+        self._phoneme_offsets = phoneme_offsets
+        self._slots = slots
+        self._mask = len(slots) - 1
+
+        # Codes of phonemes that are not syllable nuclei, for counting
+        # syllables with bytes.translate.
+        unstressed = bytearray()
+        for i in range(len(phoneme_table)):
+            if not phoneme_table[i][-1].isdigit():
+                unstressed.append(i + 1)
+        self._unstressed = bytes(unstressed)
+
+    def __reduce__(self):
+        return (CompactPronunciation.from_buffers,
+                (self._phoneme_table, bytes(self._words),
+                 array.array('I', self._word_offsets), bytes(self._phonemes),
+                 array.array('I', self._phoneme_offsets),
+                 array.array('i', self._slots)))
+
+    def _find(self, word):
+        """ (CompactPronunciation, object) -> int
+
+        Return the index of word in this store, or -1 if it is not present.
+        """
+        if not isinstance(word, str):
+            return -1
+        encoded = word.encode('utf-8')
+        slot = _hash_word(encoded) & self._mask
+        while True:
+            index = self._slots[slot]
+            if index == _EMPTY_SLOT:
+                return -1
+            if self._words[self._word_offsets[index]:
+                           self._word_offsets[index + 1]] == encoded:
+                return index
+            slot = (slot + 1) & self._mask
+
+    def _codes(self, word):
+        """ (CompactPronunciation, str) -> bytes
+
+        Return the phoneme codes of word. Raise KeyError if word is not in
+        this store.
+        """
+        index = self._find(word)
+        if index == -1:
+            raise KeyError(word)
+        return bytes(self._phonemes[self._phoneme_offsets[index]:
+                                    self._phoneme_offsets[index + 1]])
+
+    def __getitem__(self, word):
+        table = self._phoneme_table
+        return [table[code - 1] for code in self._codes(word)]
+
+    def __contains__(self, word):
+        return self._find(word) != -1
+
+    def __iter__(self):
+        for index in range(len(self._word_offsets) - 1):
+            yield bytes(self._words[self._word_offsets[index]:
+                                    self._word_offsets[index + 1]]
+                        ).decode('utf-8')
+
+    def __len__(self):
+        return len(self._word_offsets) - 1
+
+    def syllables(self, word):
+        """ (CompactPronunciation, str) -> int
+
+        Return the number of syllables in word.
+        """
+        return len(self._codes(word).translate(None, self._unstressed))
+
+    def rhyme_key(self, word):
+        """ (CompactPronunciation, str) -> bytes or NoneType
+
+        Return the phoneme codes of word from its last stressed vowel onward,
+        or None if word has no stressed vowel.
+        """
+        codes = self._codes(word)
+        unstressed = self._unstressed
+        for i in range(len(codes) - 1, -1, -1):
+            if codes[i] not in unstressed:
+                return codes[i:]
+        return None
+
+    def nbytes(self):
+        """ (CompactPronunciation) -> int
+
+        Return the number of bytes used by this store's buffers.
+        """
+        total = 0
+        for buffer in (self._words, self._word_offsets, self._phonemes,
+                       self._phoneme_offsets, self._slots):
+            total += memoryview(buffer).nbytes
+        return total
+
+    def share(self):
+        """ (CompactPronunciation) -> tuple of (SharedMemory, tuple)
+
+        Copy this store's buffers into a new shared memory segment and
+        return the segment and a small picklable handle that
+        attach_shared_pronunciation accepts in other processes. The caller
+        owns the segment and must close() and unlink() it when done.
+        """
+        # The int tables go first so that every cast view stays aligned.
+        buffers = [memoryview(self._word_offsets).cast('B'),
+                   memoryview(self._phoneme_offsets).cast('B'),
+                   memoryview(self._slots).cast('B'),
+                   memoryview(self._words).cast('B'),
+                   memoryview(self._phonemes).cast('B')]
+        sizes = []
+        for buffer in buffers:
+            sizes.append(buffer.nbytes)
+        segment = shared_memory.SharedMemory(create=True, 
+                                             size=max(1, sum(sizes)))
+        position = 0
+        for buffer in buffers:
+            segment.buf[position:position + buffer.nbytes] = buffer
+            position += buffer.nbytes
+        return segment, (segment.name, self._phoneme_table, tuple(sizes))
+
+
+def attach_shared_pronunciation(handle):
+    """ (tuple) -> CompactPronunciation
+
+    Return a read-only store that reads, without copying, from the shared
+    memory segment described by handle (as returned by
+    CompactPronunciation.share). The segment stays mapped for as long as
+    the store exists.
+    """
+    name, phoneme_table, sizes = handle
+    # Worker processes share their parent's resource tracker, so the
+    # segment is only unlinked by its owner (or when the parent exits).
+    segment = shared_memory.SharedMemory(name=name)
+
+    views = []
+    position = 0
+    for size in sizes:
+        views.append(segment.buf[position:position + size].toreadonly())
+        position += size
+    store = CompactPronunciation.from_buffers(
+        phoneme_table, views[3], views[0].cast('I'), views[4],
+        views[1].cast('I'), views[2].cast('i'))
+    store._segment = segment
+    return store
+
+
+class MappedPronunciation(Mapping):
+    """ A read-only pronunciation dictionary that memory-maps a CMU
+    Pronouncing Dictionary file and finds words by binary search.
+
+    Precondition: the entries of the file are sorted by word (in byte
+    order), as they are in dictionary.txt.
+
+    Only the end of the header is found when the file is opened; each
+    lookup parses just the one line it needs, and words that have been
+    looked up are remembered.
+    """
+
+    def __init__(self, dictionary_filename):
+        """ (MappedPronunciation, str) -> NoneType
+
+        Memory-map the dictionary file called dictionary_filename.
+        """
+        with open(dictionary_filename, 'rb') as dictionary_file:
+            self._map = mmap.mmap(dictionary_file.fileno(), 0,
+                                  access=mmap.ACCESS_READ)
+        self._found = {}
+        self._length = None
+
+        # This part skips the header
+        self._start = 0
+        while self._map[self._start:self._start + 3] == b';;;':
+            line_end = self._map.find(b'\n', self._start)
+            if line_end == -1:
+                self._start = len(self._map)
+            else:
+                self._start = line_end + 1
+
+    def close(self):
+        """ (MappedPronunciation) -> NoneType
+
+        Unmap the dictionary file.
+        """
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _line_end(self, line_start):
+        """ (MappedPronunciation, int) -> int
+
+        Return the offset of the newline ending the line that starts at
+        line_start, or the size of the file for the last line.
+        """
+        line_end = self._map.find(b'\n', line_start)
+        if line_end == -1:
+            return len(self._map)
+        return line_end
+
+    def _search(self, encoded_word):
+        """ (MappedPronunciation, bytes) -> list of str or NoneType
+
+        Return the phonemes of encoded_word, or None if it is not in the
+        file.
+        """
+        low = self._start
+        high = len(self._map)
+        while low < high:
+            middle = (low + high) // 2
+            # low is always the start of a line, so back up to the start of
+            # the line containing middle without going past it.
+            line_start = self._map.rfind(b'\n', low, middle) + 1
+            if line_start == 0:
+                line_start = low
+            line_end = self._line_end(line_start)
+            line = self._map[line_start:line_end]
+            space = line.find(b'  ')
+            word = line[:space]
+            if word == encoded_word:
+                return line[space + 2:].decode('ascii').split()
+            elif encoded_word < word:
+                high = line_start
+            else:
+                low = line_end + 1
+        return None
+
+    def __getitem__(self, word):
+        if word not in self._found:
+            phonemes = None
+            if isinstance(word, str):
+                phonemes = self._search(word.encode('utf-8'))
+            if phonemes is None:
+                raise KeyError(word)
+            self._found[word] = phonemes
+        return self._found[word]
+
+    def __contains__(self, word):
+        try:
+            self[word]
+        except KeyError:
+            return False
+        return True
+
+    def __iter__(self):
+        line_start = self._start
+        while line_start < len(self._map):
+            line_end = self._line_end(line_start)
+            line = self._map[line_start:line_end]
+            if line.strip() != b'':
+                yield line[:line.find(b'  ')].decode('utf-8')
+            line_start = line_end + 1
+
+    def __len__(self):
+        if self._length is None:
+            self._length = 0
+            for word in self:
+                self._length += 1
+        return self._length
+
+
+def _build_slots(words, word_offsets):
+    """ (bytes, array of int) -> array of int
+
+    Return an open-addressing hash table of word indexes for the words in
+    words, with at least twice as many slots as words.
+    """
+    size = 1
+    while size < 2 * (len(word_offsets) - 1):
+        size *= 2
+    slots = array.array('i', [_EMPTY_SLOT]) * size
+    mask = size - 1
+    for index in range(len(word_offsets) - 1):
+        slot = _hash_word(
+            words[word_offsets[index]:word_offsets[index + 1]]) & mask
+        while slots[slot] != _EMPTY_SLOT:
+            slot = (slot + 1) & mask
+        slots[slot] = index
+    return slots
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,107 @@
+"""
+Fast tokenizing for poems. The functions here give exactly the results of
+clean_up, split_on_separators, get_poem_lines and count_lines in
+poetry_functions, which use them.
+
+Words are split with str.split and stripped with str.strip, each a single
+pass in C. A compiled regular expression that finds and strips the words
+of a line in one findall gives the same words but is more than twice as
+slow, and a str.translate table can't be used because it would also
+remove the punctuation inside words.
+"""
+
+PUNCTUATION = """!"'`@$%^&_-+={}|\\/,;:.-?)([]<>*#\n\t\r"""
+
+
+def clean_word(word):
+    """ (str) -> str
+
+    Return word in uppercase with punctuation stripped from both ends.
+
+    >>> clean_word('"Quoted?"')
+    'QUOTED'
+    """
+    return word.upper().strip(PUNCTUATION)
+
+
+def tokenize_line(line):
+    """ (str) -> list of str
+
+    Return the cleaned-up words of line: line is split on whitespace and
+    each word is converted to uppercase with punctuation stripped from both
+    ends, as clean_up does. The line is converted to uppercase only once.
+
+    >>> tokenize_line('Then the "poem" ends.')
+    ['THEN', 'THE', 'POEM', 'ENDS']
+    >>> tokenize_line(' -- ')
+    ['']
+    """
+    return [word.strip(PUNCTUATION) for word in line.upper().split()]
+
+
+def is_blank(line):
+    """ (str) -> bool
+
+    Return True iff count_lines would not count line, i.e. nothing is left
+    once clean_up has been applied and whitespace stripped.
+
+    >>> is_blank('  \\n'), is_blank('...\\n'), is_blank('Hi!\\n')
+    (True, True, False)
+    """
+    return line.strip(PUNCTUATION).strip() == ''
+
+
+def split_on_separators(original, separators):
+    """ (str, str) -> list of str
+
+    Return the same list as poetry_functions.split_on_separators.
+
+    A single separator, as used to split a poem into lines, takes one pass
+    (see split_once). Otherwise each separator is one pass over the pieces
+    of the previous pass. Those passes can't be merged into one split on
+    all the separators, because each pass strips whitespace from its
+    pieces, which changes what later passes see.
+
+    >>> split_on_separators("Hooray! Finally, we're done.", "!,")
+    ['Hooray', 'Finally', "we're done."]
+    >>> split_on_separators('a\\n  \\nb', '\\n')
+    ['a', '', 'b']
+    """
+    if len(separators) == 1:
+        return split_once(original, separators)
+    result = [original]
+    for separator in separators:
+        result = [piece.strip() for string in result
+                  for piece in string.split(separator)
+                  if piece != '' and piece != ' ']
+    return result
+
+
+def split_once(original, separator):
+    """ (str, str) -> list of str
+
+    Return the pieces of original between occurrences of separator, with
+    whitespace stripped, leaving out the pieces that are empty or a single
+    space before stripping.
+
+    >>> split_once('a, b,, , c', ',')
+    ['a', 'b', 'c']
+    """
+    return [piece.strip() for piece in original.split(separator)
+            if piece != '' and piece != ' ']
+
+
+def split_lines(poem):
+    """ (str) -> list of str
+
+    Return the same list as poetry_functions.get_poem_lines(poem).
+
+    >>> split_lines('   First line,\\n\\n\\nPoems are fun!\\n')
+    ['First line,', 'Poems are fun!']
+    """
+    return split_once(poem, '\n')
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,230 @@
+"""
+Syllable and rhyme checks for large batches of poems against one poetry
+pattern. Every word is mapped to its Lexicon word id once; the line
+syllable totals and the rhyme comparisons are then done on arrays of ints,
+with NumPy if it is installed and in plain Python otherwise. The results
+are exactly those of check_syllables and check_rhyme_scheme.
+"""
+
+import bisect
+import itertools
+
+import poetry_lexicon
+import poetry_patterns
+import poetry_tokenizer
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+"""
+A poetry pattern:  tuple of (list of int, list of str)
+  - first item is a list of the number of syllables required in each line
+  - second item is a list describing the rhyme scheme rule for each line
+"""
+
+"""
+A batch result: tuple of (list of str, list of list of str) or NoneType
+  - first item is what check_syllables returns for the poem
+  - second item is what check_rhyme_scheme returns for the poem
+  - None for a poem that can't be checked against the pattern: one with
+    the wrong number of lines, or a line without words, or a word (that
+    the checks look at) not in the lexicon
+"""
+
+# The most poems encoded at once, which bounds the memory a batch uses.
+BATCH_SIZE = 65536
+
+
+def _encode(poems, line_count, word_ids, strict):
+    """ (list of list of str, int, dict of {str: int}, bool)
+                    -> tuple of (list of int, list of int, list of bool)
+
+    Return the word id of every word of every line of poems, the bounds of
+    the lines in that list and whether each poem can be checked. Line i of
+    the batch is the words from bounds[i] up to bounds[i + 1]. A poem with
+    the wrong number of lines is encoded as line_count empty lines, so that
+    every poem has line_count lines. The first word id is that of an
+    unknown word, len(word_ids), which is no line's and keeps the last word
+    of an empty line in range. If strict is False, only the last word of
+    each line has to be known.
+    """
+    lines = []
+    for poem_lines in poems:
+        if len(poem_lines) == line_count:
+            lines.extend(poem_lines)
+        else:
+            lines.extend([''] * line_count)
+
+    # Splitting the whole batch at once gives the words of each line in
+    # turn, since lines are only ever split on whitespace. Each distinct
+    # word is cleaned up and looked up only once.
+    unknown = len(word_ids)
+    punctuation = poetry_tokenizer.PUNCTUATION
+    words = ' '.join(lines).upper().split()
+    id_of = {}
+    for word in set(words):
+        id_of[word] = word_ids.get(word.strip(punctuation), unknown)
+    ids = [unknown]
+    ids.extend(map(id_of.__getitem__, words))
+    bounds = list(itertools.accumulate(
+        [len(line.split()) for line in lines], initial=1))
+
+    valid = [len(poem_lines) == line_count for poem_lines in poems]
+    for line in itertools.compress(itertools.count(),
+                                   [bounds[i] == bounds[i + 1]
+                                    for i in range(len(lines))]):
+        valid[line // line_count] = False
+    for position in itertools.compress(itertools.count(),
+                                       map(unknown.__eq__, ids)):
+        line = bisect.bisect_right(bounds, position) - 1
+        if line >= 0 and (strict or position == bounds[line + 1] - 1):
+            valid[line // line_count] = False
+    return ids, bounds, valid
+
+
+def _check_numpy(ids, bounds, valid, pattern, groups, syllables,
+                 rhyme_ids):
+    """ (list of int, list of int, list of bool, poetry pattern,
+         list of list of int, array of int, array of int)
+                        -> tuple of (list of list of int, list of list of int)
+
+    Return, for each poem encoded by _encode, the positions of its lines
+    with the wrong number of syllables and the indexes into groups of its
+    rhyme groups that don't rhyme, using NumPy.
+    """
+    line_count = len(pattern[0])
+    ids = numpy.array(ids, dtype=numpy.intp)
+    bounds = numpy.array(bounds, dtype=numpy.intp)
+    # The 0 appended keeps the start of an empty last line in range; the
+    # totals of empty lines are wrong, but only invalid poems have them.
+    word_syllables = numpy.append(syllables[ids], 0)
+    line_syllables = numpy.add.reduceat(word_syllables, bounds[:-1])
+    required = numpy.array(pattern[0])
+    wrong_lines = ((line_syllables.reshape(-1, line_count) != required) &
+                   (required != 0))
+    rhymes = rhyme_ids[ids[bounds[1:] - 1]].reshape(-1, line_count)
+
+    # A group fails iff it has two different rhyme ids other than 0 (no
+    # stressed vowel): replacing the 0s with the largest id, the smallest
+    # is then smaller than the largest.
+    wrong_groups = numpy.zeros((len(valid), len(groups)), dtype=bool)
+    for i in range(len(groups)):
+        group_rhymes = rhymes[:, groups[i]]
+        largest = group_rhymes.max(axis=1)
+        smallest = numpy.where(group_rhymes == 0, largest[:, None],
+                               group_rhymes).min(axis=1)
+        wrong_groups[:, i] = smallest != largest
+
+    problem_lines = [[]] * len(valid)
+    problem_groups = [[]] * len(valid)
+    failing = ((wrong_lines.any(axis=1) | wrong_groups.any(axis=1)) &
+               numpy.array(valid, dtype=bool))
+    for poem in numpy.flatnonzero(failing).tolist():
+        problem_lines[poem] = numpy.flatnonzero(wrong_lines[poem]).tolist()
+        problem_groups[poem] = numpy.flatnonzero(wrong_groups[poem]).tolist()
+    return problem_lines, problem_groups
+
+
+def _check_python(ids, bounds, valid, pattern, groups, syllables,
+                  rhyme_ids):
+    """ (list of int, list of int, list of bool, poetry pattern,
+         list of list of int, array of int, array of int)
+                        -> tuple of (list of list of int, list of list of int)
+
+    Return the same as _check_numpy, without NumPy.
+    """
+    line_count = len(pattern[0])
+    # Running syllable totals: a line's total is the difference between
+    # the totals at its bounds.
+    totals = list(itertools.accumulate(map(syllables.__getitem__, ids),
+                                       initial=0))
+    line_syllables = [totals[bounds[i + 1]] - totals[bounds[i]]
+                      for i in range(len(bounds) - 1)]
+    rhymes = [rhyme_ids[ids[bound - 1]] for bound in bounds[1:]]
+    required = list(enumerate(pattern[0]))
+    problem_lines = [[]] * len(valid)
+    problem_groups = [[]] * len(valid)
+    for poem in itertools.compress(itertools.count(), valid):
+        first = poem * line_count
+        wrong_lines = [i for i, syllables in required
+                       if syllables != 0 and
+                       syllables != line_syllables[first + i]]
+        wrong_groups = []
+        for i in range(len(groups)):
+            group_rhymes = set([rhymes[first + position]
+                                for position in groups[i]])
+            group_rhymes.discard(0)
+            if len(group_rhymes) > 1:
+                wrong_groups.append(i)
+        problem_lines[poem] = wrong_lines
+        problem_groups[poem] = wrong_groups
+    return problem_lines, problem_groups
+
+
+def check_batch(poems, pattern, lexicon, use_numpy=None):
+    """ (list of list of str, poetry pattern, poetry_lexicon.Lexicon, bool)
+                                                    -> list of batch result
+
+    Return the batch result of each poem in poems (each a list of lines as
+    returned by get_poem_lines) against pattern: exactly what
+    check_syllables and check_rhyme_scheme return for it, or None where
+    they would raise or the poem has the wrong number of lines. Any other
+    pronunciation dictionary is compiled into a Lexicon first. NumPy is
+    used if use_numpy is True, or if it is None and NumPy is installed.
+
+    >>> lexicon = poetry_lexicon.Lexicon({'GAP': ['G', 'AE1', 'P'],
+    ...                                   'CAP': ['K', 'AE1', 'P'],
+    ...                                   'OFF': ['AO1', 'F'],
+    ...                                   'A': ['AH0']})
+    >>> pattern = ([2, 2], ['A', 'A'])
+    >>> check_batch([['A gap', 'A cap'], ['A gap', 'Off'], ['A gap'],
+    ...              ['A gap', 'A blog']], pattern, lexicon)
+    [([], []), (['Off'], [['A gap', 'Off']]), None, None]
+    """
+    if not hasattr(lexicon, 'tables'):
+        lexicon = poetry_lexicon.Lexicon(lexicon)
+    if use_numpy is None:
+        use_numpy = numpy is not None
+    word_ids, syllables, rhyme_ids = lexicon.tables()
+    # The unknown word id, len(word_ids), has no syllables and no rhyme.
+    if use_numpy:
+        syllables = numpy.append(
+            numpy.frombuffer(syllables, syllables.typecode), 0)
+        rhyme_ids = numpy.append(
+            numpy.frombuffer(rhyme_ids, rhyme_ids.typecode), 0)
+        check = _check_numpy
+    else:
+        syllables = syllables + type(syllables)(syllables.typecode, [0])
+        rhyme_ids = rhyme_ids + type(rhyme_ids)(rhyme_ids.typecode, [0])
+        check = _check_python
+
+    # check_syllables looks up no words at all for a one-line pattern of 0
+    # syllables; otherwise every word is looked up.
+    strict = not (len(pattern[0]) == 1 and pattern[0][0] == 0)
+    # The line positions of each rhyme group that can fail.
+    groups = [list(positions) for label, positions
+              in poetry_patterns.compile_form(pattern).groups]
+    results = []
+    for start in range(0, len(poems), BATCH_SIZE):
+        batch = poems[start:start + BATCH_SIZE]
+        ids, bounds, valid = _encode(batch, len(pattern[0]), word_ids,
+                                     strict)
+        problem_lines, problem_groups = check(
+            ids, bounds, valid, pattern, groups, syllables, rhyme_ids)
+        for poem in range(len(batch)):
+            if not valid[poem]:
+                results.append(None)
+                continue
+            poem_lines = batch[poem]
+            results.append((
+                [poem_lines[i] for i in problem_lines[poem]],
+                [[poem_lines[i] for i in groups[group]]
+                 for group in problem_groups[poem]]))
+    return results
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,73 @@
+import unittest
+import poetry_analysis
+import poetry_functions
+
+WORD_TO_PHONEMES = {'NEXT': ['N', 'EH1', 'K', 'S', 'T'],
+                    'GAP': ['G', 'AE1', 'P'],
+                    'BEFORE': ['B', 'IH0', 'F', 'AO1', 'R'],
+                    'LEADS': ['L', 'IY1', 'D', 'Z'],
+                    'WITH': ['W', 'IH1', 'DH'],
+                    'LINE': ['L', 'AY1', 'N'],
+                    'THEN': ['DH', 'EH1', 'N'],
+                    'THE': ['DH', 'AH0'], 
+                    'A': ['AH0'], 
+                    'FIRST': ['F', 'ER1', 'S', 'T'], 
+                    'ENDS': ['EH1', 'N', 'D', 'Z'],
+                    'POEM': ['P', 'OW1', 'AH0', 'M'],
+                    'OFF': ['AO1', 'F']}
+POEM_LINES_RAW = ['The first line leads off,\n', '\n', ' \n',
+                  'With a gap before the next.\n', 'Then the poem ends.\n']
+
+class TestAnalyzePoem(unittest.TestCase):
+    ''' Example unittest test method for analyze_poem'''
+
+    def test_analyze_poem_1(self):
+        ''' Test analyze_poem finds the same lines as count_lines and
+        get_poem_lines.'''
+        actual = poetry_analysis.analyze_poem(POEM_LINES_RAW, 
+                                              WORD_TO_PHONEMES)
+        self.assertEqual(actual.line_count, 
+                         poetry_functions.count_lines(POEM_LINES_RAW))
+        self.assertEqual(actual.lines, poetry_functions.get_poem_lines(
+            ''.join(POEM_LINES_RAW)))
+        self.assertEqual(actual.syllables, [5, 7, 5])
+        self.assertEqual(actual.unknown_words, [])
+
+    def test_analyze_poem_2(self):
+        ''' Test the analysis gives the same results as check_syllables and
+        check_rhyme_scheme.'''
+        analysis = poetry_analysis.analyze_poem(POEM_LINES_RAW, 
+                                                WORD_TO_PHONEMES)
+        poem_lines = analysis.lines
+        for pattern in [([5, 7, 5], ['A', 'B', 'A']), 
+                        ([5, 5, 4], ['*', '*', '*']),
+                        ([0, 7, 0], ['A', 'A', 'A']),
+                        ([0], ['*'])]:
+            self.assertEqual(analysis.check_syllables(pattern),
+                             poetry_functions.check_syllables(
+                                 poem_lines, pattern, WORD_TO_PHONEMES))
+            self.assertEqual(analysis.check_rhyme_scheme(pattern),
+                             poetry_functions.check_rhyme_scheme(
+                                 poem_lines, pattern, WORD_TO_PHONEMES))
+
+    def test_analyze_poem_3(self):
+        ''' Test analyze_poem lists unknown words once each instead of
+        raising KeyError.'''
+        actual = poetry_analysis.analyze_poem(
+            ['The zorp line,\n', 'Zorp the blip.\n'], WORD_TO_PHONEMES)
+        self.assertEqual(actual.unknown_words, ['ZORP', 'BLIP'])
+        self.assertEqual(actual.syllables, [2, 1])
+        self.assertEqual(actual.rhyme_keys[1], None)
+
+    def test_analyze_poem_4(self):
+        ''' Test analyze_poem estimating unknown words.'''
+        actual = poetry_analysis.analyze_poem(
+            ['The zorp line,\n', 'Zorp the blip.\n'], WORD_TO_PHONEMES, True)
+        self.assertEqual(actual.unknown_words, [])
+        self.assertEqual(actual.estimated_words, ['ZORP', 'BLIP'])
+        self.assertEqual(actual.syllables, [3, 3])
+        self.assertEqual(actual.rhyme_keys[1], 'IP')
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -0,0 +1,150 @@
+import os
+import shutil
+import tempfile
+import unittest
+import poetry_batch
+import poetry_cache
+
+WORD_TO_PHONEMES = {'GAP': ['G', 'AE1', 'P'],
+                    'CAP': ['K', 'AE1', 'P'],
+                    'POEM': ['P', 'OW1', 'AH0', 'M']}
+FORMS = {'Couplet': ([1, 1], ['A', 'A']),
+         'Triplet': ([1, 1, 1], ['*', '*', '*'])}
+
+class TestCheckPoemFile(unittest.TestCase):
+    ''' Example unittest test method for check_poem_file'''
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.poem = os.path.join(self.temp_dir, 'poem.txt')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def write_poem(self, text):
+        with open(self.poem, 'w') as poem_file:
+            poem_file.write(text)
+
+    def test_check_poem_file_1(self):
+        ''' Test check_poem_file with a poem that matches one of two
+        forms.'''
+        self.write_poem('Gap,\n\nCap.\n')
+        actual = poetry_batch.check_poem_file(
+            self.poem, ['Couplet', 'Triplet'], WORD_TO_PHONEMES, FORMS)
+        self.assertEqual([result['ok'] for result in actual], [True, False])
+        self.assertFalse(actual[1]['lines'])
+
+    def test_check_poem_file_2(self):
+        ''' Test check_poem_file reports problems instead of raising.'''
+        self.write_poem('Poem\nGap\n')
+        actual = poetry_batch.check_poem_file(
+            self.poem, ['Couplet'], WORD_TO_PHONEMES, FORMS)
+        self.assertEqual(actual[0]['syllables'], ['Poem'])
+        self.assertEqual(actual[0]['rhymes'], [['Poem', 'Gap']])
+
+    def test_check_poem_file_3(self):
+        ''' Test check_poem_file with a word missing from the dictionary.'''
+        self.write_poem('Gap\nUnknown\n')
+        actual = poetry_batch.check_poem_file(
+            self.poem, ['Couplet'], WORD_TO_PHONEMES, FORMS)
+        self.assertFalse(actual[0]['ok'])
+        self.assertIn('UNKNOWN', actual[0]['error'])
+
+    def test_check_poem_file_4(self):
+        ''' Test check_poem_file estimating a word missing from the 
+        dictionary.'''
+        self.write_poem('Gap\nZap\n')
+        actual = poetry_batch.check_poem_file(
+            self.poem, ['Couplet'], WORD_TO_PHONEMES, FORMS, True)
+        self.assertNotIn('error', actual[0])
+        self.assertEqual(actual[0]['syllables'], [])
+        self.assertEqual(actual[0]['rhymes'], [['Gap', 'Zap']])
+        self.assertEqual(actual[0]['estimated'], ['ZAP'])
+
+    def test_find_poems_1(self):
+        ''' Test find_poems with a directory and a glob pattern.'''
+        self.write_poem('Gap\n')
+        actual = poetry_batch.find_poems([self.temp_dir, 
+                                          os.path.join(self.temp_dir, '*.txt')])
+        self.assertEqual(actual, [self.poem])
+
+
+class TestCheckStream(unittest.TestCase):
+    ''' Example unittest test method for check_stream'''
+
+    def test_check_stream_1(self):
+        ''' Test check_stream with three poems separated by blank lines.'''
+        here = os.path.dirname(os.path.abspath(__file__))
+        temp_dir = tempfile.mkdtemp()
+        try:
+            poems = os.path.join(temp_dir, 'poems.txt')
+            with open(poems, 'w') as poems_file:
+                for filename in ['haiku1.txt', 'limerick1.txt', 'haiku2.txt']:
+                    with open(os.path.join(here, filename)) as poem_file:
+                        poems_file.write(poem_file.read() + '\n\n')
+            results = []
+            count = poetry_batch.check_stream(
+                poems, ['Haiku'], results.append, 1, None,
+                os.path.join(here, 'dictionary.txt'),
+                os.path.join(here, 'poetry_forms.txt'))
+        finally:
+            shutil.rmtree(temp_dir)
+        self.assertEqual(count, 3)
+        actual = sorted((result['poem'], result['ok']) for result in results)
+        expected = [(poems + ':1', True), (poems + ':12', True), 
+                    (poems + ':5', False)]
+        self.assertEqual(actual, expected)
+
+
+
+class TestCheckCorpus(unittest.TestCase):
+    ''' Example unittest test method for check_corpus'''
+
+    def test_check_corpus_1(self):
+        ''' Test check_corpus reports the same results from its cache.'''
+        here = os.path.dirname(os.path.abspath(__file__))
+        dictionary = os.path.join(here, 'dictionary.txt')
+        forms = os.path.join(here, 'poetry_forms.txt')
+        poems = [os.path.join(here, 'haiku1.txt'),
+                 os.path.join(here, 'limerick1.txt'),
+                 os.path.join(here, 'missing.txt')]
+        cache = poetry_cache.ResultCache(dictionary, forms)
+        runs = []
+        for run in range(2):
+            results = []
+            poetry_batch.check_corpus(poems, ['Haiku', 'Limerick'], 
+                                      results.append, 1, dictionary, forms,
+                                      cache=cache)
+            runs.append(sorted(results, 
+                               key=lambda result: (result['poem'], 
+                                                   result['form'])))
+        self.assertEqual(runs[0], runs[1])
+        self.assertEqual(len(runs[0]), 6)
+        self.assertEqual((cache.hits, cache.misses), (4, 4))
+
+
+    def test_check_corpus_2(self):
+        ''' Test check_corpus with an overlay of extra words.'''
+        here = os.path.dirname(os.path.abspath(__file__))
+        temp_dir = tempfile.mkdtemp()
+        try:
+            poem = os.path.join(temp_dir, 'poem.txt')
+            overlay = os.path.join(temp_dir, 'custom.txt')
+            with open(poem, 'w') as poem_file:
+                poem_file.write('The zorp\nThe blorp\n')
+            with open(overlay, 'w') as overlay_file:
+                overlay_file.write('ZORP  Z AO1 R P\nBLORP  B L AO1 R P\n')
+            results = []
+            poetry_batch.check_corpus(
+                [poem], ['Limerick'], results.append, 1, 
+                os.path.join(here, 'dictionary.txt'),
+                os.path.join(here, 'poetry_forms.txt'), 
+                overlay_filenames=[overlay])
+        finally:
+            shutil.rmtree(temp_dir)
+        self.assertNotIn('error', results[0])
+        self.assertFalse(results[0]['lines'])
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
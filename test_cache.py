@@ -0,0 +1,118 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+import poetry_cache
+
+PATTERN = ([1, 1], ['A', 'A'])
+RESULT = {'poem': 'poem.txt', 'form': 'Couplet', 'ok': True, 'lines': True,
+          'syllables': [], 'rhymes': []}
+
+class TestResultCache(unittest.TestCase):
+    ''' Example unittest test method for ResultCache'''
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.dictionary = os.path.join(self.temp_dir, 'dictionary.txt')
+        self.forms = os.path.join(self.temp_dir, 'poetry_forms.txt')
+        self.write(self.dictionary, 'GAP  G AE1 P\nCAP  K AE1 P\n')
+        self.write(self.forms, 'Couplet\n1 A\n1 A\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def write(self, filename, text):
+        with open(filename, 'w') as source_file:
+            source_file.write(text)
+
+    def test_result_cache_1(self):
+        ''' Test ResultCache hits for the same lines and pattern only.'''
+        cache = poetry_cache.ResultCache(self.dictionary, self.forms)
+        poem_key = cache.poem_key(['Gap\n', 'Cap\n'])
+        self.assertIsNone(cache.get(poem_key, PATTERN))
+        cache.put(poem_key, PATTERN, RESULT)
+        self.assertEqual(cache.poem_key(['Gap\n', 'Cap']), poem_key)
+        self.assertEqual(cache.get(poem_key, PATTERN), 
+                         {'ok': True, 'lines': True, 'syllables': [], 
+                          'rhymes': []})
+        self.assertIsNone(cache.get(poem_key, ([1, 1], ['A', 'B'])))
+        self.assertNotEqual(cache.poem_key(['Gap\n', '  \n', 'Cap\n']), 
+                            poem_key)
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+    def test_result_cache_2(self):
+        ''' Test ResultCache evicts the least recently used result.'''
+        cache = poetry_cache.ResultCache(self.dictionary, self.forms, 2)
+        keys = [cache.poem_key([str(i)]) for i in range(3)]
+        cache.put(keys[0], PATTERN, RESULT)
+        cache.put(keys[1], PATTERN, RESULT)
+        cache.get(keys[0], PATTERN)
+        cache.put(keys[2], PATTERN, RESULT)
+        self.assertEqual(len(cache), 2)
+        self.assertIsNotNone(cache.get(keys[0], PATTERN))
+        self.assertIsNone(cache.get(keys[1], PATTERN))
+
+    def test_result_cache_3(self):
+        ''' Test ResultCache keeps results on disk between instances.'''
+        path = os.path.join(self.temp_dir, 'results.sqlite')
+        with poetry_cache.ResultCache(self.dictionary, self.forms, 
+                                      path=path) as cache:
+            cache.put(cache.poem_key(['Gap']), PATTERN, RESULT)
+        with poetry_cache.ResultCache(self.dictionary, self.forms, 
+                                      path=path) as cache:
+            self.assertIsNotNone(cache.get(cache.poem_key(['Gap']), PATTERN))
+            self.assertEqual(cache.disk_hits, 1)
+
+    def test_result_cache_4(self):
+        ''' Test ResultCache drops its results when the dictionary 
+        changes.'''
+        path = os.path.join(self.temp_dir, 'results.sqlite')
+        with poetry_cache.ResultCache(self.dictionary, self.forms, 
+                                      path=path) as cache:
+            cache.put(cache.poem_key(['Gap']), PATTERN, RESULT)
+            self.write(self.dictionary, 'GAP  G AE1 P\n')
+            # Make sure the modification time changes, whatever its
+            # resolution.
+            future = time.time() + 10
+            os.utime(self.dictionary, (future, future))
+            self.assertIsNone(cache.get(cache.poem_key(['Gap']), PATTERN))
+        with poetry_cache.ResultCache(self.dictionary, self.forms, 
+                                      path=path) as cache:
+            self.assertIsNone(cache.get(cache.poem_key(['Gap']), PATTERN))
+
+    def test_result_cache_5(self):
+        ''' Test ResultCache keeps the results of other dictionaries in a
+        shared database.'''
+        path = os.path.join(self.temp_dir, 'results.sqlite')
+        other = os.path.join(self.temp_dir, 'other.txt')
+        self.write(other, 'GAP  G AE1 P\n')
+        with poetry_cache.ResultCache(self.dictionary, self.forms,
+                                      path=path) as cache:
+            cache.put(cache.poem_key(['Gap']), PATTERN, RESULT)
+        with poetry_cache.ResultCache(other, self.forms, path=path) as cache:
+            self.assertIsNone(cache.get(cache.poem_key(['Gap']), PATTERN))
+            cache.put(cache.poem_key(['Gap']), PATTERN, RESULT)
+        with poetry_cache.ResultCache(self.dictionary, self.forms,
+                                      path=path) as cache:
+            self.assertIsNotNone(cache.get(cache.poem_key(['Gap']), PATTERN))
+
+    def test_result_cache_6(self):
+        ''' Test ResultCache keeps only the most recently stored rows on
+        disk.'''
+        path = os.path.join(self.temp_dir, 'results.sqlite')
+        with poetry_cache.ResultCache(self.dictionary, self.forms, path=path,
+                                      max_rows=2) as cache:
+            keys = [cache.poem_key([str(i)]) for i in range(3)]
+            for key in keys:
+                cache.put(key, PATTERN, RESULT)
+        with poetry_cache.ResultCache(self.dictionary, self.forms, path=path,
+                                      max_rows=2) as cache:
+            self.assertIsNone(cache.get(keys[0], PATTERN))
+            self.assertIsNotNone(cache.get(keys[1], PATTERN))
+            self.assertIsNotNone(cache.get(keys[2], PATTERN))
+
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -0,0 +1,69 @@
+import os
+import unittest
+import poetry_detect
+import poetry_functions
+import poetry_patterns
+import poetry_reader
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+class TestDetectForms(unittest.TestCase):
+    ''' Example unittest test method for detect_forms'''
+
+    @classmethod
+    def setUpClass(cls):
+        cls.lexicon = poetry_reader.load_lexicon(
+            os.path.join(HERE, 'dictionary.txt'))
+        with open(os.path.join(HERE, 'poetry_forms.txt')) as forms_file:
+            cls.forms = poetry_reader.read_poetry_form_descriptions(forms_file)
+
+    def read_poem(self, filename):
+        with open(os.path.join(HERE, filename)) as poem_file:
+            return poetry_functions.get_poem_lines(poem_file.read())
+
+    def test_detect_forms_1(self):
+        ''' Test detect_forms finds the form of each sample poem.'''
+        for filename, form_name in [('haiku1.txt', 'Haiku'), 
+                                    ('limerick1.txt', 'Limerick'),
+                                    ('limerick2.txt', 'Limerick')]:
+            matches, failures = poetry_detect.detect_forms(
+                self.read_poem(filename), self.forms, self.lexicon)
+            self.assertEqual(matches, [form_name])
+
+    def test_detect_forms_2(self):
+        ''' Test detect_forms reports the same failures as check_syllables
+        and check_rhyme_scheme.'''
+        poem_lines = self.read_poem('limerick1.txt')
+        forms = {'Wrong': ([8, 9, 5, 4, 8], ['A', 'B', 'A', 'B', 'A']),
+                 'Free': ([0, 0, 0, 0, 0], ['*', '*', '*', '*', '*']),
+                 'Short': ([8], ['A'])}
+        matches, failures = poetry_detect.detect_forms(
+            poem_lines, forms, self.lexicon)
+        self.assertEqual(matches, ['Free'])
+        self.assertEqual(list(failures), ['Wrong'])
+        expected = (poetry_functions.check_syllables(
+                        poem_lines, forms['Wrong'], self.lexicon),
+                    poetry_functions.check_rhyme_scheme(
+                        poem_lines, forms['Wrong'], self.lexicon), [])
+        self.assertEqual(failures['Wrong'], expected)
+
+    def test_detect_forms_3(self):
+        ''' Test detect_forms with no form of the poem's length.'''
+        actual = poetry_detect.detect_forms(['Tim'], self.forms, self.lexicon)
+        self.assertEqual(actual, ([], {}))
+
+    def test_detect_forms_4(self):
+        ''' Test detect_forms doesn't match a form whose meter the poem is
+        not in.'''
+        poem_lines = ['Before the poem.', 'The poem ends.']
+        free = ([0, 0], ['*', '*'])
+        forms = {'Iambic': poetry_patterns.compile_form(free, 'iambic'),
+                 'Trochaic': poetry_patterns.compile_form(free, 'trochaic')}
+        matches, failures = poetry_detect.detect_forms(
+            poem_lines, forms, self.lexicon)
+        self.assertEqual(matches, ['Iambic'])
+        self.assertEqual(failures, {'Trochaic': ([], [], poem_lines)})
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -0,0 +1,31 @@
+import unittest
+import poetry_estimator
+
+class TestEstimator(unittest.TestCase):
+    ''' Example unittest test method for the estimator'''
+
+    def test_estimate_syllables_1(self):
+        ''' Test estimate_syllables with silent and sounded endings.'''
+        actual = [poetry_estimator.estimate_syllables(word) for word in
+                  ['ZAP', 'ZAPPED', 'BLOGGED', 'TWEETED', 'HOPE', 'BOXES']]
+        self.assertEqual(actual, [1, 1, 1, 2, 1, 2])
+
+    def test_estimate_syllables_2(self):
+        ''' Test estimate_syllables estimates a repeated word only once.'''
+        poetry_estimator.estimate_syllables.cache_clear()
+        for i in range(3):
+            poetry_estimator.estimate_syllables('FLIMFLOOZLE')
+        info = poetry_estimator.estimate_syllables.cache_info()
+        self.assertEqual((info.misses, info.hits), (1, 2))
+
+    def test_estimate_rhyme_key_1(self):
+        ''' Test estimate_rhyme_key for words that should and shouldn't 
+        rhyme.'''
+        self.assertEqual(poetry_estimator.estimate_rhyme_key('ZAP'),
+                         poetry_estimator.estimate_rhyme_key('SNAP'))
+        self.assertNotEqual(poetry_estimator.estimate_rhyme_key('ZAP'),
+                            poetry_estimator.estimate_rhyme_key('ZIP'))
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
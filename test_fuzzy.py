@@ -0,0 +1,111 @@
+import random
+import unittest
+import poetry_batch
+import poetry_fuzzy
+
+WORD_TO_PHONEMES = {'GAP': ['G', 'AE1', 'P'],
+                    'CAP': ['K', 'AE1', 'P'],
+                    'POEM': ['P', 'OW1', 'AH0', 'M'],
+                    'POETRY': ['P', 'OW1', 'AH0', 'T', 'R', 'IY0'],
+                    'ANTELOPE': ['AE1', 'N', 'T', 'IH0', 'L', 'OW2', 'P']}
+FORMS = {'Couplet': ([1, 1], ['A', 'A'])}
+
+class TestFuzzyIndex(unittest.TestCase):
+    ''' Example unittest test method for FuzzyIndex'''
+
+    def test_lookup_1(self):
+        ''' Test lookup finds exactly the words a scan of every word
+        finds, for words longer than the indexed prefix too.'''
+        rng = random.Random(24)
+        words = set()
+        while len(words) < 500:
+            words.add(''.join(rng.choice('ABCDE')
+                              for i in range(rng.randint(1, 10))))
+        index = poetry_fuzzy.FuzzyIndex(words)
+        for query in range(300):
+            word = ''.join(rng.choice('ABCDEF')
+                           for i in range(rng.randint(1, 11)))
+            for max_distance in [0, 1, 2]:
+                expected = []
+                for candidate in sorted(words):
+                    distance = poetry_fuzzy.edit_distance(word, candidate,
+                                                          max_distance)
+                    if distance <= max_distance:
+                        expected.append((distance, candidate))
+                expected.sort()
+                self.assertEqual(index.lookup(word, max_distance), expected)
+
+    def test_edit_distance_1(self):
+        ''' Test edit_distance counts swaps of adjacent letters as one edit
+        and stops at max_distance + 1.'''
+        self.assertEqual(poetry_fuzzy.edit_distance('ANTELOPE', 'ANTELOPE'),
+                         0)
+        self.assertEqual(poetry_fuzzy.edit_distance('ANTELOPE', 'ANTLEOPE'),
+                         1)
+        self.assertEqual(poetry_fuzzy.edit_distance('CA', 'ABC'), 3)
+        self.assertEqual(poetry_fuzzy.edit_distance('CA', 'ABC', 3), 3)
+        self.assertEqual(poetry_fuzzy.edit_distance('POEM', 'PROBLEM', 2), 3)
+        self.assertEqual(poetry_fuzzy.edit_distance('', 'AB'), 2)
+
+    def test_lookup_2(self):
+        ''' Test lookup refuses a distance the index was not built for.'''
+        index = poetry_fuzzy.FuzzyIndex(['POEM'], 1)
+        with self.assertRaises(ValueError):
+            index.lookup('POEMS', 2)
+
+
+class TestResolvingPronunciation(unittest.TestCase):
+    ''' Example unittest test method for ResolvingPronunciation'''
+
+    def setUp(self):
+        self.view = poetry_fuzzy.ResolvingPronunciation(
+            WORD_TO_PHONEMES, poetry_fuzzy.FuzzyIndex(WORD_TO_PHONEMES))
+
+    def test_resolve_1(self):
+        ''' Test only words with a single closest word are resolved.'''
+        self.assertEqual(self.view.resolve('POETREE'), 'POETRY')
+        self.assertEqual(self.view.resolve('GAP'), 'GAP')
+        # GAP and CAP are both one edit from TAP.
+        self.assertIsNone(self.view.resolve('TAP'))
+        self.assertNotIn('TAP', self.view)
+        with self.assertRaises(KeyError):
+            self.view.syllables('TAP')
+        self.assertEqual(self.view.resolved, {'POETREE': 'POETRY'})
+
+    def test_new_poem_1(self):
+        ''' Test new_poem forgets the resolved words but not how they
+        resolve.'''
+        self.view.resolve('POETREE')
+        self.view.new_poem()
+        self.assertEqual(self.view.resolved, {})
+        self.assertEqual(self.view.resolve('POETREE'), 'POETRY')
+        self.assertEqual(self.view.resolved, {'POETREE': 'POETRY'})
+
+    def test_check_poem_lines_1(self):
+        ''' Test check_poem_lines suggests words for unknown words and lists
+        the resolved ones.'''
+        index = poetry_fuzzy.FuzzyIndex(WORD_TO_PHONEMES)
+        actual = poetry_batch.check_poem_lines(
+            'poem', ['Gapp\n', 'Tap\n'], ['Couplet'], self.view, FORMS,
+            fuzzy_index=index)
+        self.assertEqual(actual[0]['suggestions'], {'TAP': ['CAP', 'GAP']})
+        self.assertEqual(actual[0]['resolved'], {'GAPP': 'GAP'})
+        self.assertFalse(actual[0]['ok'])
+        actual = poetry_batch.check_poem_lines(
+            'poem', ['Gapp\n', 'Capp\n'], ['Couplet'], self.view, FORMS,
+            fuzzy_index=index)
+        self.assertTrue(actual[0]['ok'])
+        self.assertNotIn('suggestions', actual[0])
+
+    def test_check_poem_lines_2(self):
+        ''' Test check_poem_lines suggests words for estimated words too.'''
+        index = poetry_fuzzy.FuzzyIndex(WORD_TO_PHONEMES)
+        actual = poetry_batch.check_poem_lines(
+            'poem', ['Gapp\n', 'Cap\n'], ['Couplet'], WORD_TO_PHONEMES, FORMS,
+            estimate=True, fuzzy_index=index)
+        self.assertEqual(actual[0]['estimated'], ['GAPP'])
+        self.assertEqual(actual[0]['suggestions'], {'GAPP': ['GAP']})
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
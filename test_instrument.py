@@ -0,0 +1,151 @@
+import io
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+import poetry_analysis
+import poetry_functions
+import poetry_instrument
+import poetry_lexicon
+import poetry_reader
+
+WORD_TO_PHONEMES = {'GAP': ['G', 'AE1', 'P'],
+                    'CAP': ['K', 'AE1', 'P'],
+                    'A': ['AH0']}
+
+class TestInstrument(unittest.TestCase):
+    ''' Example unittest test method for enable'''
+
+    def tearDown(self):
+        poetry_instrument.disable()
+
+    def test_enable_1(self):
+        ''' Test the report counts the calls of each function and stage, and
+        the dictionary hits and misses.'''
+        poetry_instrument.enable(trace_memory=False)
+        poem_lines = ['A gap', 'A cap']
+        poetry_functions.check_syllables(poem_lines, ([2, 2], ['A', 'A']),
+                                         WORD_TO_PHONEMES)
+        with self.assertRaises(KeyError):
+            poetry_functions.check_syllables(['A zap'], ([2], ['*']),
+                                             WORD_TO_PHONEMES)
+        report = poetry_instrument.report()
+        self.assertEqual(
+            report['functions']['poetry_functions.check_syllables']['calls'],
+            2)
+        self.assertEqual(report['stages']['syllables']['calls'], 2)
+        self.assertEqual(
+            report['functions']['poetry_tokenizer.tokenize_line']['calls'], 3)
+        self.assertEqual(report['lookups'], {'hits': 5, 'misses': 1})
+        self.assertIsNone(report['peak_memory'])
+
+    def test_enable_2(self):
+        ''' Test a stage counts only the outermost of nested calls.'''
+        poetry_instrument.enable(trace_memory=False)
+        poetry_functions.check_rhyme_scheme(['A gap', 'A cap'],
+                                            ([2, 2], ['A', 'A']),
+                                            WORD_TO_PHONEMES)
+        report = poetry_instrument.report()
+        self.assertEqual(report['stages']['rhymes']['calls'], 1)
+        self.assertEqual(report['stages']['tokenize']['calls'], 2)
+        self.assertEqual(
+            report['functions']['poetry_functions.clean_up']['calls'], 2)
+
+    def test_enable_3(self):
+        ''' Test analyze_poem looks each word up once, even on a line with
+        an unknown word.'''
+        poetry_instrument.enable(trace_memory=False)
+        poetry_analysis.analyze_poem(['A gap zap\n', 'A cap\n'],
+                                     WORD_TO_PHONEMES)
+        report = poetry_instrument.report()
+        # 5 entry lookups (1 miss); CAP's rhyme comes from its entry.
+        self.assertEqual(report['lookups'], {'hits': 4, 'misses': 1})
+
+    def test_enable_4(self):
+        ''' Test a stage counts the outermost calls of each thread.'''
+        started = threading.Event()
+        release = threading.Event()
+
+        def load_lexicon(dictionary_filename):
+            started.set()
+            release.wait(10)
+
+        with mock.patch.object(poetry_reader, 'load_lexicon', load_lexicon):
+            poetry_instrument.enable(trace_memory=False)
+            thread = threading.Thread(target=poetry_reader.load_lexicon,
+                                      args=('dictionary.txt',))
+            thread.start()
+            started.wait(10)
+            poetry_reader.read_poetry_form_descriptions(
+                io.StringIO('Couplet\n8 A\n8 A\n'))
+            release.set()
+            thread.join()
+            report = poetry_instrument.report()
+            poetry_instrument.disable()
+        self.assertEqual(report['stages']['load']['calls'], 2)
+
+    def test_enable_5(self):
+        ''' Test the lookups of several threads are all counted, including
+        stress lookups.'''
+        poetry_instrument.enable(trace_memory=False)
+        stresses_of = poetry_lexicon.stress_lookup(WORD_TO_PHONEMES)
+
+        def look_up():
+            for i in range(1000):
+                stresses_of('GAP')
+
+        threads = [threading.Thread(target=look_up) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        report = poetry_instrument.report()
+        self.assertEqual(report['lookups'], {'hits': 4000, 'misses': 0})
+        self.assertIsNone(report['profiled_thread'])
+
+    def test_disable_1(self):
+        ''' Test disable puts the original functions back.'''
+        originals = (poetry_functions.check_syllables,
+                     poetry_analysis.PoemAnalysis.check_syllables,
+                     poetry_lexicon.syllable_lookup)
+        poetry_instrument.enable(trace_memory=False)
+        self.assertNotEqual(poetry_functions.check_syllables, originals[0])
+        poetry_instrument.disable()
+        self.assertEqual((poetry_functions.check_syllables,
+                          poetry_analysis.PoemAnalysis.check_syllables,
+                          poetry_lexicon.syllable_lookup), originals)
+        self.assertFalse(poetry_instrument.is_enabled())
+
+    def test_mark_1(self):
+        ''' Test mark records only the first time of each name.'''
+        poetry_instrument.mark('ignored')
+        poetry_instrument.enable(trace_memory=False)
+        poetry_instrument.mark('first')
+        first = poetry_instrument.report()['marks']['first']
+        poetry_instrument.mark('first')
+        poetry_instrument.mark('second')
+        marks = poetry_instrument.report()['marks']
+        self.assertEqual(marks['first'], first)
+        self.assertGreaterEqual(marks['second'], first)
+        self.assertNotIn('ignored', marks)
+
+    def test_write_report_1(self):
+        ''' Test write_report writes the report and the profile.'''
+        poetry_instrument.enable(profile=True)
+        poetry_analysis.analyze_poem(['A gap\n'], WORD_TO_PHONEMES)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            report_filename = os.path.join(temp_dir, 'report.json')
+            profile_filename = os.path.join(temp_dir, 'profile.prof')
+            report = poetry_instrument.write_report(report_filename,
+                                                    profile_filename)
+            self.assertTrue(os.path.exists(report_filename))
+            self.assertTrue(os.path.exists(profile_filename))
+        self.assertEqual(report['stages']['analyze']['calls'], 1)
+        self.assertGreater(report['peak_memory'], 0)
+        self.assertEqual(report['profiled_thread'],
+                         threading.current_thread().name)
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
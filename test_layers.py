@@ -0,0 +1,81 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+import poetry_lexicon
+import poetry_layers
+
+WORD_TO_PHONEMES = {'GAP': ['G', 'AE1', 'P'],
+                    'CAP': ['K', 'AE1', 'P'],
+                    'POEM': ['P', 'OW1', 'AH0', 'M']}
+
+class TestLayeredPronunciation(unittest.TestCase):
+    ''' Example unittest test method for LayeredPronunciation'''
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.custom = os.path.join(self.temp_dir, 'custom.txt')
+        self.more = os.path.join(self.temp_dir, 'more.txt')
+        self.write(self.custom, ';;; custom words\nPOEM  P OW1 M\n'
+                   'ZAP  Z AE1 P\n')
+        self.write(self.more, 'ZAP  Z AE1 P S\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def write(self, filename, text):
+        with open(filename, 'w') as overlay_file:
+            overlay_file.write(text)
+
+    def test_layered_pronunciation_1(self):
+        ''' Test overlays take precedence over the base and earlier 
+        overlays.'''
+        store = poetry_layers.LayeredPronunciation(
+            poetry_lexicon.Lexicon(WORD_TO_PHONEMES), [self.custom, self.more])
+        self.assertEqual(store['POEM'], ['P', 'OW1', 'M'])
+        self.assertEqual(store['ZAP'], ['Z', 'AE1', 'P', 'S'])
+        self.assertEqual(store['GAP'], ['G', 'AE1', 'P'])
+        self.assertEqual(store.syllables('POEM'), 1)
+        self.assertEqual(sorted(store), ['CAP', 'GAP', 'POEM', 'ZAP'])
+        self.assertNotIn('NAP', store)
+
+    def test_layered_pronunciation_2(self):
+        ''' Test the base takes precedence with base_first.'''
+        store = poetry_layers.LayeredPronunciation(
+            WORD_TO_PHONEMES, [self.custom], base_first=True)
+        self.assertEqual(store['POEM'], ['P', 'OW1', 'AH0', 'M'])
+        self.assertEqual(store['ZAP'], ['Z', 'AE1', 'P'])
+        self.assertEqual(len(store), 4)
+
+    def test_layered_pronunciation_3(self):
+        ''' Test rhyme keys agree across layers.'''
+        store = poetry_layers.LayeredPronunciation(
+            poetry_lexicon.Lexicon(WORD_TO_PHONEMES), [self.custom])
+        self.assertEqual(store.rhyme_key('ZAP'), store.rhyme_key('GAP'))
+        self.assertNotEqual(store.rhyme_key('POEM'), store.rhyme_key('GAP'))
+
+    def test_refresh_1(self):
+        ''' Test refresh re-reads only the overlays that changed.'''
+        store = poetry_layers.LayeredPronunciation(
+            WORD_TO_PHONEMES, [self.custom, self.more])
+        self.assertEqual(store.refresh(), [])
+        self.write(self.custom, 'NAP  N AE1 P\n')
+        future = time.time() + 10
+        os.utime(self.custom, (future, future))
+        self.assertEqual(store.refresh(), [self.custom])
+        self.assertIn('NAP', store)
+        self.assertEqual(store['POEM'], ['P', 'OW1', 'AH0', 'M'])
+
+    def test_refresh_2(self):
+        ''' Test a missing overlay is empty until it appears.'''
+        missing = os.path.join(self.temp_dir, 'missing.txt')
+        store = poetry_layers.LayeredPronunciation(WORD_TO_PHONEMES, 
+                                                   [missing], max_age=0)
+        self.assertNotIn('NAP', store)
+        self.write(missing, 'NAP  N AE1 P\n')
+        self.assertIn('NAP', store)
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -0,0 +1,71 @@
+import unittest
+import poetry_functions
+import poetry_lexicon
+
+WORD_TO_PHONEMES = {'NEXT': ['N', 'EH1', 'K', 'S', 'T'],
+                    'GAP': ['G', 'AE1', 'P'],
+                    'BEFORE': ['B', 'IH0', 'F', 'AO1', 'R'],
+                    'LEADS': ['L', 'IY1', 'D', 'Z'],
+                    'WITH': ['W', 'IH1', 'DH'],
+                    'LINE': ['L', 'AY1', 'N'],
+                    'THEN': ['DH', 'EH1', 'N'],
+                    'THE': ['DH', 'AH0'], 
+                    'A': ['AH0'], 
+                    'FIRST': ['F', 'ER1', 'S', 'T'], 
+                    'ENDS': ['EH1', 'N', 'D', 'Z'],
+                    'POEM': ['P', 'OW1', 'AH0', 'M'],
+                    'OFF': ['AO1', 'F'],
+                    'SCOFF': ['S', 'K', 'AO1', 'F'],
+                    'HMM': ['HH', 'M']}
+
+class TestLexicon(unittest.TestCase):
+    ''' Example unittest test method for Lexicon'''
+
+    def setUp(self):
+        self.lexicon = poetry_lexicon.Lexicon(WORD_TO_PHONEMES)
+
+    def test_lexicon_1(self):
+        ''' Test Lexicon looks up phonemes, syllables and rhyme tails.'''
+        self.assertEqual(self.lexicon['POEM'], ['P', 'OW1', 'AH0', 'M'])
+        self.assertEqual(self.lexicon.syllables('POEM'), 2)
+        self.assertEqual(self.lexicon.rhyme_tail('POEM'), ('AH0', 'M'))
+        self.assertEqual(len(self.lexicon), len(WORD_TO_PHONEMES))
+
+    def test_lexicon_2(self):
+        ''' Test Lexicon rhyme keys are equal iff the rhyme tails are.'''
+        self.assertEqual(self.lexicon.rhyme_key('OFF'), 
+                         self.lexicon.rhyme_key('SCOFF'))
+        self.assertNotEqual(self.lexicon.rhyme_key('OFF'), 
+                            self.lexicon.rhyme_key('NEXT'))
+        self.assertIsNone(self.lexicon.rhyme_key('HMM'))
+
+    def test_lexicon_3(self):
+        ''' Test check_syllables gives the same result for a Lexicon and a
+        dict.'''
+        poem_lines = ['The first line leads off,', 
+                      'With a gap before the next.', 'Then the poem ends.']
+        pattern = ([5, 3, 5], ['*', '*', '*'])
+        actual = poetry_functions.check_syllables(poem_lines, pattern, 
+                                                  self.lexicon)
+        expected = poetry_functions.check_syllables(poem_lines, pattern, 
+                                                    WORD_TO_PHONEMES)
+        self.assertEqual(actual, expected)
+
+    def test_lexicon_4(self):
+        ''' Test check_rhyme_scheme gives the same result for a Lexicon and a
+        dict.'''
+        poem_lines = ['The first line leads off,', 
+                      'With a gap before the next.', 'Then the poem ends.',
+                      'Before the scoff.', 'Hmm']
+        pattern = ([5, 7, 5, 4, 1], ['A', 'B', 'A', 'A', 'B'])
+        actual = poetry_functions.check_rhyme_scheme(poem_lines, pattern, 
+                                                     self.lexicon)
+        expected = poetry_functions.check_rhyme_scheme(poem_lines, pattern, 
+                                                       WORD_TO_PHONEMES)
+        self.assertEqual(actual, expected)
+        self.assertEqual(actual, [['The first line leads off,', 
+                                   'Then the poem ends.', 'Before the scoff.']])
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -0,0 +1,103 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+import poetry_reader
+import poetry_rhymes
+
+DICTIONARY = ''';;; # A tiny CMU-style dictionary
+;;;
+A  AH0
+GAP  G AE1 P
+NEXT  N EH1 K S T
+'''
+
+class TestLoadPronunciation(unittest.TestCase):
+    ''' Example unittest test method for load_pronunciation'''
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.source = os.path.join(self.temp_dir, 'dictionary.txt')
+        self.cache = self.source + poetry_reader.CACHE_SUFFIX
+        with open(self.source, 'w') as source_file:
+            source_file.write(DICTIONARY)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_load_pronunciation_1(self):
+        ''' Test load_pronunciation builds a cache matching
+        read_pronunciation.'''
+        actual = poetry_reader.load_pronunciation(self.source)
+        with open(self.source) as source_file:
+            expected = poetry_reader.read_pronunciation(source_file)
+        self.assertEqual(actual, expected)
+        self.assertTrue(os.path.exists(self.cache))
+
+    def test_load_pronunciation_2(self):
+        ''' Test load_pronunciation reads the cache instead of the source.'''
+        poetry_reader.load_pronunciation(self.source)
+        poetry_reader.write_cache(self.cache, self.source, {'CACHED': []})
+        actual = poetry_reader.load_pronunciation(self.source)
+        expected = {'CACHED': []}
+        self.assertEqual(actual, expected)
+
+    def test_load_pronunciation_3(self):
+        ''' Test load_pronunciation rebuilds the cache when the source
+        changes.'''
+        poetry_reader.load_pronunciation(self.source)
+        with open(self.source, 'a') as source_file:
+            source_file.write('OFF  AO1 F\n')
+        actual = poetry_reader.load_pronunciation(self.source)
+        self.assertEqual(actual['OFF'], ['AO1', 'F'])
+        self.assertEqual(len(actual), 4)
+
+    def test_load_pronunciation_4(self):
+        ''' Test load_pronunciation ignores a corrupt cache.'''
+        with open(self.cache, 'wb') as cache_file:
+            cache_file.write(b'not a cache')
+        actual = poetry_reader.load_pronunciation(self.source)
+        self.assertEqual(actual['GAP'], ['G', 'AE1', 'P'])
+
+    def test_load_pronunciation_5(self):
+        ''' Test load_pronunciation rebuilds a cache whose payload can't be
+        unpickled.'''
+        poetry_reader.load_pronunciation(self.source)
+        with open(self.cache, 'rb') as cache_file:
+            header = cache_file.read(poetry_reader._CACHE_HEADER.size)
+        with open(self.cache, 'wb') as cache_file:
+            # A pickle of a class that no longer exists.
+            cache_file.write(header + b'cpoetry_reader\nNoSuchClass\n.')
+        actual = poetry_reader.load_pronunciation(self.source)
+        self.assertEqual(actual['GAP'], ['G', 'AE1', 'P'])
+
+    def test_load_pronunciation_6(self):
+        ''' Test load_pronunciation updates the cache's mtime when only the
+        source's mtime changed.'''
+        poetry_reader.load_pronunciation(self.source)
+        stat = os.stat(self.source)
+        os.utime(self.source, ns=(stat.st_atime_ns,
+                                  stat.st_mtime_ns + 10 ** 9))
+        poetry_reader.write_cache(self.cache, self.source, {'CACHED': []})
+        os.utime(self.source, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        actual = poetry_reader.load_pronunciation(self.source)
+        self.assertEqual(actual, {'CACHED': []})
+        with open(self.cache, 'rb') as cache_file:
+            header = poetry_reader._CACHE_HEADER.unpack(
+                cache_file.read(poetry_reader._CACHE_HEADER.size))
+        self.assertEqual(header[3], stat.st_mtime_ns)
+
+    def test_load_pronunciation_7(self):
+        ''' Test load_pronunciation rebuilds the cache when the layout of a
+        cached class changes.'''
+        poetry_reader.load_pronunciation(self.source)
+        poetry_reader.write_cache(self.cache, self.source, {'CACHED': []})
+        with mock.patch.object(poetry_rhymes.RhymeIndex, 'LAYOUT_VERSION',
+                               poetry_rhymes.RhymeIndex.LAYOUT_VERSION + 1):
+            actual = poetry_reader.load_pronunciation(self.source)
+        self.assertEqual(actual['GAP'], ['G', 'AE1', 'P'])
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -0,0 +1,88 @@
+import unittest
+import poetry_analysis
+import poetry_functions
+import poetry_lexicon
+import poetry_meter
+import poetry_patterns
+
+WORD_TO_PHONEMES = {'THE': ['DH', 'AH0'],
+                    'POEM': ['P', 'OW1', 'AH0', 'M'],
+                    'BEFORE': ['B', 'IH0', 'F', 'AO1', 'R'],
+                    'ANTELOPE': ['AE1', 'N', 'T', 'IH0', 'L', 'OW2', 'P'],
+                    'ENDS': ['EH1', 'N', 'D', 'Z']}
+
+class TestCompileMeter(unittest.TestCase):
+    ''' Example unittest test method for compile_meter'''
+
+    def test_compile_meter_1(self):
+        ''' Test compile_meter matches whole feet, any number without a
+        measure, when strict.'''
+        iambic = poetry_meter.compile_meter('iambic', True)
+        for stresses in ['01', 'x1', '0xx1', '010101x1']:
+            self.assertIsNotNone(iambic.fullmatch(stresses))
+        for stresses in ['', '0', '10', '011', '0101010']:
+            self.assertIsNone(iambic.fullmatch(stresses))
+
+    def test_compile_meter_2(self):
+        ''' Test compile_meter for a measure and a foot given by stresses.'''
+        dactylic = poetry_meter.compile_meter('Dactylic Dimeter')
+        self.assertIsNotNone(dactylic.fullmatch('100x00'))
+        self.assertIsNone(dactylic.fullmatch('100'))
+        self.assertIsNone(dactylic.fullmatch('100100100'))
+        self.assertEqual(poetry_meter.compile_meter('100 dimeter').pattern,
+                         dactylic.pattern)
+
+    def test_compile_meter_4(self):
+        ''' Test compile_meter allows an inverted first foot, one other
+        inverted foot that is not the last, and a feminine ending.'''
+        pentameter = poetry_meter.compile_meter('iambic pentameter')
+        for stresses in ['1xxxxxx10x', '0101011001', '10010110010',
+                         '01010101010']:
+            self.assertIsNotNone(pentameter.fullmatch(stresses))
+        for stresses in ['0101010110', '0110100101', '010101010100',
+                         '01010101']:
+            self.assertIsNone(pentameter.fullmatch(stresses))
+        iambic = poetry_meter.compile_meter('iambic')
+        self.assertIsNotNone(iambic.fullmatch('1001'))
+        self.assertIsNone(iambic.fullmatch('10'))
+        self.assertIsNone(poetry_meter.compile_meter('trochaic').fullmatch(
+            '100'))
+
+    def test_compile_meter_3(self):
+        ''' Test compile_meter rejects what is not a meter.'''
+        for meter in ['', 'iambic pentameter twice', 'wobbly', '012',
+                      'iambic tenfold']:
+            with self.assertRaises(ValueError):
+                poetry_meter.compile_meter(meter)
+
+
+class TestCheckMeter(unittest.TestCase):
+    ''' Example unittest test method for check_meter'''
+
+    def test_check_meter_1(self):
+        ''' Test check_meter, with a dict and a Lexicon, and the analysis's
+        check_meter agree.'''
+        poem_lines = ['The poem ends.', 'Poem poem.', 'Before the antelope.',
+                      'Poem poem poem.']
+        pattern = poetry_patterns.compile_form(([0, 0, 0, 0],
+                                                ['*', '*', '*', '*']),
+                                               'iambic')
+        expected = ['Poem poem.', 'Poem poem poem.']
+        lexicon = poetry_lexicon.Lexicon(WORD_TO_PHONEMES)
+        for word_to_phonemes in [WORD_TO_PHONEMES, lexicon]:
+            self.assertEqual(poetry_functions.check_meter(
+                poem_lines, pattern, word_to_phonemes), expected)
+        analysis = poetry_analysis.analyze_poem(
+            [line + '\n' for line in poem_lines], lexicon)
+        self.assertEqual(analysis.stresses, ['x10x', '1010', '01x10x',
+                                             '101010'])
+        self.assertEqual(analysis.check_meter(pattern), expected)
+
+    def test_check_meter_2(self):
+        ''' Test check_meter for a pattern without a meter.'''
+        self.assertEqual(poetry_functions.check_meter(
+            ['Poem before.'], ([4], ['*']), WORD_TO_PHONEMES), [])
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
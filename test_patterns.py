@@ -0,0 +1,106 @@
+import io
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+import poetry_patterns
+import poetry_reader
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+class TestCompiledForm(unittest.TestCase):
+    ''' Example unittest test method for CompiledForm'''
+
+    def test_compiled_form_1(self):
+        ''' Test CompiledForm groups, wildcards and zero-syllable lines.'''
+        form = poetry_patterns.CompiledForm([8, 8, 0, 5, 8, 5],
+                                            ['B', 'A', '*', 'C', 'A', 'B'])
+        self.assertEqual(form.groups, (('A', (1, 4)), ('B', (0, 5))))
+        self.assertEqual(form.wildcards, (2,))
+        self.assertEqual(form.zero_lines, (2,))
+        self.assertEqual(form.counted_lines, (0, 1, 3, 4, 5))
+
+    def test_compiled_form_2(self):
+        ''' Test CompiledForm is indexed like the pattern and immutable.'''
+        form = poetry_patterns.CompiledForm([5, 7, 5], ['A', 'B', 'A'])
+        syllables, rhymes = form
+        self.assertEqual((syllables, rhymes), ((5, 7, 5), ('A', 'B', 'A')))
+        self.assertEqual(form, ([5, 7, 5], ['A', 'B', 'A']))
+        with self.assertRaises(AttributeError):
+            form.groups = ()
+        self.assertEqual(pickle.loads(pickle.dumps(form)), form)
+
+    def test_compile_form_1(self):
+        ''' Test compile_form compiles equal patterns only once.'''
+        form = poetry_patterns.compile_form(([1, 1], ['A', 'A']))
+        self.assertIs(poetry_patterns.compile_form(([1, 1], ['A', 'A'])),
+                      form)
+        self.assertIs(poetry_patterns.compile_form(form), form)
+
+
+class TestFormRegistry(unittest.TestCase):
+    ''' Example unittest test method for FormRegistry'''
+
+    def test_read_form_registry_1(self):
+        ''' Test read_form_registry reads the same forms as
+        read_poetry_form_descriptions and indexes them by line count.'''
+        forms_filename = os.path.join(HERE, 'poetry_forms.txt')
+        with open(forms_filename) as forms_file:
+            registry = poetry_reader.read_form_registry(forms_file)
+        with open(forms_filename) as forms_file:
+            expected = poetry_reader.read_poetry_form_descriptions(forms_file)
+        self.assertEqual(list(registry), list(expected))
+        for name in expected:
+            self.assertEqual(registry[name], expected[name])
+        self.assertEqual(registry.with_line_count(5),
+                         sorted(name for name in expected
+                                if len(expected[name][0]) == 5))
+        self.assertEqual(registry.with_line_count(100), [])
+
+    def test_read_form_registry_2(self):
+        ''' Test read_form_registry reports every problem by line number.'''
+        forms_file = io.StringIO('Couplet\n8 A\n8 A\n\n\nBad\n8\n'
+                                 '7 A-\n\nCouplet\n1 A\n\nEmpty\n')
+        with self.assertRaises(ValueError) as context:
+            poetry_reader.read_form_registry(forms_file)
+        self.assertEqual(str(context.exception).split('\n'), [
+            "line 7: expected '<syllables> <rhyme label>', not '8'",
+            "line 8: invalid rhyme label 'A-'",
+            'line 10: poetry form Couplet is already defined on line 1',
+            'line 13: poetry form Empty has no lines'])
+
+    def test_read_form_registry_3(self):
+        ''' Test read_form_registry reads meters and reports bad ones.'''
+        forms_file = io.StringIO('Couplet\nmeter iambic tetrameter\n8 A\n'
+                                 '8 A\n\nPair\n1 *\n1 *\n')
+        registry = poetry_reader.read_form_registry(forms_file)
+        self.assertEqual(registry['Couplet'].meter, 'iambic tetrameter')
+        self.assertIsNone(registry['Pair'].meter)
+        forms_file = io.StringIO('Couplet\nmeter iambic\nmeter iambic\n'
+                                 '8 A\n\nPair\nmeter wobbly\n1 *\n\n'
+                                 'Meter\nmeter 01\n')
+        with self.assertRaises(ValueError) as context:
+            poetry_reader.read_form_registry(forms_file)
+        self.assertEqual(str(context.exception).split('\n'), [
+            'line 3: poetry form Couplet already has a meter',
+            "line 7: invalid meter 'wobbly': unknown metrical foot: 'wobbly'",
+            'line 10: poetry form Meter has no lines'])
+
+    def test_load_forms_1(self):
+        ''' Test load_forms reads the registry back from its cache.'''
+        temp_dir = tempfile.mkdtemp()
+        try:
+            forms_filename = os.path.join(temp_dir, 'forms.txt')
+            with open(forms_filename, 'w') as forms_file:
+                forms_file.write('Couplet\n8 A\n8 A\n')
+            registry = poetry_reader.load_forms(forms_filename)
+            self.assertTrue(os.path.exists(forms_filename + '.cache'))
+            cached = poetry_reader.load_forms(forms_filename)
+            self.assertEqual(dict(cached), dict(registry))
+            self.assertEqual(cached.form_index(), {2: ['Couplet']})
+        finally:
+            shutil.rmtree(temp_dir)
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
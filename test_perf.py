@@ -0,0 +1,62 @@
+import os
+import unittest
+import poetry_functions
+import poetry_perf
+import poetry_reader
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+class TestMakeCorpus(unittest.TestCase):
+    ''' Example unittest test method for make_corpus'''
+
+    @classmethod
+    def setUpClass(cls):
+        cls.lexicon = poetry_reader.load_lexicon(
+            os.path.join(HERE, 'dictionary.txt'))
+        with open(os.path.join(HERE, 'poetry_forms.txt')) as forms_file:
+            cls.forms = poetry_reader.read_poetry_form_descriptions(forms_file)
+
+    def test_make_corpus_1(self):
+        ''' Test make_corpus gives the same poems for the same seed.'''
+        pattern = self.forms['Limerick']
+        corpus = poetry_perf.make_corpus(self.lexicon, pattern, 20, 7)
+        self.assertEqual(
+            poetry_perf.make_corpus(self.lexicon, pattern, 20, 7), corpus)
+        self.assertNotEqual(
+            poetry_perf.make_corpus(self.lexicon, pattern, 20, 8), corpus)
+
+    def test_make_corpus_2(self):
+        ''' Test the poems that are not broken satisfy their form.'''
+        for form_name in ['Haiku', 'Limerick', 'Sonnet']:
+            pattern = self.forms[form_name]
+            corpus = poetry_perf.make_corpus(self.lexicon, pattern,
+                                             2 * poetry_perf.BROKEN_EVERY)
+            for i in range(len(corpus)):
+                poem_lines = poetry_functions.get_poem_lines(corpus[i])
+                problems = (
+                    poetry_functions.check_syllables(poem_lines, pattern,
+                                                     self.lexicon),
+                    poetry_functions.check_rhyme_scheme(poem_lines, pattern,
+                                                        self.lexicon))
+                broken = (i % poetry_perf.BROKEN_EVERY ==
+                          poetry_perf.BROKEN_EVERY - 1)
+                self.assertEqual(problems != ([], []), broken)
+
+
+class TestCompare(unittest.TestCase):
+    ''' Example unittest test method for compare'''
+
+    def test_compare_1(self):
+        ''' Test compare only reports benchmarks slower by more than the
+        threshold that are in both results.'''
+        baseline = {'results': {'a': {'seconds': 2.0}, 'b': {'seconds': 2.0},
+                                'c': {'seconds': 2.0}}}
+        current = {'results': {'a': {'seconds': 2.5}, 'b': {'seconds': 1.0},
+                               'd': {'seconds': 9.0}}}
+        self.assertEqual(poetry_perf.compare(baseline, current, 0.2),
+                         [('a', 2.0, 2.5, 1.25)])
+        self.assertEqual(poetry_perf.compare(baseline, current, 0.3), [])
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
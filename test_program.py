@@ -0,0 +1,113 @@
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest import mock
+import poetry_instrument
+import poetry_program
+import poetry_reader
+
+DICTIONARY = ''';;; # A tiny CMU-style dictionary
+GAP  G AE1 P
+CAP  K AE1 P
+'''
+
+POETRY_FORMS = '''Couplet
+1 A
+1 A
+'''
+
+class TestLoadInBackground(unittest.TestCase):
+    ''' Example unittest test method for load_in_background'''
+
+    def test_load_in_background_1(self):
+        ''' Test load_in_background returns before the call finishes, and
+        the future has its result.'''
+        release = threading.Event()
+
+        def load(value):
+            release.wait(10)
+            return value
+
+        future = poetry_program.load_in_background(load, 'loaded')
+        self.assertFalse(future.done())
+        release.set()
+        self.assertEqual(future.result(10), 'loaded')
+
+
+class TestCheckPoems(unittest.TestCase):
+    ''' Example unittest test method for check_poems'''
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.dictionary = os.path.join(self.temp_dir, 'dictionary.txt')
+        self.poetry_forms = os.path.join(self.temp_dir, 'poetry_forms.txt')
+        self.poem = os.path.join(self.temp_dir, 'couplet.txt')
+        for filename, contents in [(self.dictionary, DICTIONARY),
+                                   (self.poetry_forms, POETRY_FORMS),
+                                   (self.poem, 'Gap\nCap\n')]:
+            with open(filename, 'w') as output_file:
+                output_file.write(contents)
+
+    def tearDown(self):
+        poetry_instrument.disable()
+        shutil.rmtree(self.temp_dir)
+
+    def check_poems(self, inputs, load_lexicon=poetry_reader.load_lexicon):
+        ''' Run check_poems on the temporary files with inputs as the
+        user's answers, and return what it printed.'''
+        output = io.StringIO()
+        with mock.patch.object(poetry_program, 'DICTIONARY_FILENAME',
+                               self.dictionary), \
+             mock.patch.object(poetry_program, 'POETRY_FORMS_FILENAME',
+                               self.poetry_forms), \
+             mock.patch.object(poetry_reader, 'load_lexicon', load_lexicon), \
+             mock.patch('builtins.input', side_effect=inputs), \
+             contextlib.redirect_stdout(output):
+            poetry_program.check_poems()
+        return output.getvalue()
+
+    def test_check_poems_1(self):
+        ''' Test the menu is shown before the dictionary is loaded, and
+        checking a poem waits for it.'''
+        release = threading.Event()
+        prompted = []
+
+        def load_lexicon(dictionary_filename):
+            release.wait(10)
+            with open(dictionary_filename) as dictionary_file:
+                return poetry_reader.read_pronunciation(dictionary_file)
+
+        answers = iter([self.poem, '0'])
+
+        def answer(prompt):
+            prompted.append(prompt)
+            if len(prompted) == 1:
+                # The load can't have finished before the first prompt.
+                release.set()
+                return '1'
+            return next(answers)
+
+        poetry_instrument.enable(trace_memory=False)
+        output = self.check_poems(answer, load_lexicon)
+        marks = poetry_instrument.report()['marks']
+        self.assertIn('1: Couplet', prompted[0])
+        self.assertIn('right number of syllables', output)
+        self.assertIn('follows the rhyme scheme', output)
+        self.assertLess(marks['first_prompt'], marks['dictionary_loaded'])
+        self.assertLess(marks['dictionary_loaded'], marks['first_result'])
+
+    def test_check_poems_2(self):
+        ''' Test quitting at once still waits for the dictionary, so that
+        its load is reported.'''
+        poetry_instrument.enable(trace_memory=False)
+        self.check_poems(['0'])
+        marks = poetry_instrument.report()['marks']
+        self.assertIn('dictionary_loaded', marks)
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -0,0 +1,90 @@
+import unittest
+import poetry_rhymes
+
+WORD_TO_PHONEMES = {'GAP': ['G', 'AE1', 'P'],
+                    'CAP': ['K', 'AE1', 'P'],
+                    'MISHAP': ['M', 'IH1', 'S', 'HH', 'AE2', 'P'],
+                    'OFF': ['AO1', 'F'],
+                    'SCOFF': ['S', 'K', 'AO1', 'F'],
+                    'POEM': ['P', 'OW1', 'AH0', 'M'],
+                    'HMM': ['HH', 'M'],
+                    'A': ['AH0'],
+                    'THE': ['DH', 'AH0']}
+
+class TestRhymeIndex(unittest.TestCase):
+    ''' Example unittest test method for RhymeIndex'''
+
+    def setUp(self):
+        self.index = poetry_rhymes.RhymeIndex(WORD_TO_PHONEMES)
+
+    def test_rhymes_with_1(self):
+        ''' Test rhymes_with finds every rhyme but the word itself.'''
+        self.assertEqual(self.index.rhymes_with('GAP'), ('CAP',))
+        self.assertEqual(self.index.rhymes_with('SCOFF'), ('OFF',))
+
+    def test_rhymes_with_2(self):
+        ''' Test rhymes_with limited to a number of syllables.'''
+        self.assertEqual(self.index.rhymes_with('GAP', syllables=1), ('CAP',))
+        self.assertEqual(self.index.rhymes_with('GAP', syllables=3), ())
+
+    def test_rhymes_with_3(self):
+        ''' Test rhymes_with for words without a rhyme tail or unknown.'''
+        self.assertEqual(self.index.rhymes_with('HMM'), ())
+        self.assertEqual(self.index.rhymes_with('ZAP'), ())
+
+    def test_words_for_1(self):
+        ''' Test words_for by rhyme tail and syllables.'''
+        tail = self.index.rhyme_tail('GAP')
+        self.assertEqual(tail, ('AE1', 'P'))
+        self.assertEqual(self.index.words_for(tail), ('CAP', 'GAP'))
+        self.assertEqual(self.index.words_for(('AE2', 'P'), 2), ('MISHAP',))
+        self.assertEqual(self.index.words_for(('UW1',)), ())
+
+
+
+class TestSuggestFixes(unittest.TestCase):
+    ''' Example unittest test method for suggest_fixes'''
+
+    def setUp(self):
+        self.index = poetry_rhymes.RhymeIndex(WORD_TO_PHONEMES)
+
+    def test_suggest_fixes_1(self):
+        ''' Test suggest_fixes for a poem with no problems.'''
+        poem_lines = ['A gap', 'The cap']
+        pattern = ([2, 2], ['A', 'A'])
+        self.assertEqual(poetry_rhymes.suggest_fixes(
+            poem_lines, pattern, WORD_TO_PHONEMES, 5, self.index), [])
+
+    def test_suggest_fixes_2(self):
+        ''' Test suggest_fixes fixes the syllables of a rhyming line.'''
+        poem_lines = ['The gap', 'Cap', 'A off']
+        pattern = ([2, 2, 2], ['A', 'A', 'B'])
+        self.assertEqual(poetry_rhymes.suggest_fixes(
+            poem_lines, pattern, WORD_TO_PHONEMES, 5, self.index),
+                         [('Cap', [])])
+
+    def test_suggest_fixes_3(self):
+        ''' Test suggest_fixes fixes the odd line out of a rhyme group.'''
+        poem_lines = ['A gap', 'A off', 'The cap']
+        pattern = ([2, 0, 2], ['A', 'A', 'A'])
+        self.assertEqual(poetry_rhymes.suggest_fixes(
+            poem_lines, pattern, WORD_TO_PHONEMES, 5, self.index),
+                         [('A off', ['CAP', 'GAP'])])
+
+    def test_suggest_fixes_4(self):
+        ''' Test suggest_fixes raises KeyError for an unknown word.'''
+        self.assertRaises(KeyError, poetry_rhymes.suggest_fixes,
+                          ['A zap'], ([2], ['*']), WORD_TO_PHONEMES)
+
+    def test_suggest_fixes_5(self):
+        ''' Test suggest_fixes raises ValueError for a poem with fewer or
+        more lines than the pattern.'''
+        pattern = ([2, 2], ['A', 'A'])
+        for poem_lines in [['A gap'], ['A gap', 'The cap', 'A cap']]:
+            self.assertRaises(ValueError, poetry_rhymes.suggest_fixes,
+                              poem_lines, pattern, WORD_TO_PHONEMES, 5,
+                              self.index)
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -0,0 +1,143 @@
+import asyncio
+import json
+import os
+import unittest
+import poetry_server
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+HAIKU = 'The first cold shower\nEven the monkey seems to want\nA little coat of straw\n'
+
+class TestPoetryService(unittest.TestCase):
+    ''' Example unittest test method for PoetryService'''
+
+    @classmethod
+    def setUpClass(cls):
+        cls.service = poetry_server.PoetryService(
+            1, os.path.join(HERE, 'dictionary.txt'),
+            os.path.join(HERE, 'poetry_forms.txt'))
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.service.close()
+
+    def handle(self, method, path, request):
+        body = json.dumps(request).encode('utf-8')
+        return asyncio.run(self.service.handle(method, path, body))
+
+    def test_handle_1(self):
+        ''' Test /check with a haiku.'''
+        status, response = self.handle('POST', '/check', 
+                                       {'poem': HAIKU, 'form': 'Haiku'})
+        self.assertEqual(status, 200)
+        self.assertEqual(response['form'], 'Haiku')
+        self.assertTrue(response['lines'])
+
+    def test_handle_2(self):
+        ''' Test /detect and /batch agree on the forms a poem matches.'''
+        with open(os.path.join(HERE, 'limerick1.txt')) as poem_file:
+            poem = poem_file.read()
+        status, detected = self.handle('POST', '/detect', {'poem': poem})
+        self.assertEqual(status, 200)
+        status, response = self.handle('POST', '/batch', 
+                                       {'poems': [{'name': 'l', 
+                                                   'poem': poem}]})
+        self.assertEqual(status, 200)
+        matched = [result['form'] for result in response['results'] 
+                   if result['ok']]
+        self.assertEqual(detected['forms'], matched)
+
+    def test_handle_3(self):
+        ''' Test bad requests are answered with an error status.'''
+        self.assertEqual(self.handle('POST', '/check', {'poem': HAIKU})[0], 
+                         400)
+        self.assertEqual(self.handle('POST', '/check', 
+                                     {'poem': HAIKU, 'form': 'Ode'})[0], 422)
+        self.assertEqual(self.handle('GET', '/check', {})[0], 405)
+        self.assertEqual(self.handle('POST', '/nothing', {})[0], 404)
+        self.assertEqual(asyncio.run(
+            self.service.handle('POST', '/detect', b'{'))[0], 400)
+
+    def test_handle_4(self):
+        ''' Test /detect and /batch agree that a poem with the syllables and
+        rhymes of a Sonnet but not its meter is not one.'''
+        poem = 'Poem poem poem poem poem\n' * 14
+        status, detected = self.handle('POST', '/detect', {'poem': poem})
+        self.assertEqual(status, 200)
+        self.assertNotIn('Sonnet', detected['forms'])
+        failure = detected['failures']['Sonnet']
+        self.assertEqual((failure['syllables'], failure['rhymes']), ([], []))
+        self.assertEqual(len(failure['meter']), 14)
+        status, response = self.handle('POST', '/batch',
+                                       {'poems': [{'name': 's',
+                                                   'poem': poem}],
+                                        'forms': ['Sonnet']})
+        self.assertFalse(response['results'][0]['ok'])
+
+    def test_read_request_1(self):
+        ''' Test a negative or non-numeric Content-Length is a bad
+        request.'''
+        async def read_request(content_length):
+            reader = asyncio.StreamReader()
+            reader.feed_data(b'POST /check HTTP/1.1\r\nContent-Length: ' +
+                             content_length + b'\r\n\r\n{}')
+            reader.feed_eof()
+            try:
+                return await poetry_server._read_request(reader)
+            except poetry_server.RequestError as error:
+                return error.status
+
+        for content_length in [b'-1', b'two', b'+2', b'']:
+            self.assertEqual(asyncio.run(read_request(content_length)), 400)
+        self.assertEqual(asyncio.run(read_request(b'2'))[3], b'{}')
+
+    def test_read_request_2(self):
+        ''' Test the query string is left out of the path, and a body with a
+        Transfer-Encoding is refused.'''
+        async def read_request(request):
+            reader = asyncio.StreamReader()
+            reader.feed_data(request)
+            reader.feed_eof()
+            try:
+                return await poetry_server._read_request(reader)
+            except poetry_server.RequestError as error:
+                return error.status
+
+        actual = asyncio.run(read_request(
+            b'POST /check?verbose=1 HTTP/1.1\r\nContent-Length: 2\r\n\r\n{}'))
+        self.assertEqual(actual[1], '/check')
+        actual = asyncio.run(read_request(
+            b'POST /check HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n'
+            b'2\r\n{}\r\n0\r\n\r\n'))
+        self.assertEqual(actual, 501)
+
+    def test_serve_1(self):
+        ''' Test a request over HTTP on a kept-alive connection.'''
+        async def request_twice():
+            ready = asyncio.get_running_loop().create_future()
+            server = asyncio.ensure_future(poetry_server.serve(
+                self.service, '127.0.0.1', 0, ready.set_result))
+            port = await ready
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            responses = []
+            for i in range(2):
+                writer.write(b'GET /forms HTTP/1.1\r\nHost: localhost\r\n\r\n')
+                status_line = await reader.readline()
+                length = 0
+                line = await reader.readline()
+                while line != b'\r\n':
+                    if line.lower().startswith(b'content-length:'):
+                        length = int(line.split(b':')[1])
+                    line = await reader.readline()
+                responses.append((status_line, 
+                                  json.loads(await reader.readexactly(length))))
+            writer.close()
+            server.cancel()
+            return responses
+
+        responses = asyncio.run(request_twice())
+        self.assertEqual(responses[1][0], b'HTTP/1.1 200 OK\r\n')
+        self.assertIn('Haiku', responses[1][1]['forms'])
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -0,0 +1,130 @@
+import os
+import random
+import unittest
+import poetry_analysis
+import poetry_functions
+import poetry_instrument
+import poetry_perf
+import poetry_reader
+import poetry_session
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+class TestPoemSession(unittest.TestCase):
+    ''' Example unittest test method for PoemSession'''
+
+    @classmethod
+    def setUpClass(cls):
+        cls.lexicon = poetry_reader.load_lexicon(
+            os.path.join(HERE, 'dictionary.txt'))
+        cls.forms = poetry_reader.load_forms(
+            os.path.join(HERE, 'poetry_forms.txt'))
+
+    def assert_matches_analysis(self, session, pattern,
+                                word_to_phonemes=None):
+        ''' Assert that the session's diagnostics are what a fresh analysis
+        of its lines gives, with word_to_phonemes or the lexicon.'''
+        if word_to_phonemes is None:
+            word_to_phonemes = self.lexicon
+        analysis = poetry_analysis.analyze_poem(
+            [line + '\n' for line in session.lines], word_to_phonemes)
+        diagnostics = session.diagnostics()
+        lines_ok = analysis.has_line_count(pattern)
+        self.assertEqual(diagnostics['lines'], lines_ok)
+        self.assertEqual(diagnostics['unknown'], analysis.unknown_words)
+        if lines_ok:
+            self.assertEqual(diagnostics['syllables'],
+                             analysis.check_syllables(pattern))
+            self.assertEqual(diagnostics['rhymes'],
+                             analysis.check_rhyme_scheme(pattern))
+            if 'meter' in diagnostics:
+                self.assertEqual(diagnostics['meter'],
+                                 analysis.check_meter(pattern))
+
+    def test_replace_line_1(self):
+        ''' Test the diagnostics after random edits match a fresh analysis
+        of the edited poem.'''
+        rng = random.Random(23)
+        for form_name in ['Limerick', 'Sonnet']:
+            pattern = self.forms[form_name]
+            corpus = poetry_perf.make_corpus(self.lexicon, pattern, 8)
+            session = poetry_session.PoemSession(
+                poetry_functions.get_poem_lines(corpus[0]), pattern,
+                self.lexicon)
+            self.assert_matches_analysis(session, pattern)
+            for poem in corpus[1:]:
+                other_lines = poetry_functions.get_poem_lines(poem)
+                for edit in range(10):
+                    position = rng.randrange(len(other_lines))
+                    session.replace_line(position, other_lines[position])
+                    self.assert_matches_analysis(session, pattern)
+            session.replace_line(0, 'Zyzzogeton wurble')
+            self.assert_matches_analysis(session, pattern)
+
+    def test_replace_line_2(self):
+        ''' Test replace_line tokenizes only the line that changed.'''
+        pattern = self.forms['Limerick']
+        corpus = poetry_perf.make_corpus(self.lexicon, pattern, 2)
+        session = poetry_session.PoemSession(
+            poetry_functions.get_poem_lines(corpus[0]), pattern, self.lexicon)
+        poetry_instrument.enable(trace_memory=False)
+        try:
+            session.replace_line(2, poetry_functions.get_poem_lines(
+                corpus[1])[2])
+            report = poetry_instrument.report()
+        finally:
+            poetry_instrument.disable()
+        self.assertEqual(
+            report['functions']['poetry_tokenizer.tokenize_line']['calls'], 1)
+
+    def test_replace_line_3(self):
+        ''' Test blank lines, made by any edit, don't take a place in the
+        pattern.'''
+        word_to_phonemes = {'GAP': ['G', 'AE1', 'P'],
+                            'CAP': ['K', 'AE1', 'P'],
+                            'NAP': ['N', 'AE1', 'P'],
+                            'OFF': ['AO1', 'F']}
+        pattern = ([1, 1, 1], ['A', 'A', 'A'])
+        session = poetry_session.PoemSession(['gap', 'cap', 'nap'], pattern,
+                                             word_to_phonemes)
+        session.replace_line(1, '')
+        diagnostics = session.insert_line(3, 'off')
+        self.assertEqual((diagnostics['syllables'], diagnostics['rhymes']),
+                         ([], [['gap', 'nap', 'off']]))
+        diagnostics = session.replace_line(1, 'cap')
+        self.assertFalse(diagnostics['lines'])
+        diagnostics = session.delete_line(3)
+        self.assertTrue(diagnostics['ok'])
+
+        rng = random.Random(25)
+        for edit in range(200):
+            line = rng.choice(['gap', 'cap', 'off', '', ' ', '...'])
+            position = rng.randrange(len(session.lines) + 1)
+            if position == len(session.lines) or rng.random() < 0.2:
+                session.insert_line(position, line)
+            elif len(session.lines) > 3 and rng.random() < 0.2:
+                session.delete_line(position)
+            else:
+                session.replace_line(position, line)
+            self.assert_matches_analysis(session, pattern, word_to_phonemes)
+
+    def test_insert_line_1(self):
+        ''' Test inserting and deleting lines changes the line count and
+        moves the lines against the pattern.'''
+        pattern = self.forms['Haiku']
+        poem_lines = ['The first line leads off,', 'With a gap before the next.',
+                      'Then the poem ends.']
+        session = poetry_session.PoemSession(poem_lines[1:], pattern,
+                                             self.lexicon)
+        self.assertFalse(session.diagnostics()['lines'])
+        self.assertTrue(session.insert_line(0, poem_lines[0])['ok'])
+        self.assertEqual(session.lines, poem_lines)
+        diagnostics = session.delete_line(1)
+        self.assertFalse(diagnostics['lines'])
+        diagnostics = session.insert_line(2, '...')
+        self.assertFalse(diagnostics['lines'])
+        self.assert_matches_analysis(session, pattern)
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -0,0 +1,119 @@
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+import poetry_functions
+import poetry_stores
+
+WORD_TO_PHONEMES = {'NEXT': ['N', 'EH1', 'K', 'S', 'T'],
+                    'GAP': ['G', 'AE1', 'P'],
+                    'BEFORE': ['B', 'IH0', 'F', 'AO1', 'R'],
+                    'LEADS': ['L', 'IY1', 'D', 'Z'],
+                    'WITH': ['W', 'IH1', 'DH'],
+                    'LINE': ['L', 'AY1', 'N'],
+                    'THEN': ['DH', 'EH1', 'N'],
+                    'THE': ['DH', 'AH0'], 
+                    'A': ['AH0'], 
+                    'FIRST': ['F', 'ER1', 'S', 'T'], 
+                    'ENDS': ['EH1', 'N', 'D', 'Z'],
+                    'POEM': ['P', 'OW1', 'AH0', 'M'],
+                    'OFF': ['AO1', 'F'],
+                    'SCOFF': ['S', 'K', 'AO1', 'F'],
+                    'ODD': ['XX1', 'D']}
+POEM_LINES = ['The first line leads off,', 'With a gap before the next.', 
+              'Then the poem ends.', 'Before the scoff.']
+PATTERN = ([5, 7, 5, 4], ['A', 'B', 'A', 'A'])
+
+class TestCompactPronunciation(unittest.TestCase):
+    ''' Example unittest test method for CompactPronunciation'''
+
+    def setUp(self):
+        self.store = poetry_stores.CompactPronunciation(WORD_TO_PHONEMES)
+
+    def test_compact_pronunciation_1(self):
+        ''' Test CompactPronunciation round-trips every pronunciation,
+        including phonemes outside the ARPAbet table.'''
+        self.assertEqual(dict(self.store), WORD_TO_PHONEMES)
+        self.assertNotIn('MISSING', self.store)
+        self.assertRaises(KeyError, lambda: self.store['MISSING'])
+
+    def test_compact_pronunciation_2(self):
+        ''' Test check_syllables and check_rhyme_scheme accept a
+        CompactPronunciation unchanged.'''
+        self.assertEqual(
+            poetry_functions.check_syllables(POEM_LINES, PATTERN, self.store),
+            poetry_functions.check_syllables(POEM_LINES, PATTERN, 
+                                             WORD_TO_PHONEMES))
+        self.assertEqual(
+            poetry_functions.check_rhyme_scheme(POEM_LINES, PATTERN, 
+                                                self.store),
+            poetry_functions.check_rhyme_scheme(POEM_LINES, PATTERN, 
+                                                WORD_TO_PHONEMES))
+
+    def test_compact_pronunciation_3(self):
+        ''' Test CompactPronunciation survives pickling.'''
+        actual = pickle.loads(pickle.dumps(self.store))
+        self.assertEqual(dict(actual), WORD_TO_PHONEMES)
+
+    def test_compact_pronunciation_4(self):
+        ''' Test a CompactPronunciation attached through shared memory.'''
+        segment, handle = self.store.share()
+        try:
+            actual = poetry_stores.attach_shared_pronunciation(
+                pickle.loads(pickle.dumps(handle)))
+            self.assertEqual(dict(actual), WORD_TO_PHONEMES)
+            self.assertEqual(actual.syllables('BEFORE'), 2)
+            self.assertEqual(actual.rhyme_key('OFF'), 
+                             self.store.rhyme_key('SCOFF'))
+        finally:
+            segment.close()
+            segment.unlink()
+
+
+class TestMappedPronunciation(unittest.TestCase):
+    ''' Example unittest test method for MappedPronunciation'''
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        filename = os.path.join(self.temp_dir, 'dictionary.txt')
+        with open(filename, 'w') as dictionary_file:
+            dictionary_file.write(';;; # A tiny CMU-style dictionary\n;;;\n')
+            for word in sorted(WORD_TO_PHONEMES):
+                dictionary_file.write('{}  {}\n'.format(
+                    word, ' '.join(WORD_TO_PHONEMES[word])))
+        self.store = poetry_stores.MappedPronunciation(filename)
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_mapped_pronunciation_1(self):
+        ''' Test MappedPronunciation finds every word, including the first
+        and last entries.'''
+        for word in WORD_TO_PHONEMES:
+            self.assertEqual(self.store[word], WORD_TO_PHONEMES[word])
+        self.assertEqual(len(self.store), len(WORD_TO_PHONEMES))
+
+    def test_mapped_pronunciation_2(self):
+        ''' Test MappedPronunciation with words that are not in the file.'''
+        for word in ['AAA', 'ZZZ', 'LINES', '', 'GA']:
+            self.assertNotIn(word, self.store)
+        self.assertRaises(KeyError, lambda: self.store['MISSING'])
+
+    def test_mapped_pronunciation_3(self):
+        ''' Test check_syllables and check_rhyme_scheme accept a
+        MappedPronunciation unchanged.'''
+        self.assertEqual(
+            poetry_functions.check_syllables(POEM_LINES, PATTERN, self.store),
+            poetry_functions.check_syllables(POEM_LINES, PATTERN, 
+                                             WORD_TO_PHONEMES))
+        self.assertEqual(
+            poetry_functions.check_rhyme_scheme(POEM_LINES, PATTERN, 
+                                                self.store),
+            poetry_functions.check_rhyme_scheme(POEM_LINES, PATTERN, 
+                                                WORD_TO_PHONEMES))
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
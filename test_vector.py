@@ -0,0 +1,71 @@
+import unittest
+import poetry_functions
+import poetry_lexicon
+import poetry_vector
+
+WORD_TO_PHONEMES = {'GAP': ['G', 'AE1', 'P'],
+                    'CAP': ['K', 'AE1', 'P'],
+                    'MISHAP': ['M', 'IH1', 'S', 'HH', 'AE2', 'P'],
+                    'OFF': ['AO1', 'F'],
+                    'SCOFF': ['S', 'K', 'AO1', 'F'],
+                    'POEM': ['P', 'OW1', 'AH0', 'M'],
+                    'HMM': ['HH', 'M'],
+                    'A': ['AH0'],
+                    'THE': ['DH', 'AH0']}
+
+POEMS = [['A gap', 'The cap', 'A scoff'],
+         ['A poem', 'Off, hmm', 'The mishap!'],
+         ['Hmm', 'A cap', 'Hmm'],
+         ['The gap', 'A poem off', '"Off!"']]
+
+class TestCheckBatch(unittest.TestCase):
+    ''' Example unittest test method for check_batch'''
+
+    def setUp(self):
+        self.lexicon = poetry_lexicon.Lexicon(WORD_TO_PHONEMES)
+
+    def assert_matches_checks(self, poems, pattern):
+        ''' Assert that check_batch, with and without NumPy, returns what
+        check_syllables and check_rhyme_scheme do for each poem.'''
+        expected = []
+        for poem_lines in poems:
+            expected.append((
+                poetry_functions.check_syllables(poem_lines, pattern,
+                                                 self.lexicon),
+                poetry_functions.check_rhyme_scheme(poem_lines, pattern,
+                                                    self.lexicon)))
+        engines = [False]
+        if poetry_vector.numpy is not None:
+            engines.append(True)
+        for use_numpy in engines:
+            self.assertEqual(poetry_vector.check_batch(
+                poems, pattern, self.lexicon, use_numpy), expected)
+
+    def test_check_batch_1(self):
+        ''' Test check_batch matches the checks for a rhyme scheme.'''
+        self.assert_matches_checks(POEMS, ([2, 2, 2], ['A', 'A', 'A']))
+        self.assert_matches_checks(POEMS, ([2, 0, 3], ['A', 'B', 'A']))
+
+    def test_check_batch_2(self):
+        ''' Test check_batch matches the checks with free lines.'''
+        self.assert_matches_checks(POEMS, ([0, 0, 0], ['*', '*', '*']))
+        self.assert_matches_checks(POEMS, ([1, 2, 2], ['B', '*', 'B']))
+
+    def test_check_batch_3(self):
+        ''' Test check_batch for poems that can't be checked.'''
+        poems = [['A gap', 'A zap', 'A cap'], ['A gap', 'A cap'],
+                 ['A gap', '', 'A cap'], ['A gap', 'A cap', 'A nap']]
+        self.assertEqual(poetry_vector.check_batch(
+            poems, ([2, 2, 2], ['A', 'A', 'A']), self.lexicon),
+                         [None, None, None, None])
+
+    def test_check_batch_4(self):
+        ''' Test check_batch for a one-line pattern of 0 syllables, which
+        only looks up the last word.'''
+        poems = [['Zap the gap'], ['The zap']]
+        self.assertEqual(poetry_vector.check_batch(
+            poems, ([0], ['*']), WORD_TO_PHONEMES), [([], []), None])
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)